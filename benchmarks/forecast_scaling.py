@@ -0,0 +1,90 @@
+"""
+Forecast Fit Scaling Benchmark
+Times the Holt-Winters grid fit and the one-day incremental update against the
+number of series, on synthetic Poisson daily counts with a weekly rhythm.
+
+Usage:
+    python -m benchmarks.forecast_scaling --days 730 --series 10 100 1000 10000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from src.forecasting import GRID, HORIZON_DAYS, HoltWinters
+
+WEEKLY_PROFILE = np.array([1.2, 1.1, 1.0, 1.0, 1.1, 0.8, 0.3])
+
+
+def synthetic_counts(days, series, seed=0):
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(2, 50, size=series)
+    return rng.poisson(WEEKLY_PROFILE[np.arange(days) % 7][:, None] * scale)
+
+
+def time_series_count(days, series, repeat):
+    counts = synthetic_counts(days + 1, series)
+    fit_times, update_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model = HoltWinters.fit(counts[:-1])
+        fit_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model.update(counts[-1])
+        model.forecast(HORIZON_DAYS)
+        update_times.append(time.perf_counter() - start)
+
+    holdout = synthetic_counts(days + HORIZON_DAYS, series)
+    model = HoltWinters.fit(holdout[:-HORIZON_DAYS])
+    actual = holdout[-HORIZON_DAYS:]
+    return {
+        "series": series,
+        "days": days,
+        "fit_ms": round(min(fit_times) * 1000, 2),
+        "fit_us_per_series": round(min(fit_times) / series * 1e6, 2),
+        "update_ms": round(min(update_times) * 1000, 3),
+        "mae_holt_winters": round(float(np.abs(model.forecast(HORIZON_DAYS) - actual).mean()), 3),
+        "mae_seasonal_naive": round(float(np.abs(model.seasonal_naive(HORIZON_DAYS) - actual).mean()), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure forecast fit time against the number of series")
+    parser.add_argument("--days", type=int, default=730, help="Days of history per series")
+    parser.add_argument("--series", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for series in args.series:
+        print(f"⏱️  {series} series x {args.days} days ...")
+        results.append(time_series_count(args.days, series, args.repeat))
+
+    print("\n" + "=" * 78)
+    print(f"{'series':>7} {'fit ms':>10} {'us/series':>10} {'update ms':>10} {'MAE HW':>8} {'MAE naive':>10}")
+    for r in results:
+        print(f"{r['series']:>7} {r['fit_ms']:>10} {r['fit_us_per_series']:>10} {r['update_ms']:>10} "
+              f"{r['mae_holt_winters']:>8} {r['mae_seasonal_naive']:>10}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "days": args.days,
+        "grid_size": len(GRID),
+        "cpu_count": os.cpu_count(),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-forecast-{args.days}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
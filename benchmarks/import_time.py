@@ -0,0 +1,96 @@
+"""
+Import-Time Budget
+Measures cold import cost of the API and pipeline entry points with
+`python -X importtime` and fails when a module exceeds its budget.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 5 --top 10
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in milliseconds (cold interpreter, warm disk cache)
+IMPORT_BUDGETS_MS = {
+    "src.app": 700,
+    "src.data_cleaning": 600,
+    "src.json_kb_generator": 600,
+    "src.eda_enhanced": 600,
+}
+
+# Modules that must never be pulled in at import time
+FORBIDDEN_IMPORTS = {
+    "src.app": ["pandas", "google.generativeai", "matplotlib"],
+    "src.eda_enhanced": ["matplotlib", "seaborn"],
+}
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module, runs=3):
+    """Best-of-N cumulative import time (ms) and the per-module breakdown of the best run"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    best_ms, best_modules = None, None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+        modules = {}
+        for match in LINE.finditer(proc.stderr):
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {"self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2}
+        total_ms = modules[module]["cumulative_ms"]
+        if best_ms is None or total_ms < best_ms:
+            best_ms, best_modules = total_ms, modules
+    return best_ms, best_modules
+
+
+def check(runs=3, top=5):
+    """Measure every budgeted module; returns (results, failures)"""
+    results, failures = {}, []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        total_ms, modules = measure(module, runs)
+        results[module] = round(total_ms, 1)
+        status = "✅" if total_ms <= budget else "❌"
+        print(f"{status} {module:<24} {total_ms:>8.1f} ms (budget {budget} ms)")
+
+        heaviest = sorted(
+            (m for m in modules.items() if m[1]["depth"] == 1),
+            key=lambda m: m[1]["cumulative_ms"], reverse=True
+        )[:top]
+        for name, info in heaviest:
+            print(f"     {name:<40} {info['cumulative_ms']:>8.1f} ms")
+
+        if total_ms > budget:
+            failures.append(f"{module} took {total_ms:.0f} ms (budget {budget} ms)")
+        for forbidden in FORBIDDEN_IMPORTS.get(module, []):
+            if forbidden in modules:
+                failures.append(f"{module} imports {forbidden} at import time")
+                print(f"     ❌ eagerly imports {forbidden}")
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets")
+    parser.add_argument("--runs", type=int, default=3, help="Interpreter launches per module (best is kept)")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest direct imports to list")
+    args = parser.parse_args()
+
+    _, failures = check(args.runs, args.top)
+    if failures:
+        print("\n" + "\n".join(f"❌ {f}" for f in failures))
+        sys.exit(1)
+    print("\n✅ All modules within their import budgets")
+
+
+if __name__ == "__main__":
+    main()
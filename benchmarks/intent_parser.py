@@ -0,0 +1,175 @@
+"""
+Intent Parser Throughput
+Parses synthetic patient messages with dictionaries of growing size and reports
+messages per second for:
+- legacy: the previous per-keyword re.search and substring scans over the same dictionaries
+- parse: IntentParser.parse one message at a time
+- parse_batch: IntentParser.parse_batch over the whole stream (repeated messages parsed once)
+plus how many trap messages ("pain" inside "Spain") each approach tags with an entity.
+
+Usage:
+    python -m benchmarks.intent_parser --messages 20000 --vocab 25 500 5000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from benchmarks.synthetic_data import BRANCHES, DISEASES, FIRST_NAMES, LAST_NAMES
+from src.nlp import INTENTS, IntentParser
+
+SYLLABLES = ["ka", "ra", "mi", "no", "zu", "sha", "bad", "pur", "ab", "lan", "dhi", "gul", "ta", "fa", "qa", "ri"]
+TEMPLATES = [
+    "I want to book an appointment with {doctor} for {disease} in {area}",
+    "please cancel my appointment with {doctor}",
+    "is {doctor} available on monday",
+    "when is the {specialty} clinic open in {area}",
+    "tell me about {disease} symptoms",
+    "what is the treatment for {disease}",
+    "can I see a doctor for {disease} today",
+    "reschedule my visit to {area}",
+    "hello, is anyone there?",
+]
+# Substring traps: each contains a dictionary word inside a longer word
+TRAPS = ["I just got back from Spain", "my coldplay tickets", "the influencer said so", "flue gas at the factory"]
+
+
+class LegacyIntentParser:
+    """The parser before the compiled matcher, with its lists swapped for the benchmark dictionaries"""
+
+    def __init__(self, entities):
+        self.intents = INTENTS
+        self.specialties = [s.lower() for s in entities["SPECIALTY"]]
+        self.areas = [a.lower() for a in entities["AREA"]]
+        self.diseases = [d.lower() for d in entities["DISEASE"]] + ["cold", "flu", "pain"]
+
+    def parse(self, text):
+        text = text.lower()
+        intent, max_score = "unknown", 0
+        for int_name, keywords in self.intents.items():
+            score = sum(1 for k in keywords if re.search(k, text))
+            if score > max_score:
+                max_score, intent = score, int_name
+        return {"intent": intent, "entities": self.extract_entities(text)}
+
+    def extract_entities(self, text):
+        entities = {}
+        doctor_match = re.search(r"dr\.?\s+([a-z]+(\s+[a-z]+)?)", text)
+        if doctor_match:
+            entities["DOCTOR_NAME"] = doctor_match.group(0).title()
+        for s in self.specialties:
+            if s in text:
+                entities["SPECIALTY"] = s.title()
+        for a in self.areas:
+            if a in text:
+                entities["AREA"] = a.title()
+        for d in self.diseases:
+            if d in text:
+                entities["DISEASE"] = d.title()
+        return entities
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+
+def make_dictionaries(vocab, seed=0):
+    """Entity dictionaries with `vocab` doctors, areas and diseases (the real names first)"""
+    rng = random.Random(seed)
+    doctors = {f"Dr. {f} {l}": [] for f in FIRST_NAMES for l in LAST_NAMES}
+    doctors = dict(list(doctors.items())[:vocab])
+    while len(doctors) < vocab:
+        doctors.setdefault(f"Dr. {rng.choice(FIRST_NAMES)} {_word(rng)}", [])
+    areas = {area: [] for branch in BRANCHES for area in branch[2]}
+    while len(areas) < vocab:
+        areas.setdefault(_word(rng) + rng.choice(["", " Town", " Colony", " Goth"]), [])
+    diseases = {d[0]: [] for d in DISEASES}
+    while len(diseases) < vocab:
+        diseases.setdefault(_word(rng) + rng.choice(["", " Syndrome", " Fever", " Infection"]), [])
+    specialties = {d[1]: [] for d in DISEASES}
+    entities = {"DOCTOR_NAME": doctors, "SPECIALTY": specialties, "AREA": areas, "DISEASE": diseases}
+    for names in entities.values():
+        for n, name in enumerate(names):
+            names[name] = [f"X{n:05d}"]
+    return entities
+
+
+def make_messages(entities, count, seed=0):
+    rng = random.Random(seed)
+    pools = {key: list(entities[name]) for key, name in
+             (("doctor", "DOCTOR_NAME"), ("specialty", "SPECIALTY"), ("area", "AREA"), ("disease", "DISEASE"))}
+    messages = []
+    for _ in range(count):
+        # Intake traffic repeats itself: a third of messages are exact repeats
+        if messages and rng.random() < 0.33:
+            messages.append(rng.choice(messages))
+            continue
+        values = {key: rng.choice(pool) for key, pool in pools.items()}
+        messages.append(rng.choice(TEMPLATES).format(**values))
+    return messages
+
+
+def rate(fn, messages):
+    start = time.perf_counter()
+    fn(messages)
+    return round(len(messages) / (time.perf_counter() - start))
+
+
+def trap_hits(parser):
+    return sum(1 for text in TRAPS if parser.parse(text)["entities"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent parser messages/second against dictionary size")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--vocab", type=int, nargs="+", default=[25, 500, 5000],
+                        help="Doctors, areas and diseases in the dictionaries")
+    parser.add_argument("--legacy-messages", type=int, default=2000,
+                        help="Messages timed for the legacy parser (it is slow at large vocabularies)")
+    args = parser.parse_args()
+
+    results = {}
+    for vocab in args.vocab:
+        print(f"⏱️  vocabulary {vocab} ...")
+        entities = make_dictionaries(vocab)
+        messages = make_messages(entities, args.messages)
+        legacy = LegacyIntentParser(entities)
+        start = time.perf_counter()
+        compiled = IntentParser(entities=entities)
+        build_ms = round((time.perf_counter() - start) * 1000, 1)
+        results[str(vocab)] = {
+            "legacy_msgs_per_s": rate(lambda m: [legacy.parse(t) for t in m], messages[:args.legacy_messages]),
+            "parse_msgs_per_s": rate(lambda m: [compiled.parse(t) for t in m], messages),
+            "parse_batch_msgs_per_s": rate(compiled.parse_batch, messages),
+            "lexicon_phrases": len(compiled.lexicon),
+            "build_ms": build_ms,
+            "legacy_trap_hits": trap_hits(legacy),
+            "trap_hits": trap_hits(compiled),
+        }
+
+    print(f"\n{'vocab':>6} {'phrases':>8} {'legacy/s':>10} {'parse/s':>10} {'batch/s':>10} {'build ms':>9} {'traps':>9}")
+    for vocab, r in results.items():
+        print(f"{vocab:>6} {r['lexicon_phrases']:>8} {r['legacy_msgs_per_s']:>10} {r['parse_msgs_per_s']:>10} "
+              f"{r['parse_batch_msgs_per_s']:>10} {r['build_ms']:>9} {r['legacy_trap_hits']:>4}/{r['trap_hits']:<4}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "messages": args.messages,
+        "legacy_messages": args.legacy_messages,
+        "traps": len(TRAPS),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-intent-parser.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
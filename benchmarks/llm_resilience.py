@@ -0,0 +1,132 @@
+"""
+LLM Resilience Benchmark
+Drives LLMGenerator.generate_answer with a fault-injecting stub model (slow calls,
+errors, quota errors) from several threads, with and without the circuit breaker,
+and reports answer latency and how many answers came from the model vs the fallback.
+
+Timeouts are scaled down (--timeout) so a run takes seconds, not minutes.
+
+Usage:
+    python -m benchmarks.llm_resilience --calls 60 --concurrency 8 --timeout 1.0
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from benchmarks.stubs import install_stub_llm
+from src import llm as llm_module
+from src.resilience import CircuitBreaker
+
+CONTEXT = "=== ANALYTICS SUMMARY ===\nTotal Patients: 200\n\n=== DISEASE TRENDS ===\n- Dengue: 21 cases\n"
+
+
+def scenarios(timeout):
+    return {
+        "healthy": {"latency": 0.05},
+        "slow_api": {"latency": 0.05, "slow_rate": 1.0, "slow_latency": timeout * 3},
+        "flaky_api": {"latency": 0.05, "error_rate": 0.6},
+        "quota_exhausted": {"latency": 0.05, "quota_error_rate": 0.8, "rate_per_minute": 600},
+    }
+
+
+def run_scenario(faults, calls, concurrency, breaker_enabled, timeout):
+    with contextlib.redirect_stdout(io.StringIO()):
+        llm = llm_module.LLMGenerator(init_model=False)
+    faults = dict(faults)
+    model = install_stub_llm(llm, faults.pop("latency"), rate_per_minute=faults.pop("rate_per_minute", None),
+                             timeout=timeout, **faults)
+    llm.cache.clear()
+    if llm.semantic_cache is not None:
+        llm.semantic_cache.clear()
+    if not breaker_enabled:
+        llm.breaker = CircuitBreaker(error_rate=2.0, slow_rate=2.0)  # thresholds it can never reach
+
+    latencies, sources = [], []
+    lock = threading.Lock()
+    queries = iter(range(calls))
+
+    def worker():
+        while True:
+            with lock:
+                n = next(queries, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            answer = llm.generate_answer(f"How many patients visited on day {n}?", CONTEXT)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                sources.append("model" if answer.startswith("**Stub answer**") else "fallback")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+    llm._executor.shutdown(wait=False, cancel_futures=True)
+
+    latencies.sort()
+    return {
+        "wall_s": round(wall, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "model_answers": sources.count("model"),
+        "fallback_answers": sources.count("fallback"),
+        "model_calls": model.calls,
+        "breaker_opened": llm.breaker.times_opened,
+        "final_rate_per_minute": round(llm.limiter.rate, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer latency under injected LLM faults, with and without the breaker")
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=1.0, help="LLM timeout in seconds for this run")
+    args = parser.parse_args()
+
+    llm_module.LLM_QUEUE_SECONDS = args.timeout / 4
+    os.chdir(tempfile.mkdtemp(prefix="saylani-resilience-"))
+
+    results = {}
+    for name, faults in scenarios(args.timeout).items():
+        for breaker_enabled in (False, True):
+            label = f"{name}{'' if breaker_enabled else ' (no breaker)'}"
+            print(f"⏱️  {label} ...")
+            results[label] = run_scenario(faults, args.calls, args.concurrency, breaker_enabled, args.timeout)
+
+    print("\n" + "=" * 100)
+    print(f"{'scenario':<30} {'wall s':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'model':>6} {'fallback':>8} {'calls':>6} {'opened':>6}")
+    for label, r in results.items():
+        print(f"{label:<30} {r['wall_s']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['max_ms']:>8} "
+              f"{r['model_answers']:>6} {r['fallback_answers']:>8} {r['model_calls']:>6} {r['breaker_opened']:>6}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "timeout_s": args.timeout,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-resilience.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Local LLM Backend Comparison
+Answers the same stream of uncached questions through LLMGenerator with:
+- fallback: no LLM backend (knowledge-base text extraction)
+- hosted: the stub Gemini model with a WAN-like latency
+- local: the llama.cpp backend, one prompt per request
+- local (batched): the llama.cpp backend grouping concurrent prompts per request
+and reports answer latency and throughput per concurrency level.
+
+Runs offline against FakeLlamaServer by default; pass --url to measure a real llama.cpp server.
+
+Usage:
+    python -m benchmarks.local_llm --questions 32 --concurrency 1 8
+    python -m benchmarks.local_llm --url http://127.0.0.1:8080 --questions 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from benchmarks.stubs import FakeLlamaServer, install_stub_llm
+from src import llm as llm_module
+from src.llm_backends import LlamaCppBackend, NoLLMBackend
+
+CONTEXT = "=== ANALYTICS SUMMARY ===\nTotal Patients: 200\n\n=== DISEASE TRENDS ===\n" + "".join(
+    f"- Disease {n}: {200 - n} cases\n" for n in range(120))
+
+
+def make_llm(scenario, url, wan_latency):
+    with contextlib.redirect_stdout(io.StringIO()):
+        if scenario == "hosted":
+            llm = llm_module.LLMGenerator(init_model=False)
+            install_stub_llm(llm, wan_latency)
+        else:
+            backend = {
+                "fallback": lambda: NoLLMBackend(),
+                "local": lambda: LlamaCppBackend(url, batch_size=1),
+                "local (batched)": lambda: LlamaCppBackend(url),
+            }[scenario]()
+            llm = llm_module.LLMGenerator(init_model=True, backend=backend)
+        llm.cache.clear()
+        if llm.semantic_cache is not None:
+            llm.semantic_cache.clear()
+    return llm
+
+
+def run(llm, questions, concurrency, offset):
+    latencies, lock = [], threading.Lock()
+    queries = iter(range(offset, offset + questions))
+
+    def worker():
+        while True:
+            with lock:
+                n = next(queries, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            llm.generate_answer(f"How many patients visited on day {n}?", CONTEXT)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "answers_per_s": round(questions / wall, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fallback vs hosted vs local LLM answer latency and throughput")
+    parser.add_argument("--questions", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--url", default=None, help="Real llama.cpp server (default: start FakeLlamaServer)")
+    parser.add_argument("--wan-latency", type=float, default=0.8, help="Hosted stub latency in seconds")
+    args = parser.parse_args()
+
+    llm_module.LLM_MAX_CONCURRENCY = max(args.concurrency)
+    os.chdir(tempfile.mkdtemp(prefix="saylani-local-llm-"))
+    server = None if args.url else FakeLlamaServer()
+    url = args.url or server.url
+
+    results = {}
+    offset = 0
+    for scenario in ("fallback", "hosted", "local", "local (batched)"):
+        llm = make_llm(scenario, url, args.wan_latency)
+        for concurrency in args.concurrency:
+            label = f"{scenario} x{concurrency}"
+            print(f"⏱️  {label} ...")
+            results[label] = run(llm, args.questions, concurrency, offset)
+            offset += args.questions
+        llm._executor.shutdown(wait=False, cancel_futures=True)
+    if server is not None:
+        server.close()
+
+    print(f"\n{'scenario':<24} {'p50 ms':>9} {'p95 ms':>9} {'answers/s':>10}")
+    for label, r in results.items():
+        print(f"{label:<24} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['answers_per_s']:>10}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "questions": args.questions,
+        "server": args.url or "FakeLlamaServer",
+        "wan_latency_s": args.wan_latency,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-local-llm.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
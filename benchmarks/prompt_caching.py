@@ -0,0 +1,107 @@
+"""
+Prompt Prefix Caching Benchmark
+Asks a stream of distinct questions against one KB context through LLMGenerator with
+the stub model, with provider context caching off and on, and reports the prompt tokens
+sent per call, the share served from the cached prefix, and how many caches were created.
+
+The stub counts about 4 characters per token, like the real tokenizer on English text.
+
+Usage:
+    python -m benchmarks.prompt_caching --questions 50 --context-tokens 8000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from benchmarks.stubs import CHARS_PER_TOKEN, install_stub_llm
+from src import llm as llm_module
+from src import llm_backends
+from src.metrics import metrics
+
+
+def synthetic_context(tokens):
+    """KB-style context text of roughly `tokens` tokens"""
+    lines = ["=== ANALYTICS SUMMARY ===", "Total Patients: 20000", "", "=== DISEASE TRENDS ==="]
+    n = 0
+    while sum(len(line) + 1 for line in lines) < tokens * CHARS_PER_TOKEN:
+        n += 1
+        lines.append(f"- Disease {n}: {20000 // (n + 1)} cases ({100 / (n + 1):.2f}%)")
+    return "\n".join(lines)
+
+
+def run(mode, context_text, questions):
+    llm_backends.LLM_CONTEXT_CACHE = mode
+    with contextlib.redirect_stdout(io.StringIO()):
+        llm = llm_module.LLMGenerator(init_model=False)
+        model = install_stub_llm(llm)
+        llm.cache.clear()
+        if llm.semantic_cache is not None:
+            llm.semantic_cache.clear()
+
+    before = dict(metrics.counters)
+    prompt = cached = output = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(questions):
+            llm.generate_answer(f"How many patients visited on day {n}?", context_text)
+            usage = llm.request_usage()
+            prompt += usage["prompt_tokens"]
+            cached += usage["cached_tokens"]
+            output += usage["output_tokens"]
+    llm._executor.shutdown(wait=False, cancel_futures=True)
+
+    return {
+        "calls": model.calls,
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "uncached_tokens_per_call": round((prompt - cached) / questions, 1),
+        "cached_share": round(cached / prompt, 3) if prompt else 0.0,
+        "output_tokens": output,
+        "caches_created": model.caches_created,
+        "cache_failures": metrics.counters.get("llm_context_cache_failures", 0) - before.get("llm_context_cache_failures", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per call with and without a cached prompt prefix")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--context-tokens", type=int, default=8000)
+    parser.add_argument("--min-tokens", type=int, default=None, help="Override LLM_CONTEXT_CACHE_MIN_TOKENS")
+    args = parser.parse_args()
+
+    if args.min_tokens is not None:
+        llm_backends.LLM_CONTEXT_CACHE_MIN_TOKENS = args.min_tokens
+    os.chdir(tempfile.mkdtemp(prefix="saylani-prompt-cache-"))
+    context_text = synthetic_context(args.context_tokens)
+
+    results = {}
+    for mode in ("off", "auto"):
+        print(f"⏱️  context cache {mode} ...")
+        results[mode] = run(mode, context_text, args.questions)
+
+    print(f"\n{'mode':<6} {'calls':>6} {'prompt tok':>11} {'cached tok':>11} {'uncached/call':>14} {'caches':>7}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['calls']:>6} {r['prompt_tokens']:>11} {r['cached_tokens']:>11} "
+              f"{r['uncached_tokens_per_call']:>14} {r['caches_created']:>7}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "questions": args.questions,
+        "context_tokens": args.context_tokens,
+        "min_tokens": llm_backends.LLM_CONTEXT_CACHE_MIN_TOKENS,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-prompt-caching.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
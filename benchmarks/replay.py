@@ -0,0 +1,254 @@
+"""
+Query Log Replay
+Replays a recorded query log (QUERY_LOG=1, see src/query_log.py) against a local API
+instance with the stub LLM, keeping the recorded inter-arrival times (open loop), and reports:
+- latency percentiles and errors per endpoint
+- schedule lag (how late requests were sent), the scheduled rate and the completed request rate
+- LLM cache hit rate (exact + semantic) and fallback rate
+
+--rate-scale 2 replays twice as fast as recorded. Without a log, --synthesize N builds
+one from the dashboard example questions with Poisson arrivals at --qps.
+
+Usage:
+    python -m benchmarks.replay --log data/logs/query_log.jsonl --workdir . --rate-scale 2
+    python -m benchmarks.replay --synthesize 300 --qps 20 --visits 10000
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, run_kb_stage
+from benchmarks.stubs import install_stub_llm
+from benchmarks.synthetic_data import generate
+from src.query_log import QueryLog
+
+REPLAYED_PATHS = ("/chat/query", "/analytics/search", "/chat/batch")
+# Paraphrases mixed into synthesized traffic, as real users rarely repeat the exact example wording
+PARAPHRASES = {
+    "Who is the busiest doctor?": ["Which doctor is the busiest?", "who has the most patients among doctors"],
+    "What are the top diseases?": ["top diseases", "Which diseases are most common?"],
+    "Which branch has the highest workload?": ["busiest branch?", "Which branch sees the most patients?"],
+}
+
+
+def synthesize_log(count, qps, seed=0):
+    """Log entries from the example questions with exponential inter-arrival times"""
+    from src.cache_warmer import DEFAULT_QUESTIONS
+    rng = random.Random(seed)
+    ts = datetime.now() - timedelta(seconds=count / qps)
+    entries = []
+    for n in range(count):
+        ts += timedelta(seconds=rng.expovariate(qps))
+        roll = rng.random()
+        question = rng.choice(DEFAULT_QUESTIONS)
+        if roll < 0.2 and question in PARAPHRASES:
+            question = rng.choice(PARAPHRASES[question])
+        elif roll < 0.3:
+            question = f"How many patients visited on day {n}?"
+        path = "/analytics/search" if rng.random() < 0.15 else "/chat/query"
+        entries.append({"ts": ts.isoformat(timespec="milliseconds"), "path": path, "query": question})
+    return entries
+
+
+def schedule(entries, rate_scale):
+    """(offset seconds, path, body) per replayable entry, offsets divided by rate_scale"""
+    plan, first = [], None
+    for entry in entries:
+        if entry.get("path") not in REPLAYED_PATHS:
+            continue
+        ts = datetime.fromisoformat(entry["ts"])
+        first = first or ts
+        if entry["path"] == "/chat/batch":
+            body = {"queries": entry.get("queries") or []}
+        else:
+            body = {"query": entry.get("query") or ""}
+        plan.append(((ts - first).total_seconds() / rate_scale, entry["path"], body))
+    return plan
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def replay(plan, port, max_inflight):
+    """Open-loop replay: each request is sent at its scheduled time, whatever the earlier ones are doing"""
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, errors, lags = {}, {}, []
+
+    def send(offset, path, body):
+        lag = time.perf_counter() - (started + offset)
+        conn = getattr(local, "conn", None) or http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local.conn = conn
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except OSError:
+            ok = False
+            conn.close()
+            local.conn = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            lags.append(lag)
+            if ok:
+                latencies.setdefault(path, []).append(elapsed)
+            else:
+                errors[path] = errors.get(path, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="replay") as pool:
+        started = time.perf_counter()
+        for offset, path, body in plan:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, offset, path, body)
+    wall = time.perf_counter() - started
+    return latencies, errors, lags, wall
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {"requests": 0}
+    pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 2)
+    return {
+        "requests": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded query log against a local API instance")
+    parser.add_argument("--log", default=None, help="Query log to replay (default: the workdir's QUERY_LOG_PATH)")
+    parser.add_argument("--synthesize", type=int, default=0, help="Replay N synthesized requests instead of a log")
+    parser.add_argument("--qps", type=float, default=10.0, help="Arrival rate of the synthesized log")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="Replay speed relative to the recording")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument("--max-inflight", type=int, default=64, help="Client threads (caps concurrent requests)")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Stub LLM latency in seconds")
+    parser.add_argument("--warm", action="store_true", help="Keep the existing answer caches (default: start cold)")
+    parser.add_argument("--visits", type=int, default=10_000, help="Synthetic visits when no --workdir is given")
+    parser.add_argument("--workdir", default=None, help="Directory with data/ and a built KB (default: synthetic)")
+    args = parser.parse_args()
+
+    log_path = os.path.abspath(args.log) if args.log else None
+    if args.workdir:
+        os.chdir(args.workdir)
+    else:
+        workdir = tempfile.mkdtemp(prefix="saylani-replay-")
+        print(f"📁 Workdir: {workdir}")
+        print(f"🧪 Generating {args.visits:,} synthetic visits and the knowledge base...")
+        generate(os.path.join(workdir, "data", "raw"), visits=args.visits)
+        os.chdir(workdir)
+        from src import data_cleaning
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_cleaning.main()
+            run_kb_stage()
+
+    if args.synthesize:
+        entries, source = synthesize_log(args.synthesize, args.qps), f"synthesized ({args.qps} qps)"
+    else:
+        log = QueryLog(log_path, enabled=False) if log_path else QueryLog(enabled=False)
+        entries, source = log.read(), log.path
+    plan = schedule(entries, args.rate_scale)[:args.limit]
+    if not plan:
+        raise SystemExit(f"❌ No replayable requests in {source}")
+
+    # The replay itself must not be recorded into the log it reads
+    os.environ["QUERY_LOG"] = "0"
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src import app as app_module
+        from src.metrics import metrics
+        install_stub_llm(app_module.llm, args.llm_latency)
+        if not args.warm:
+            app_module.llm.cache.clear()
+            if app_module.llm.semantic_cache is not None:
+                app_module.llm.semantic_cache.clear()
+    server, thread = start_server(app_module.app, free_port())
+
+    span = plan[-1][0]
+    print(f"▶️  Replaying {len(plan)} requests from {source} over {span:.1f}s (x{args.rate_scale})...")
+    before = dict(metrics.counters)
+    with contextlib.redirect_stdout(io.StringIO()):
+        latencies, errors, lags, wall = replay(plan, server.config.port, args.max_inflight)
+    counters = {name: value - before.get(name, 0) for name, value in metrics.counters.items()}
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    lookups = counters.get("cache_hits", 0) + counters.get("cache_misses", 0)
+    answered_from_cache = counters.get("cache_hits", 0) + counters.get("semantic_cache_hits", 0)
+    lags.sort()
+    results = {
+        "endpoints": {path: dict(percentiles(latencies.get(path, [])), errors=errors.get(path, 0))
+                      for path in REPLAYED_PATHS if path in latencies or path in errors},
+        "requests": len(plan),
+        "errors": sum(errors.values()),
+        "target_rps": round(len(plan) / span, 2) if span else None,
+        "completed_rps": round(len(plan) / wall, 2),
+        "schedule_lag_p50_ms": round(statistics.median(lags) * 1000, 2),
+        "schedule_lag_p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 2),
+        "llm_lookups": lookups,
+        "cache_hit_rate": round(answered_from_cache / lookups, 3) if lookups else None,
+        "semantic_hit_rate": round(counters.get("semantic_cache_hits", 0) / lookups, 3) if lookups else None,
+        "fallback_rate": round(counters.get("fallbacks", 0) / lookups, 3) if lookups else None,
+        "llm_calls": app_module.llm.backend.model.calls,
+    }
+
+    print(f"\n{'endpoint':<20} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for path, r in results["endpoints"].items():
+        print(f"{path:<20} {r['requests']:>9} {r['errors']:>7} {r.get('p50_ms', '-'):>9} "
+              f"{r.get('p95_ms', '-'):>9} {r.get('p99_ms', '-'):>9}")
+    print(f"\nrate: {results['target_rps']} req/s scheduled, {results['completed_rps']} req/s completed, "
+          f"schedule lag p99 {results['schedule_lag_p99_ms']} ms")
+    print(f"LLM lookups: {lookups}, cache hit rate {results['cache_hit_rate']} "
+          f"(semantic {results['semantic_hit_rate']}), fallback rate {results['fallback_rate']}, "
+          f"stub LLM calls {results['llm_calls']}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "rate_scale": args.rate_scale,
+        "max_inflight": args.max_inflight,
+        "llm_latency_s": args.llm_latency,
+        "cold_cache": not args.warm,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-replay.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Response Encoding Benchmark
+For each analytics endpoint, on synthetic data: time to encode the payload with
+FastAPI's default path (jsonable_encoder + json.dumps) vs orjson, and the wire size
+uncompressed, gzip and brotli (when the brotli package is installed).
+
+Usage:
+    python -m benchmarks.response_encoding --visits 10000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, run_kb_stage, summarize, time_calls
+from benchmarks.synthetic_data import generate
+
+ENDPOINTS = [
+    ("GET", "/analytics/summary", None),
+    ("GET", "/analytics/disease-trends", None),
+    ("GET", "/analytics/doctor-workload", None),
+    ("GET", "/analytics/geographic-distribution", None),
+    ("GET", "/analytics/doctor-utilization", None),
+    ("GET", "/analytics/time-windows", None),
+    ("GET", "/analytics/forecast", None),
+    ("GET", "/analytics/alerts", None),
+    ("GET", "/analytics/tables/daily_visits?limit=1000", None),
+    ("GET", "/analytics/tables/doctor_rankings?limit=1000", None),
+    ("POST", "/analytics/search", {"query": "doctor workload, disease trends, branch capacity and forecast"}),
+]
+
+
+def encode_stdlib(payload):
+    from fastapi.encoders import jsonable_encoder
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def bench_endpoint(client, method, path, body, repeat):
+    from src.responses import FastJSONResponse, GZIP_LEVEL, BROTLI_QUALITY, brotli
+
+    response = client.request(method, path, json=body, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    fast = FastJSONResponse(payload).body
+
+    result = {
+        "encode_stdlib": summarize(time_calls(lambda: encode_stdlib(payload), repeat)),
+        "encode_orjson": summarize(time_calls(lambda: FastJSONResponse(payload).body, repeat)),
+        "bytes_identity": len(fast),
+        "bytes_gzip": len(zlib.compress(fast, GZIP_LEVEL, 16 + zlib.MAX_WBITS)),
+    }
+    result["gzip_ms"] = summarize(time_calls(lambda: zlib.compress(fast, GZIP_LEVEL, 16 + zlib.MAX_WBITS), repeat))["median_ms"]
+    if brotli is not None:
+        result["bytes_br"] = len(brotli.compress(fast, quality=BROTLI_QUALITY))
+        result["br_ms"] = summarize(time_calls(lambda: brotli.compress(fast, quality=BROTLI_QUALITY), repeat))["median_ms"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure JSON encode time and wire size per endpoint")
+    parser.add_argument("--visits", type=int, default=10_000, help="Synthetic visit count")
+    parser.add_argument("--repeat", type=int, default=50, help="Encodes per endpoint")
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: temporary)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="saylani-encoding-")
+    print(f"📁 Workdir: {workdir}")
+    print(f"🧪 Generating {args.visits:,} synthetic visits and the knowledge base...")
+    generate(os.path.join(workdir, "data", "raw"), visits=args.visits)
+    os.chdir(workdir)
+    from src import data_cleaning
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_cleaning.main()
+        run_kb_stage()
+
+    from fastapi.testclient import TestClient
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src.app import app
+    client = TestClient(app)
+
+    results = {}
+    for method, path, body in ENDPOINTS:
+        name = f"{method} {path}"
+        print(f"⏱️  {name} ...")
+        results[name] = bench_endpoint(client, method, path, body, args.repeat)
+
+    print("\n" + "=" * 100)
+    print(f"{'endpoint':<48} {'stdlib ms':>9} {'orjson ms':>9} {'bytes':>8} {'gzip':>7} {'br':>7}")
+    for name, r in results.items():
+        print(f"{name[:48]:<48} {r['encode_stdlib']['median_ms']:>9.3f} {r['encode_orjson']['median_ms']:>9.3f} "
+              f"{r['bytes_identity']:>8} {r['bytes_gzip']:>7} {r.get('bytes_br', '-'):>7}")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "visits": args.visits,
+        "repeat": args.repeat,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-encoding-{args.visits}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
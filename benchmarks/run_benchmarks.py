@@ -0,0 +1,284 @@
+"""
+Benchmark Harness
+Times the offline pipeline stages and the FastAPI endpoints (with a stub LLM)
+on synthetic data, and stores results per commit so regressions can be compared.
+
+Usage:
+    python -m benchmarks.run_benchmarks --visits 10000
+    python -m benchmarks.run_benchmarks --visits 10000 --compare HEAD~1
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<file>.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Pipeline modules resolve data paths relative to the working directory,
+# so benchmarks chdir into a scratch dir and need the repo on sys.path.
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from benchmarks.synthetic_data import generate
+from benchmarks.stubs import install_stub_llm
+from benchmarks.import_time import IMPORT_BUDGETS_MS, measure
+
+PIPELINE_STAGES = ["data_cleaning", "json_kb_generator", "eda_enhanced"]
+
+API_REQUESTS = [
+    ("GET", "/health", None),
+    ("GET", "/analytics/disease-trends", None),
+    ("GET", "/analytics/doctor-workload", None),
+    ("GET", "/analytics/geographic-distribution", None),
+    ("GET", "/analytics/summary", None),
+    ("POST", "/analytics/search", {"query": "which doctor has the highest workload"}),
+    ("POST", "/chat/query", {"query": "What are the most common diseases?"}),
+    ("POST", "/chat/query", {"query": "What are the symptoms of flu?"}),
+]
+
+
+def git_commit():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, text=True).strip())
+        return sha, dirty
+    except Exception:
+        return "unknown", False
+
+
+def resolve_commit(ref):
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", ref], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ref
+
+
+def summarize(samples):
+    """Timing stats in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_kb_stage():
+    """Same work as `python -m src.json_kb_generator`"""
+    from src.json_kb_generator import JSONKnowledgeBaseGenerator, load_cleaned_data
+
+    generator = JSONKnowledgeBaseGenerator()
+    generator.generate_from_data(*load_cleaned_data())
+
+
+def bench_pipeline(stages, repeat):
+    from src import data_cleaning, eda_enhanced
+
+    runners = {
+        "data_cleaning": data_cleaning.main,
+        "json_kb_generator": run_kb_stage,
+        "eda_enhanced": eda_enhanced.main,
+    }
+    results = {}
+    for stage in PIPELINE_STAGES:
+        if stage not in stages:
+            continue
+        print(f"⏱️  pipeline.{stage} ...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples = time_calls(runners[stage], repeat)
+        results[f"pipeline.{stage}"] = summarize(samples)
+    return results
+
+
+def bench_imports(repeat):
+    """Cold-interpreter import time of each entry point"""
+    results = {}
+    for module in IMPORT_BUDGETS_MS:
+        print(f"⏱️  import.{module} ...")
+        samples = [measure(module, runs=1)[0] / 1000 for _ in range(repeat)]
+        results[f"import.{module}"] = summarize(samples)
+    return results
+
+
+def bench_kb_load(repeat):
+    """JSON parse vs memory-mapped binary KB: load time and a full context build"""
+    from src.json_kb import JSONKnowledgeBase
+
+    results = {}
+    for mode, shared in (("json", False), ("mmap", True)):
+        print(f"⏱️  kb.load_{mode} ...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[f"kb.load_{mode}"] = summarize(time_calls(lambda: JSONKnowledgeBase(shared=shared, strict=shared), repeat))
+            kb = JSONKnowledgeBase(shared=shared, strict=shared)
+            results[f"kb.context_{mode}"] = summarize(time_calls(kb.get_full_context, repeat))
+    return results
+
+
+def bench_api(requests_per_endpoint, llm_latency):
+    from fastapi.testclient import TestClient
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src import app as app_module
+        install_stub_llm(app_module.llm, llm_latency)
+        app_module.llm.cache.clear()
+        if app_module.llm.semantic_cache is not None:
+            app_module.llm.semantic_cache.clear()
+    client = TestClient(app_module.app)
+
+    results = {}
+    for method, path, body in API_REQUESTS:
+        name = f"api.{method} {path}" + (f" [{body['query'][:30]}]" if body else "")
+        print(f"⏱️  {name} ...")
+
+        def call():
+            response = client.request(method, path, json=body)
+            assert response.status_code == 200, response.text
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            call()  # warm-up (also primes the LLM cache for chat queries)
+            samples = time_calls(call, requests_per_endpoint)
+        results[name] = summarize(samples)
+
+    # Uncached chat queries exercise the full stub LLM path
+    counter = iter(range(10 ** 9))
+
+    def uncached_chat():
+        response = client.post("/chat/query", json={"query": f"How many patients visited branch {next(counter)}?"})
+        assert response.status_code == 200, response.text
+
+    print("⏱️  api.POST /chat/query [uncached] ...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        samples = time_calls(uncached_chat, requests_per_endpoint)
+    results["api.POST /chat/query [uncached]"] = summarize(samples)
+    return results
+
+
+def save_results(results, meta):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{meta['commit']}-{meta['visits']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    return path
+
+
+def find_baseline(ref, visits):
+    """Accept a results file path or a git ref; returns the latest matching results file"""
+    if os.path.exists(ref):
+        return ref
+    sha = resolve_commit(ref)
+    candidates = sorted(glob.glob(os.path.join(RESULTS_DIR, f"*-{sha}-{visits}.json")))
+    return candidates[-1] if candidates else None
+
+
+def compare(current, baseline_path, threshold):
+    """Print median ratios against a baseline; returns True if any regression exceeds the threshold"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print("\n" + "=" * 78)
+    print(f"📊 COMPARISON vs {baseline['meta']['commit']} ({os.path.basename(baseline_path)})")
+    print("=" * 78)
+    regressed = False
+    for name, stats in current.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  ⚠️ REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<60} {base['median_ms']:>10.2f} → {stats['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pipeline and API benchmarks")
+    parser.add_argument("--visits", type=int, default=10_000, help="Synthetic visit count")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per pipeline stage")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per API endpoint")
+    parser.add_argument("--stages", nargs="*", default=PIPELINE_STAGES, choices=PIPELINE_STAGES)
+    parser.add_argument("--skip-api", action="store_true", help="Only benchmark the pipeline")
+    parser.add_argument("--skip-imports", action="store_true", help="Skip the import-time benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency in seconds")
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: temporary)")
+    parser.add_argument("--compare", default=None, help="Baseline results file or git ref")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown treated as a regression")
+    args = parser.parse_args()
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "visits": args.visits,
+        "repeat": args.repeat,
+        "requests": args.requests,
+    }
+
+    if args.compare and os.path.exists(args.compare):
+        args.compare = os.path.abspath(args.compare)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="saylani-bench-")
+    print(f"📁 Workdir: {workdir}")
+    print(f"🧪 Generating {args.visits:,} synthetic visits...")
+    generate(os.path.join(workdir, "data", "raw"), visits=args.visits)
+    os.chdir(workdir)
+
+    # Stages depend on each other's outputs; always produce cleaned data and the KB
+    stages = set(args.stages)
+    if not args.skip_api:
+        stages |= {"data_cleaning", "json_kb_generator"}
+    if stages & {"json_kb_generator", "eda_enhanced"}:
+        stages.add("data_cleaning")
+
+    results = {} if args.skip_imports else bench_imports(args.repeat)
+    results.update(bench_pipeline(stages, args.repeat))
+    if "json_kb_generator" in stages:
+        results.update(bench_kb_load(args.repeat))
+    if not args.skip_api:
+        results.update(bench_api(args.requests, args.llm_latency))
+
+    path = save_results(results, meta)
+    print("\n" + "=" * 78)
+    for name, stats in results.items():
+        print(f"{name:<60} median {stats['median_ms']:>10.2f} ms  p95 {stats['p95_ms']:>10.2f} ms")
+    print(f"\n✅ Results saved: {path}")
+
+    if args.compare:
+        baseline = find_baseline(args.compare, args.visits)
+        if baseline is None:
+            print(f"⚠️ No baseline results found for {args.compare} at {args.visits} visits")
+        elif compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
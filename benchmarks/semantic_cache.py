@@ -0,0 +1,105 @@
+"""
+Semantic Cache Threshold Sweep
+Seeds the semantic cache with one question per paraphrase group, then asks every
+other phrasing and reports, per similarity threshold:
+- hit rate: paraphrases answered with their own group's answer
+- false-hit rate: questions answered with another group's answer
+plus the lookup latency.
+
+Usage:
+    python -m benchmarks.semantic_cache
+    python -m benchmarks.semantic_cache --thresholds 0.6 0.7 0.8 0.85 0.9 1.0
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from src.semantic_cache import SemanticCache
+
+# Each group shares one answer; the first phrasing is the one that gets cached
+PARAPHRASE_GROUPS = [
+    ["Who is the busiest doctor?", "Which doctor has the most patients?", "busiest physician",
+     "doctor with the highest patient volume", "Which doctor has the highest workload?"],
+    ["What are the top 5 diseases?", "top five diseases", "5 most common illnesses",
+     "Show me the five most prevalent conditions"],
+    ["What are the top 3 diseases?", "top three diseases", "3 most common diseases"],
+    ["Which branch is the busiest?", "branch with the most patients", "Which clinic has the highest workload?",
+     "busiest branch"],
+    ["Which branch is the least busy?", "quietest branch", "branch with the fewest patients"],
+    ["How many Dengue cases are there?", "number of dengue cases", "total Dengue patients", "dengue case count"],
+    ["How many Malaria cases are there?", "number of malaria cases", "malaria case count"],
+    ["How many patients visited this month?", "patient visits this month", "total visits this month"],
+    ["How many patients visited this week?", "patient visits this week", "visits this week"],
+    ["Compare Dengue vs Malaria", "dengue versus malaria", "difference between dengue and malaria cases"],
+    ["Which area has the most patients?", "top area by patients", "where do most patients come from?"],
+    ["What percentage of visits are in Gulshan?", "Gulshan share of patients", "percent of patients from gulshan"],
+]
+
+# Never cached: must miss, not borrow a neighbour's answer
+UNSEEN = ["top 10 diseases", "How many Typhoid cases are there?", "Which doctor has the fewest patients?",
+          "How many patients visited this year?", "Compare Dengue vs Typhoid", "How many doctors are there?",
+          "What percentage of visits are in Nazimabad?", "Which area has the fewest patients?"]
+
+
+def sweep(thresholds):
+    cache = SemanticCache(os.path.join(tempfile.mkdtemp(prefix="saylani-semantic-"), "cache.sqlite3"))
+    version = "benchmark"
+    for group, phrasings in enumerate(PARAPHRASE_GROUPS):
+        cache.add(phrasings[0], version, f"answer-{group}")
+
+    asked = [(q, f"answer-{g}") for g, phrasings in enumerate(PARAPHRASE_GROUPS) for q in phrasings[1:]]
+    asked += [(q, None) for q in UNSEEN]
+
+    results = {}
+    for threshold in thresholds:
+        cache.threshold = threshold
+        hits = false_hits = 0
+        misses = []
+        start = time.perf_counter()
+        for query, expected in asked:
+            answer = cache.get(query, version)
+            if answer is None:
+                if expected is not None:
+                    misses.append(query)
+            elif answer == expected:
+                hits += 1
+            else:
+                false_hits += 1
+        elapsed = time.perf_counter() - start
+        paraphrases = sum(expected is not None for _, expected in asked)
+        results[str(threshold)] = {
+            "hit_rate": round(hits / paraphrases, 3),
+            "false_hit_rate": round(false_hits / len(asked), 3),
+            "false_hits": false_hits,
+            "lookup_us": round(elapsed / len(asked) * 1e6, 1),
+            "missed_paraphrases": misses,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache hit and false-hit rates per similarity threshold")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0])
+    args = parser.parse_args()
+
+    results = sweep(args.thresholds)
+
+    print(f"\n{'threshold':>9} {'hit rate':>9} {'false hits':>11} {'lookup us':>10}")
+    for threshold, r in results.items():
+        print(f"{threshold:>9} {r['hit_rate']:>9} {r['false_hits']:>11} {r['lookup_us']:>10}")
+
+    sha, dirty = git_commit()
+    meta = {"commit": sha + ("-dirty" if dirty else ""), "timestamp": datetime.now().isoformat()}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-semantic-cache.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Stub LLM for benchmarks
+Stands in for google.generativeai.GenerativeModel so API benchmarks run offline
+with a predictable, configurable latency, and optionally injected faults
+(errors, quota errors, slow calls) to exercise the circuit breaker and rate limiter.
+Responses report token usage (about 4 characters per token) like Gemini's usage_metadata,
+and a cached prompt prefix is reported as cached tokens.
+FakeLlamaServer stands in for a local llama.cpp server.
+"""
+import http.server
+import json
+import os
+import random
+import threading
+import time
+
+from src.llm_backends import GeminiBackend
+from src.resilience import CircuitBreaker, TokenBucket
+
+QUOTA_ERROR = "429 Resource has been exhausted (e.g. check quota)."
+CHARS_PER_TOKEN = 4
+
+
+class StubUsage:
+    def __init__(self, prompt_token_count, cached_content_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.cached_content_token_count = cached_content_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class StubResponse:
+    def __init__(self, text, prompt_tokens=0, cached_tokens=0):
+        self.text = text
+        self.usage_metadata = StubUsage(prompt_tokens, cached_tokens, len(text) // CHARS_PER_TOKEN)
+
+
+class StubModel:
+    def __init__(self, latency=0.0, error_rate=0.0, quota_error_rate=0.0, slow_rate=0.0, slow_latency=10.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.calls = 0
+        self.caches_created = 0
+        self._random = random.Random(seed)
+
+    def cached(self, prefix):
+        """Model serving prompts on top of a cached `prefix` (stands in for a CachedContent model)"""
+        self.caches_created += 1
+        return StubCachedModel(self, len(prefix) // CHARS_PER_TOKEN)
+
+    def generate_content(self, prompt, cached_tokens=0):
+        self.calls += 1
+        roll = self._random.random()
+        if roll < self.slow_rate:
+            time.sleep(self.slow_latency)
+        elif self.latency:
+            time.sleep(self.latency)
+        roll = self._random.random()
+        if roll < self.quota_error_rate:
+            raise RuntimeError(QUOTA_ERROR)
+        if roll < self.quota_error_rate + self.error_rate:
+            raise RuntimeError("503 Service Unavailable (injected)")
+        question = prompt.rsplit("ADMIN QUESTION:", 1)[-1].split("ANSWER", 1)[0].strip()
+        return StubResponse(f"**Stub answer** for: {question}", cached_tokens + len(prompt) // CHARS_PER_TOKEN, cached_tokens)
+
+
+class StubCachedModel:
+    def __init__(self, model, cached_tokens):
+        self.model = model
+        self.cached_tokens = cached_tokens
+
+    def generate_content(self, prompt):
+        return self.model.generate_content(prompt, cached_tokens=self.cached_tokens)
+
+
+class StubBackend(GeminiBackend):
+    """Gemini backend (prompt layout, context caching, usage parsing) on top of the stub model"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def load(self):
+        return True
+
+    def _create_context_cache(self, prompt):
+        return self.model.cached(prompt.prefix)
+
+
+def install_stub_llm(llm, latency=0.0, rate_per_minute=None, timeout=None, **faults):
+    """Point an LLMGenerator at the stub model (no rate limit unless `rate_per_minute` is given)"""
+    llm.backend = StubBackend(StubModel(latency, **faults))
+    if timeout is not None:
+        llm.backend.timeout = timeout
+    llm.breaker = CircuitBreaker(slow_call_seconds=llm.backend.slow_call_seconds)
+    llm.api_available = True
+    llm.model_ready.set()
+    if rate_per_minute is None:
+        llm.limiter = TokenBucket(1e9, burst=1e9)
+    else:
+        llm.limiter = TokenBucket(rate_per_minute)
+    return llm.backend.model
+
+
+class FakeLlamaServer:
+    """llama.cpp-compatible HTTP server (/health, /completion) with a simple CPU cost model.
+
+    A request costs prompt evaluation for tokens not covered by a cached prefix, plus decoding
+    `output_tokens` steps; decoding several prompts in one request costs `batch_overhead` extra
+    per added sequence instead of a full pass each. Requests are served one at a time, like one model.
+    """
+    def __init__(self, prompt_ms_per_token=0.5, decode_ms_per_token=15.0, output_tokens=48, batch_overhead=0.15):
+        server = self
+        self.prompt_ms_per_token = prompt_ms_per_token
+        self.decode_ms_per_token = decode_ms_per_token
+        self.output_tokens = output_tokens
+        self.batch_overhead = batch_overhead
+        self.requests = 0
+        self.prompts = 0
+        self._cached_prefixes = []
+        self._model_lock = threading.Lock()
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply({"status": "ok"})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompts = payload["prompt"] if isinstance(payload["prompt"], list) else [payload["prompt"]]
+                results = server.complete(prompts, payload.get("n_predict", server.output_tokens))
+                self._reply(results if isinstance(payload["prompt"], list) else results[0])
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llama", daemon=True)
+        self._thread.start()
+
+    def _cached_chars(self, prompt):
+        return max((len(os.path.commonprefix([prefix, prompt])) for prefix in self._cached_prefixes), default=0)
+
+    def complete(self, prompts, n_predict):
+        with self._model_lock:
+            self.requests += 1
+            self.prompts += len(prompts)
+            results, cost_ms = [], 0.0
+            n_out = min(n_predict, self.output_tokens)
+            for prompt in prompts:
+                cached = self._cached_chars(prompt) // CHARS_PER_TOKEN
+                total = len(prompt) // CHARS_PER_TOKEN
+                cost_ms += (total - cached) * self.prompt_ms_per_token
+                question = prompt.rsplit("ADMIN QUESTION:", 1)[-1].split("ANSWER", 1)[0].strip()
+                results.append({"content": f"**Stub answer** for: {question}", "tokens_evaluated": total,
+                                "tokens_cached": cached, "tokens_predicted": n_out})
+                self._cached_prefixes = (self._cached_prefixes + [prompt])[-8:]
+            cost_ms += n_out * self.decode_ms_per_token * (1 + self.batch_overhead * (len(prompts) - 1))
+            time.sleep(cost_ms / 1000)
+            return results
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,227 @@
+"""
+Synthetic Raw Data Generator
+Writes doctors/branches/diseases/doctor_timings/patients.csv at a configurable
+scale (10k to 10M visits) with misspelled disease names and messy area names,
+so the cleaning, KB and EDA stages can be exercised far beyond the sample data.
+
+Usage:
+    python -m benchmarks.synthetic_data --visits 100000 --out data/raw
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 1_000_000
+
+# (canonical name, specialty, relative frequency)
+DISEASES = [
+    ("Common Cold", "General Practice", 14), ("Influenza", "General Practice", 12),
+    ("Fever", "General Practice", 10), ("Dengue", "General Practice", 6),
+    ("Malaria", "General Practice", 4), ("Typhoid", "General Practice", 4),
+    ("Gastroenteritis", "General Practice", 6), ("Hypertension", "Cardiology", 7),
+    ("Coronary Artery Disease", "Cardiology", 3), ("Arrhythmia", "Cardiology", 2),
+    ("Asthma", "Pediatrics", 5), ("Chickenpox", "Pediatrics", 2),
+    ("Measles", "Pediatrics", 1), ("Eczema", "Dermatology", 3),
+    ("Acne", "Dermatology", 3), ("Psoriasis", "Dermatology", 1),
+    ("Migraine", "Neurology", 4), ("Epilepsy", "Neurology", 1),
+    ("Fracture", "Orthopedics", 3), ("Arthritis", "Orthopedics", 4),
+    ("Back Pain", "Orthopedics", 5), ("Cataract", "Ophthalmology", 2),
+    ("Conjunctivitis", "Ophthalmology", 2), ("Pregnancy Checkup", "Gynecology", 4),
+    ("Diabetes", "General Practice", 8),
+]
+
+BRANCHES = [
+    ("B001", "Saylani Gulshan Branch", ["Gulshan", "Gulistan-e-Jauhar", "Johar Mor", "Safoora"], "Gulshan-e-Iqbal"),
+    ("B002", "Saylani Korangi Branch", ["Korangi", "Landhi", "Shah Faisal", "Malir"], "Korangi Industrial Area"),
+    ("B003", "Saylani Saddar Branch", ["Saddar", "Clifton", "Defence", "Lyari", "Kharadar"], "Saddar"),
+    ("B004", "Saylani Nazimabad Branch", ["Nazimabad", "North Nazimabad", "Orangi", "New Karachi", "Buffer Zone"], "Nazimabad"),
+]
+
+FIRST_NAMES = ["Ayesha", "Ali", "Sara", "Ahmed", "Fatima", "Usman", "Hina", "Bilal", "Zainab", "Hamza",
+               "Maryam", "Imran", "Sana", "Faisal", "Nida", "Kashif", "Rabia", "Tariq", "Amna", "Saad"]
+LAST_NAMES = ["Khan", "Siddiqui", "Qureshi", "Sheikh", "Malik", "Raza", "Hussain", "Ansari", "Baig", "Farooqi"]
+
+# Share of visits recorded with a misspelled disease name
+MISSPELL_RATE = 0.25
+VARIANTS_PER_DISEASE = 6
+
+
+def _misspell(name, rng):
+    """Produce one plausible typo of a disease name"""
+    chars = list(name)
+    op = rng.integers(0, 5)
+    i = int(rng.integers(0, max(len(chars) - 1, 1)))
+    if op == 0 and len(chars) > 3:
+        del chars[i]                                   # dropped letter
+    elif op == 1 and len(chars) > 3:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]  # transposition
+    elif op == 2:
+        chars.insert(i, chars[i])                      # doubled letter
+    elif op == 3:
+        return name.lower()                            # casing
+    else:
+        return f" {name.upper()} "                     # casing + whitespace
+    return "".join(chars)
+
+
+def make_reference_tables(n_doctors, seed=0):
+    """Doctors, branches, diseases and doctor timings for a given staff size"""
+    rng = np.random.default_rng(seed)
+
+    branches = pd.DataFrame({
+        "branch_id": [b[0] for b in BRANCHES],
+        "branch_name": [b[1] for b in BRANCHES],
+        "area_names": [";".join(b[2]) for b in BRANCHES],
+        "location": [b[3] for b in BRANCHES],
+    })
+
+    diseases = pd.DataFrame({
+        "disease_id": [f"DS{i + 1:03d}" for i in range(len(DISEASES))],
+        "canonical_name": [d[0] for d in DISEASES],
+        "specialty": [d[1] for d in DISEASES],
+        "description": [f"{d[0]} ({d[1]})" for d in DISEASES],
+    })
+
+    # Round-robin specialties so every specialty has at least one doctor
+    specialties = sorted(diseases["specialty"].unique())
+    doctor_specialty = [specialties[i % len(specialties)] for i in range(n_doctors)]
+    doctors = pd.DataFrame({
+        "doctor_id": [f"D{i + 1:03d}" for i in range(n_doctors)],
+        "doctor_name": [f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(n_doctors)],
+        "specialty": doctor_specialty,
+        "branch_id": branches["branch_id"].to_numpy()[rng.integers(0, len(branches), n_doctors)],
+    })
+
+    # One daily slot per doctor on 5-6 working days
+    start_hours = rng.choice([9, 10, 14, 17], n_doctors)
+    shift_hours = rng.integers(3, 6, n_doctors)
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+    rows = []
+    for d in range(n_doctors):
+        for day in days[:int(rng.integers(5, 7))]:
+            rows.append({
+                "doctor_id": doctors.at[d, "doctor_id"],
+                "branch_id": doctors.at[d, "branch_id"],
+                "day_of_week": day,
+                "start_time": f"{start_hours[d]:02d}:00",
+                "end_time": f"{start_hours[d] + shift_hours[d]:02d}:00",
+            })
+    timings = pd.DataFrame(rows)
+    return doctors, branches, diseases, timings
+
+
+def _patient_chunk(start, size, days, end_date, doctors, timings, diseases, variants, rng):
+    """Vectorized generation of one chunk of patient visits"""
+    n_diseases = len(diseases)
+    base_weights = np.array([d[2] for d in DISEASES], dtype=float)
+
+    # Visit day with a weekly rhythm (Sunday is quiet)
+    day_offset = rng.integers(0, days, size)
+    visit_day = pd.Timestamp(end_date).normalize() - pd.to_timedelta(days - 1 - day_offset, unit="D")
+    weekday = visit_day.dayofweek.to_numpy()
+    sunday = weekday == 6
+    day_offset[sunday] = np.maximum(day_offset[sunday] - 1, 0)
+    visit_day = pd.Timestamp(end_date).normalize() - pd.to_timedelta(days - 1 - day_offset, unit="D")
+    month = visit_day.month.to_numpy()
+
+    # Disease mix per month with a post-monsoon dengue season
+    disease_idx = np.empty(size, dtype=np.int64)
+    dengue = [d[0] for d in DISEASES].index("Dengue")
+    for m in np.unique(month):
+        weights = base_weights.copy()
+        if m in (8, 9, 10):
+            weights[dengue] *= 4
+        mask = month == m
+        disease_idx[mask] = rng.choice(n_diseases, mask.sum(), p=weights / weights.sum())
+
+    # Doctor of the matching specialty
+    doc_specialty = doctors["specialty"].to_numpy()
+    order = np.argsort(doc_specialty, kind="stable")
+    specialties, first, counts = np.unique(doc_specialty[order], return_index=True, return_counts=True)
+    spec_of_disease = np.searchsorted(specialties, diseases["specialty"].to_numpy())
+    spec = spec_of_disease[disease_idx]
+    doctor_idx = order[first[spec] + rng.integers(0, 1 << 30, size) % counts[spec]]
+
+    # Visit time mostly inside the doctor's slot, some walk-ins outside it
+    slot = timings.drop_duplicates("doctor_id").set_index("doctor_id")
+    start_h = slot["start_time"].str[:2].astype(int).reindex(doctors["doctor_id"]).fillna(9).to_numpy()
+    end_h = slot["end_time"].str[:2].astype(int).reindex(doctors["doctor_id"]).fillna(17).to_numpy()
+    minutes = start_h[doctor_idx] * 60 + rng.random(size) * (end_h[doctor_idx] - start_h[doctor_idx]) * 60
+    walk_in = rng.random(size) < 0.05
+    minutes[walk_in] = rng.integers(8 * 60, 22 * 60, walk_in.sum())
+    visit_ts = visit_day + pd.to_timedelta(minutes.astype(np.int64), unit="m")
+
+    # Branch follows the doctor; area is one of the branch's areas with messy casing
+    branch_id = doctors["branch_id"].to_numpy()[doctor_idx]
+    area_lists = {b[0]: b[2] for b in BRANCHES}
+    area = np.empty(size, dtype=object)
+    for b, names in area_lists.items():
+        mask = branch_id == b
+        area[mask] = np.array(names, dtype=object)[rng.integers(0, len(names), mask.sum())]
+    messy = rng.random(size) < 0.1
+    area[messy] = [f" {a.lower()} " for a in area[messy]]
+
+    # Disease name, misspelled for a share of visits
+    canonical = diseases["canonical_name"].to_numpy()
+    disease_name = canonical[disease_idx].astype(object)
+    typo = rng.random(size) < MISSPELL_RATE
+    disease_name[typo] = variants[disease_idx[typo], rng.integers(0, VARIANTS_PER_DISEASE, typo.sum())]
+
+    ids = np.arange(start, start + size)
+    return pd.DataFrame({
+        "patient_id": pd.Series(ids).map("P{:08d}".format),
+        "age": rng.integers(1, 90, size),
+        "gender": rng.choice(np.array(["Male", "Female"]), size),
+        "disease_name": disease_name,
+        "doctor_id": doctors["doctor_id"].to_numpy()[doctor_idx],
+        "branch_id": branch_id,
+        "area": area,
+        "visit_timestamp": visit_ts.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+def generate(out_dir="data/raw", visits=10_000, doctors=None, days=365, end_date="2024-12-31", seed=42):
+    """Write all raw CSVs to out_dir and return the number of visits written"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    n_doctors = doctors or max(15, min(2000, visits // 2000))
+
+    doctors_df, branches_df, diseases_df, timings_df = make_reference_tables(n_doctors, seed)
+    doctors_df.to_csv(os.path.join(out_dir, "doctors.csv"), index=False)
+    branches_df.to_csv(os.path.join(out_dir, "branches.csv"), index=False)
+    diseases_df.to_csv(os.path.join(out_dir, "diseases.csv"), index=False)
+    timings_df.to_csv(os.path.join(out_dir, "doctor_timings.csv"), index=False)
+
+    variants = np.array([
+        [_misspell(name, rng) for _ in range(VARIANTS_PER_DISEASE)]
+        for name in diseases_df["canonical_name"]
+    ], dtype=object)
+
+    patients_path = os.path.join(out_dir, "patients.csv")
+    written = 0
+    while written < visits:
+        size = min(CHUNK_SIZE, visits - written)
+        chunk = _patient_chunk(written, size, days, end_date, doctors_df, timings_df, diseases_df, variants, rng)
+        chunk.to_csv(patients_path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += size
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic raw data")
+    parser.add_argument("--out", default="data/raw", help="Output directory for raw CSVs")
+    parser.add_argument("--visits", type=int, default=10_000, help="Number of patient visits")
+    parser.add_argument("--doctors", type=int, default=None, help="Number of doctors (scaled with visits by default)")
+    parser.add_argument("--days", type=int, default=365, help="Days of history")
+    parser.add_argument("--end-date", default="2024-12-31", help="Last visit date")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    written = generate(args.out, args.visits, args.doctors, args.days, args.end_date, args.seed)
+    print(f"✅ Generated {written:,} visits in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+API Worker Scaling Benchmark
+Starts `python -m src.app --workers N` for several N on synthetic data and measures
+throughput, latency and per-worker memory (RSS and PSS, which splits shared pages
+such as the mapped KB between the processes that map them). Linux only (/proc).
+
+The LLM runs in fallback mode (no API key), so only the API itself is measured.
+
+Usage:
+    python -m benchmarks.worker_scaling --visits 10000 --workers 1 2 4
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.run_benchmarks import REPO_ROOT, RESULTS_DIR, git_commit, run_kb_stage
+from benchmarks.synthetic_data import generate
+
+REQUEST_MIX = [
+    ("GET", "/analytics/summary", None),
+    ("GET", "/analytics/disease-trends", None),
+    ("GET", "/analytics/doctor-workload", None),
+    ("POST", "/analytics/search", {"query": "which doctor has the highest workload"}),
+    ("POST", "/chat/query", {"query": "What are the most common diseases?"}),
+]
+
+
+def proc_memory_mb(pid):
+    """(RSS, PSS) in MB for one process"""
+    values = {}
+    for path, fields in ((f"/proc/{pid}/status", ("VmRSS",)), (f"/proc/{pid}/smaps_rollup", ("Pss",))):
+        try:
+            with open(path) as f:
+                for line in f:
+                    key = line.split(":", 1)[0]
+                    if key in fields:
+                        values[key] = int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    return values.get("VmRSS"), values.get("Pss")
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def worker_pids(server, workers):
+    """uvicorn serves in-process for one worker and from child processes otherwise"""
+    if workers == 1:
+        return [server.pid]
+    pids = []
+    for pid in child_pids(server.pid):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"spawn_main" in f.read():
+                    pids.append(pid)
+        except OSError:
+            pass
+    return pids
+
+
+def wait_until_healthy(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def load_test(port, concurrency, duration):
+    """Closed-loop load: each client thread keeps one connection and cycles the request mix"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, i = [], offset
+        while time.perf_counter() < stop_at:
+            method, path, body = REQUEST_MIX[i % len(REQUEST_MIX)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=json.dumps(body) if body else None,
+                             headers={"Content-Type": "application/json"} if body else {})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+    }
+
+
+def run_scale(workers, port, concurrency, duration):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    env["GEMINI_API_KEY"] = ""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env
+    )
+    try:
+        if not wait_until_healthy(port):
+            raise RuntimeError(f"API with {workers} workers did not become healthy")
+        load_test(port, concurrency, 1.0)  # warm-up
+        result = load_test(port, concurrency, duration)
+
+        memory = [proc_memory_mb(pid) for pid in worker_pids(server, workers)]
+        rss = [m[0] for m in memory if m[0] is not None]
+        pss = [m[1] for m in memory if m[1] is not None]
+        result.update({
+            "workers": workers,
+            "worker_processes": len(memory),
+            "rss_per_worker_mb": round(statistics.fmean(rss), 1) if rss else None,
+            "pss_per_worker_mb": round(statistics.fmean(pss), 1) if pss else None,
+            "pss_total_mb": round(sum(pss), 1) if pss else None,
+        })
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput and memory against worker count")
+    parser.add_argument("--visits", type=int, default=10_000, help="Synthetic visit count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per worker count")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: temporary)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="saylani-workers-")
+    print(f"📁 Workdir: {workdir}")
+    print(f"🧪 Generating {args.visits:,} synthetic visits and the knowledge base...")
+    generate(os.path.join(workdir, "data", "raw"), visits=args.visits)
+    os.chdir(workdir)
+    from src import data_cleaning
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_cleaning.main()
+        run_kb_stage()
+
+    results = []
+    for workers in args.workers:
+        print(f"⏱️  {workers} worker(s) ...")
+        results.append(run_scale(workers, args.port, args.concurrency, args.duration))
+
+    print("\n" + "=" * 78)
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6} {'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['requests_per_second']:>9} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['errors']:>6} "
+              f"{r['rss_per_worker_mb']:>9} MB {r['pss_per_worker_mb']:>9} MB {r['pss_total_mb']:>7} MB")
+
+    sha, dirty = git_commit()
+    meta = {
+        "commit": sha + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(),
+        "visits": args.visits,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "cpu_count": os.cpu_count(),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['commit']}-workers-{args.visits}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
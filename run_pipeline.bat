@@ -5,26 +5,18 @@ echo JSON-Based Knowledge Base System
 echo ======================================================================
 
 echo.
-echo [1/5] Cleaning Data...
-python src/data_cleaning.py
+echo [1/3] Running Pipeline (Cleaning, Knowledge Base, EDA, Cache Warm-up)...
+python -m src.pipeline %*
 
 echo.
-echo [2/5] Generating JSON Knowledge Base...
-python src/json_kb_generator.py
-
-echo.
-echo [3/5] Running Enhanced EDA...
-python src/eda_enhanced.py
-
-echo.
-echo [4/5] Starting Backend API (Refactored)...
+echo [2/3] Starting Backend API (Refactored)...
 start "Saylani API" python -m src.app
 
 timeout /t 3 /nobreak > nul
 
 echo.
-echo [5/5] Starting Dashboard...
-start "Saylani Dashboard" streamlit run src/dashboard.py
+echo [3/3] Starting Dashboard...
+start "Saylani Dashboard" python -m streamlit run src/dashboard.py
 
 echo.
 echo ======================================================================
@@ -0,0 +1,153 @@
+"""
+Anomaly and Surge Detection
+Streaming EWMA z-scores over daily per-disease / per-branch visit counts
+- Signal: trailing 7-day visit total per series (smooths the weekly rhythm)
+- O(1) state update per day for all series at once (vectorized over series)
+- Variance floor from the Poisson noise of count data keeps small series quiet
+- Consecutive flagged days are merged into episodes (e.g. a dengue surge)
+"""
+import numpy as np
+
+SIGNAL_DAYS = 7
+HALFLIFE_DAYS = 14
+Z_THRESHOLD = 3.0
+MIN_COUNT = 10
+WARMUP_DAYS = 28
+
+
+class EWMADetector:
+    """Exponentially weighted mean/variance per series, updated one day at a time"""
+    def __init__(self, n_series, halflife=HALFLIFE_DAYS, z_threshold=Z_THRESHOLD, min_count=MIN_COUNT, warmup=WARMUP_DAYS):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup = warmup
+        self.mean = np.zeros(n_series)
+        self.var = np.zeros(n_series)
+        self.n = 0
+
+    def update(self, x):
+        """Score today's values against the baseline so far, then fold them in.
+
+        Returns (z, baseline, flags) where flags is +1 for a surge, -1 for a drop, 0 otherwise.
+        """
+        x = np.asarray(x, dtype=float)
+        if self.n == 0:
+            self.mean = x.copy()
+        baseline = self.mean.copy()
+        z = (x - baseline) / np.sqrt(self.var + baseline + 1.0)
+
+        flags = np.zeros(len(x), dtype=np.int8)
+        if self.n >= self.warmup:
+            flags[(z >= self.z_threshold) & (x >= self.min_count)] = 1
+            flags[(z <= -self.z_threshold) & (baseline >= self.min_count)] = -1
+
+        diff = x - self.mean
+        self.mean += self.alpha * diff
+        self.var = (1 - self.alpha) * (self.var + self.alpha * diff ** 2)
+        self.n += 1
+        return z, baseline, flags
+
+    def run(self, signal):
+        """Feed a (days x series) matrix through update(); returns z, baseline and flags matrices"""
+        z = np.zeros(signal.shape)
+        baseline = np.zeros(signal.shape)
+        flags = np.zeros(signal.shape, dtype=np.int8)
+        for t in range(len(signal)):
+            z[t], baseline[t], flags[t] = self.update(signal[t])
+        return z, baseline, flags
+
+
+def rolling_signal(prefix, days=SIGNAL_DAYS):
+    """Trailing `days`-day totals for every day, straight from the cube's prefix sums"""
+    n = len(prefix) - 1
+    end = np.arange(1, n + 1)
+    return (prefix[end] - prefix[np.maximum(end - days, 0)]).astype(float)
+
+
+def _episodes(dimension, labels, dates, signal, baseline, z, flags):
+    """Merge consecutive flagged days of the same series and direction"""
+    episodes = []
+    days, series = np.nonzero(flags)
+    order = np.lexsort((days, series))
+    current = None
+    for t, k in zip(days[order], series[order]):
+        direction = int(flags[t, k])
+        if current and current["_k"] == k and current["_dir"] == direction and t == current["_end"] + 1:
+            current["_end"] = t
+            if abs(z[t, k]) > abs(current["peak_z"]):
+                current.update(peak_date=str(dates[t]), peak_value=int(signal[t, k]),
+                               peak_baseline=round(float(baseline[t, k]), 1), peak_z=round(float(z[t, k]), 2))
+            continue
+        if current:
+            episodes.append(current)
+        current = {
+            "dimension": dimension, "name": str(labels[k]), "direction": "surge" if direction > 0 else "drop",
+            "peak_date": str(dates[t]), "peak_value": int(signal[t, k]),
+            "peak_baseline": round(float(baseline[t, k]), 1), "peak_z": round(float(z[t, k]), 2),
+            "_k": k, "_dir": direction, "_start": t, "_end": t
+        }
+    if current:
+        episodes.append(current)
+
+    for episode in episodes:
+        episode["start"] = str(dates[episode.pop("_start")])
+        episode["end"] = str(dates[episode.pop("_end")])
+        episode["days"] = int((np.datetime64(episode["end"]) - np.datetime64(episode["start"])) // np.timedelta64(1, "D")) + 1
+        del episode["_k"], episode["_dir"]
+    return episodes
+
+
+def detect(cube, dimensions=("disease", "branch"), **detector_args):
+    """Alert episodes for each dimension of a DailyCube, newest first"""
+    dates = cube.start + np.arange(cube.n_days).astype("timedelta64[D]")
+    episodes = []
+    for dim in dimensions:
+        if dim not in cube.prefix:
+            continue
+        signal = rolling_signal(cube.prefix[dim])
+        detector = EWMADetector(signal.shape[1], **detector_args)
+        z, baseline, flags = detector.run(signal)
+        episodes.extend(_episodes(dim, cube.display(dim), dates, signal, baseline, z, flags))
+    episodes.sort(key=lambda e: (e["end"], abs(e["peak_z"])), reverse=True)
+    return episodes
+
+
+def build_alerts(cube, recent_days=SIGNAL_DAYS, limit=50):
+    """KB section: method, currently active episodes and recent history"""
+    if cube is None:
+        return {
+            "overview": "Temporal data not available",
+            "interpretation": "Visit timestamp information is not present in the current dataset."
+        }
+    episodes = detect(cube)
+    active_since = str(cube.end - np.timedelta64(recent_days - 1, "D"))
+    active = [e for e in episodes if e["end"] >= active_since]
+
+    surges = [e for e in episodes if e["direction"] == "surge"]
+    if active:
+        lead = max(active, key=lambda e: abs(e["peak_z"]))
+        interpretation = (f"{len(active)} active alert(s) as of {cube.end}. Strongest: {lead['direction']} in "
+                          f"{lead['dimension']} '{lead['name']}' ({lead['peak_value']} visits in 7 days vs a baseline of "
+                          f"{lead['peak_baseline']}, z={lead['peak_z']}).")
+    else:
+        interpretation = f"No active alerts as of {cube.end}."
+    if surges:
+        biggest = max(surges, key=lambda e: e["peak_z"])
+        interpretation += (f" The strongest surge on record was {biggest['dimension']} '{biggest['name']}' from "
+                           f"{biggest['start']} to {biggest['end']} (peak {biggest['peak_value']} visits in 7 days on {biggest['peak_date']}).")
+
+    return {
+        "method": {
+            "signal": f"trailing {SIGNAL_DAYS}-day visits",
+            "baseline": f"EWMA, half-life {HALFLIFE_DAYS} days",
+            "z_threshold": Z_THRESHOLD,
+            "min_count": MIN_COUNT,
+            "warmup_days": WARMUP_DAYS
+        },
+        "as_of": str(cube.end),
+        "active": active,
+        "episodes": episodes[:limit],
+        "total_episodes": len(episodes),
+        "interpretation": interpretation
+    }
@@ -5,29 +5,130 @@ Refactored FastAPI Application
 - Smart API fallback
 - Analytics-driven chatbot
 """
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-import uvicorn
-import pandas as pd
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import asyncio
 import os
+import threading
+import time
 
 from src.json_kb import JSONKnowledgeBase
+from src.fallback import FallbackEngine
 from src.llm import LLMGenerator
+from src.metrics import metrics, start_request_trace, end_request_trace, format_server_timing
+from src.nlp import IntentParser
+from src.query_log import QueryLog
+from src.responses import FastJSONResponse, CompressionMiddleware, json_bytes
 
-app = FastAPI(title="Saylani Medical Help Desk API - Refactored")
+# LLM client start-up mode:
+#   background - serve /health and analytics immediately, initialize the client in a thread (default)
+#   lazy       - initialize on the first uncached chat query
+#   eager      - initialize before accepting requests
+LLM_INIT_MODE = os.getenv("LLM_INIT_MODE", "background")
+
+# KB loading:
+#   auto - memory-map the binary KB shared by all workers, parsing the JSON if it is missing or stale (default)
+#   mmap - memory-map the binary KB and refuse to start without a current one
+#   json - parse the JSON into each process
+KB_LOAD_MODE = os.getenv("KB_LOAD_MODE", "auto")
+
+# /chat/batch: most queries per request, and uncached LLM calls in flight at once per request
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# /nlp/parse: most messages per request
+NLP_MAX_MESSAGES = int(os.getenv("NLP_MAX_MESSAGES", "5000"))
 
 # Initialize components
-kb = JSONKnowledgeBase()
-llm = LLMGenerator()
+kb = JSONKnowledgeBase(shared=KB_LOAD_MODE != "json", strict=KB_LOAD_MODE == "mmap")
+llm = LLMGenerator(init_model=False, fallback=FallbackEngine(kb))
+# Opt-in (QUERY_LOG=1) anonymized request log for load replay and cache warm-up
+query_log = QueryLog.from_env()
+intent_parser = IntentParser()
+
+@asynccontextmanager
+async def lifespan(app):
+    if LLM_INIT_MODE == "eager":
+        llm.init_model()
+    elif LLM_INIT_MODE == "background":
+        threading.Thread(target=llm.init_model, name="llm-init", daemon=True).start()
+    yield
+
+app = FastAPI(title="Saylani Medical Help Desk API - Refactored", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
 
 # Models
 class QueryRequest(BaseModel):
     query: str
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES)
+
+class ParseRequest(BaseModel):
+    messages: List[str] = Field(..., min_length=1, max_length=NLP_MAX_MESSAGES)
+
 class AnalyticsRequest(BaseModel):
     metric: str  # 'disease_trends', 'doctor_workload', 'geographic_distribution'
 
+# Query routing
+
+MEDICAL_NOTICE = """⚕️ **Medical Information Notice**
+
+I'm an **Analytics Assistant** for the Saylani Medical Help Desk, designed to provide insights about:
+- Disease trends and statistics
+- Doctor workload and availability
+- Geographic distribution of patients
+- Help desk performance metrics
+
+**I cannot provide medical advice or information about diseases, symptoms, or treatments.**
+
+For medical questions like yours, please:
+1. **Consult a qualified healthcare professional**
+2. **Visit a Saylani Medical Help Desk branch**
+3. **Call our medical hotline for professional advice**
+
+However, I can help you with questions like:
+- "What are the most common diseases in our help desk?"
+- "Which doctors are available in Gulshan area?"
+- "What is the patient volume trend this month?"
+- "Which branch has the highest workload?"
+
+Would you like to ask an analytics-related question instead?"""
+
+def classify_query(query):
+    """Route a query to 'analytics' or 'medical_question' by keyword matching"""
+    query_lower = query.lower()
+    
+    # Keywords that indicate analytics queries
+    analytics_keywords = [
+        'trend', 'workload', 'busy', 'most common', 'prevalent', 
+        'distribution', 'geographic', 'branch', 'area', 'location',
+        'summary', 'analytics', 'dashboard', 'statistics', 'data',
+        'how many', 'total', 'count', 'patients', 'visits', 'cases',
+        'top', 'highest', 'lowest', 'average', 'comparison', 'compare'
+    ]
+    
+    # Keywords that indicate medical questions
+    medical_keywords = [
+        'symptom', 'treatment', 'cure', 'medicine', 'diagnosis',
+        'difference between', 'what is', 'how to treat', 'causes of',
+        'prevent', 'contagious', 'infection', 'disease information',
+        'sinus', 'cold', 'flu', 'fever', 'pain', 'ache'
+    ]
+    
+    # Check if it's a medical question
+    is_medical = any(keyword in query_lower for keyword in medical_keywords)
+    is_analytics = any(keyword in query_lower for keyword in analytics_keywords)
+    
+    # Clearly a medical question and not analytics
+    if is_medical and not is_analytics:
+        return "medical_question"
+    return "analytics"
+
 # Endpoints
 
 @app.get("/")
@@ -48,16 +149,24 @@ def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "kb_loaded": kb.kb_data is not None,
-        "api_available": llm.api_available
+        "kb_loaded": kb.loaded,
+        "llm_ready": llm.model_ready.is_set(),
+        "api_available": llm.api_available,
+        "llm_backend": llm.backend.name,
+        "llm_circuit": llm.breaker.state
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus-style latency and cache metrics"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/analytics/disease-trends")
 def get_disease_trends():
     """Get disease trends from JSON KB"""
     try:
         data = kb.query_disease_trends()
-        return {"success": True, "data": data}
+        return FastJSONResponse({"success": True, "data": data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -66,7 +175,7 @@ def get_doctor_workload():
     """Get doctor workload from JSON KB"""
     try:
         data = kb.query_doctor_workload()
-        return {"success": True, "data": data}
+        return FastJSONResponse({"success": True, "data": data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -75,7 +184,7 @@ def get_geographic_distribution():
     """Get geographic distribution from JSON KB"""
     try:
         data = kb.query_geographic_distribution()
-        return {"success": True, "data": data}
+        return FastJSONResponse({"success": True, "data": data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -84,93 +193,198 @@ def get_summary():
     """Get executive summary from JSON KB"""
     try:
         data = kb.query_summary()
-        return {"success": True, "data": data}
+        return FastJSONResponse({"success": True, "data": data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/chat/query")
-def chat_query(request: QueryRequest):
-    """
-    Analytics chatbot endpoint
-    - Uses Gemini API if available
-    - Falls back to JSON KB extraction if API fails/quota exceeded
-    """
+@app.get("/analytics/doctor-utilization")
+def get_doctor_utilization():
+    """Scheduled capacity vs visits per doctor, branch and hour from JSON KB"""
     try:
-        # Detect query type
-        query_lower = request.query.lower()
-        
-        # Keywords that indicate analytics queries
-        analytics_keywords = [
-            'trend', 'workload', 'busy', 'most common', 'prevalent', 
-            'distribution', 'geographic', 'branch', 'area', 'location',
-            'summary', 'analytics', 'dashboard', 'statistics', 'data',
-            'how many', 'total', 'count', 'patients', 'visits', 'cases',
-            'top', 'highest', 'lowest', 'average', 'comparison', 'compare'
-        ]
-        
-        # Keywords that indicate medical questions
-        medical_keywords = [
-            'symptom', 'treatment', 'cure', 'medicine', 'diagnosis',
-            'difference between', 'what is', 'how to treat', 'causes of',
-            'prevent', 'contagious', 'infection', 'disease information',
-            'sinus', 'cold', 'flu', 'fever', 'pain', 'ache'
-        ]
-        
-        # Check if it's a medical question
-        is_medical = any(keyword in query_lower for keyword in medical_keywords)
-        is_analytics = any(keyword in query_lower for keyword in analytics_keywords)
-        
-        # If it's clearly a medical question and not analytics
-        if is_medical and not is_analytics:
-            return {
-                "success": True,
-                "query": request.query,
-                "answer": """⚕️ **Medical Information Notice**
+        data = kb.query_doctor_utilization()
+        return FastJSONResponse({"success": True, "data": data})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-I'm an **Analytics Assistant** for the Saylani Medical Help Desk, designed to provide insights about:
-- Disease trends and statistics
-- Doctor workload and availability
-- Geographic distribution of patients
-- Help desk performance metrics
+@app.get("/analytics/time-windows")
+def get_time_windows(days: Optional[int] = Query(None, ge=1, le=3660), dimension: Optional[str] = None,
+                     top: int = Query(10, ge=1, le=100)):
+    """Rolling 7/30/90-day and month-over-month analytics; pass `days` for any other trailing window"""
+    try:
+        data = kb.query_time_windows(days, dimension, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Custom windows need the binary KB (run `python -m src.json_kb_generator`)")
+    return FastJSONResponse({"success": True, "data": data})
 
-**I cannot provide medical advice or information about diseases, symptoms, or treatments.**
+@app.get("/analytics/alerts")
+def get_alerts(dimension: Optional[str] = None, active_only: bool = False):
+    """Disease and branch volume surges/drops flagged by the anomaly detector"""
+    if dimension and dimension not in ("disease", "branch"):
+        raise HTTPException(status_code=400, detail="dimension must be 'disease' or 'branch'")
+    try:
+        data = kb.query_alerts(dimension, active_only)
+        return FastJSONResponse({"success": True, "data": data})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-For medical questions like yours, please:
-1. **Consult a qualified healthcare professional**
-2. **Visit a Saylani Medical Help Desk branch**
-3. **Call our medical hotline for professional advice**
+@app.get("/analytics/forecast")
+def get_forecast(dimension: Optional[str] = None, name: Optional[str] = None):
+    """Expected daily visits for the next 14 days per branch and per specialty"""
+    try:
+        data = kb.query_forecast(dimension, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"success": True, "data": data})
 
-However, I can help you with questions like:
-- "What are the most common diseases in our help desk?"
-- "Which doctors are available in Gulshan area?"
-- "What is the patient volume trend this month?"
-- "Which branch has the highest workload?"
+@app.get("/analytics/tables/{name}")
+def get_table(name: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=1000)):
+    """Page through a full ranking or the per-day visit series from the binary KB"""
+    data = kb.query_table(name, offset, limit)
+    if data is None:
+        available = ", ".join(kb.table_names()) or "none (binary KB not loaded)"
+        raise HTTPException(status_code=404, detail=f"Unknown table '{name}'. Available: {available}")
+    return FastJSONResponse({"success": True, "data": data})
 
-Would you like to ask an analytics-related question instead?""",
-                "source": "System Response",
-                "api_used": False,
-                "query_type": "medical_question"
-            }
-        
-        # Get full context from JSON KB for analytics queries
-        context_text = kb.get_full_context()
-        
-        # Generate answer (with automatic fallback)
-        answer = llm.generate_answer(request.query, context_text)
-        
-        # Determine actual source
-        source_type = "Gemini API" if llm.api_available and "Extracted from Analytics Knowledge Base" not in answer else "JSON Knowledge Base (Fallback)"
-        
+def answer_query(query, context_text=None):
+    """Classify and answer one chat query; builds the KB context unless one is passed in"""
+    with metrics.span("classify"):
+        query_type = classify_query(query)
+    
+    # If it's clearly a medical question and not analytics
+    if query_type == "medical_question":
         return {
             "success": True,
-            "query": request.query,
-            "answer": answer,
-            "source": source_type,
-            "api_used": llm.api_available,
-            "query_type": "analytics"
+            "query": query,
+            "answer": MEDICAL_NOTICE,
+            "source": "System Response",
+            "api_used": False,
+            "query_type": "medical_question"
         }
+    
+    # Get full context from JSON KB for analytics queries
+    if context_text is None:
+        with metrics.span("context_build"):
+            context_text = kb.get_full_context()
+    
+    # Generate answer (with automatic fallback)
+    answer = llm.generate_answer(query, context_text)
+    
+    # Determine actual source
+    source_type = llm.backend.label if llm.api_available and "Extracted from Analytics Knowledge Base" not in answer else "JSON Knowledge Base (Fallback)"
+    
+    return {
+        "success": True,
+        "query": query,
+        "answer": answer,
+        "source": source_type,
+        "api_used": llm.api_available,
+        "query_type": "analytics",
+        "usage": llm.request_usage()
+    }
+
+@app.post("/chat/query")
+def chat_query(request: QueryRequest, response: Response, x_debug_timing: Optional[str] = Header(None)):
+    """
+    Analytics chatbot endpoint
+    - Uses the configured LLM backend (Gemini by default) if available
+    - Falls back to JSON KB extraction if API fails/quota exceeded
+    - Send `X-Debug-Timing: 1` to get per-stage timings in a Server-Timing header
+    """
+    metrics.inc("chat_requests")
+    trace_token, spans = start_request_trace()
+    started = time.perf_counter()
+    try:
+        result = answer_query(request.query)
+        query_log.record("/chat/query", request.query, query_type=result["query_type"],
+                         seconds=time.perf_counter() - started)
+        return result
     except Exception as e:
+        query_log.record("/chat/query", request.query, status=500, seconds=time.perf_counter() - started)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if x_debug_timing:
+            response.headers["Server-Timing"] = format_server_timing(spans)
+        end_request_trace(trace_token)
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchQueryRequest):
+    """
+    Answer many chat queries in one round trip, streamed as NDJSON (one line per query, in completion order)
+    - Duplicate queries are answered once
+    - Medical notices, cached answers and fallback-only answers are sent first
+    - Remaining LLM calls run concurrently, at most BATCH_CONCURRENCY at a time
+    - The last line is a summary with "done": true
+    """
+    started = time.perf_counter()
+    metrics.inc("chat_requests", len(request.queries))
+    metrics.inc("chat_batch_requests")
+
+    positions = {}
+    for index, query in enumerate(request.queries):
+        positions.setdefault(query.strip(), []).append(index)
+    with metrics.span("context_build"):
+        context_text = kb.get_full_context()
+
+    def lines(query, item):
+        return b"".join(json_bytes({"index": index, **item, "query": request.queries[index]}) + b"\n"
+                        for index in positions[query])
+
+    def error_item(query, e):
+        return {"success": False, "query": query, "error": str(e)}
+
+    def answer(query):
+        try:
+            return answer_query(query, context_text)
+        except Exception as e:
+            return error_item(query, e)
+
+    def split():
+        """(immediate, pending): medical notices and cached answers need no LLM call"""
+        immediate, pending = [], []
+        for query in positions:
+            if classify_query(query) == "medical_question" or llm.has_cached(query, context_text):
+                immediate.append(query)
+            else:
+                pending.append(query)
+        return immediate, pending
+
+    async def stream():
+        # Cache reads and fallback extraction run in a worker thread so other requests are not stalled
+        immediate, pending = await asyncio.to_thread(split)
+        for query in immediate:
+            yield lines(query, await asyncio.to_thread(answer, query))
+
+        if pending and not llm.model_ready.is_set():
+            await asyncio.to_thread(llm.init_model)
+        if not llm.api_available:
+            # Fallback extraction is local and fast; no point fanning it out
+            for query in pending:
+                yield lines(query, await asyncio.to_thread(answer, query))
+            pending = []
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run(query):
+            async with semaphore:
+                return query, await asyncio.to_thread(answer, query)
+
+        for done in asyncio.as_completed([run(query) for query in pending]):
+            query, item = await done
+            yield lines(query, item)
+
+        elapsed = time.perf_counter() - started
+        query_log.record("/chat/batch", queries=request.queries, seconds=elapsed)
+        yield json_bytes({
+            "done": True,
+            "total": len(request.queries),
+            "unique": len(positions),
+            "llm_calls": len(pending),
+            "elapsed_ms": round(elapsed * 1000, 2)
+        }) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 @app.post("/analytics/search")
 def search_analytics(request: QueryRequest):
@@ -178,15 +392,48 @@ def search_analytics(request: QueryRequest):
     Search JSON KB for specific analytics data
     Returns structured JSON data
     """
+    started = time.perf_counter()
     try:
         results = kb.search(request.query)
-        return {
+        query_log.record("/analytics/search", request.query, seconds=time.perf_counter() - started)
+        return FastJSONResponse({
             "success": True,
             "query": request.query,
             "results": results
-        }
+        })
     except Exception as e:
+        query_log.record("/analytics/search", request.query, status=500, seconds=time.perf_counter() - started)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/nlp/parse")
+def parse_messages(request: ParseRequest):
+    """
+    Classify patient messages (book / cancel / info / availability) and extract entities
+    - Intents for the whole batch are scored with one sparse matrix product
+    - Doctor, area and disease names are resolved to their IDs
+    """
+    with metrics.span("nlp_parse"):
+        results = intent_parser.parse_batch(request.messages)
+    metrics.inc("nlp_messages", len(request.messages))
+    return FastJSONResponse({
+        "success": True,
+        "count": len(results),
+        "results": results
+    })
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the Saylani Medical Help Desk API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "1")),
+                        help="Worker processes (they share the mapped KB and the response cache)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Workers re-import the app, so it has to be passed as an import string
+        uvicorn.run("src.app:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,155 @@
+"""
+LLM Cache Warm-up
+Pipeline stage after the knowledge base build: asks the common analytics questions against
+the new KB version so the first admins get cached answers instead of full LLM latency
+- Question set: WARMUP_QUESTIONS_PATH (one per line) or the built-in dashboard examples
+- Plus the most frequent recent analytics questions from the query log, paraphrases merged
+- Bounded by concurrency, wall time and prompt-token budgets; already cached questions are skipped
+- Writes data/cache/warmup_report.json
+
+Usage:
+    python -m src.cache_warmer
+    python -m src.cache_warmer --max-questions 20 --max-seconds 60
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from src.json_kb import JSONKnowledgeBase
+from src.llm import LLMGenerator
+from src.profiling import add_profile_arguments, profile_run
+from src.query_log import QUERY_LOG_PATH, QueryLog
+from src.semantic_cache import canonical_tokens
+
+WARMUP_QUESTIONS_PATH = os.getenv("WARMUP_QUESTIONS_PATH", "data/knowledge_base/warmup_questions.txt")
+REPORT_PATH = "data/cache/warmup_report.json"
+
+WARMUP_MAX_QUESTIONS = int(os.getenv("WARMUP_MAX_QUESTIONS", "40"))
+WARMUP_LOG_QUESTIONS = int(os.getenv("WARMUP_LOG_QUESTIONS", "20"))
+WARMUP_LOG_DAYS = int(os.getenv("WARMUP_LOG_DAYS", "7"))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "2"))
+WARMUP_MAX_SECONDS = float(os.getenv("WARMUP_MAX_SECONDS", "180"))
+WARMUP_MAX_PROMPT_TOKENS = int(os.getenv("WARMUP_MAX_PROMPT_TOKENS", "200000"))
+
+# The examples shown in the chat medical notice and the dashboard placeholder
+DEFAULT_QUESTIONS = [
+    "Who is the busiest doctor?",
+    "What are the top diseases?",
+    "Explain the disease trends graph",
+    "What are the most common diseases in our help desk?",
+    "Which doctors are available in Gulshan area?",
+    "What is the patient volume trend this month?",
+    "Which branch has the highest workload?",
+    "Give me a summary of the analytics",
+    "Which areas do most patients come from?",
+    "Are there any disease surges or unusual spikes?",
+    "What is the visit forecast for next week?",
+    "Which doctors are overbooked or underutilized?",
+]
+
+
+def load_question_set(path=WARMUP_QUESTIONS_PATH):
+    """Configured questions (one per line, '#' comments) or the built-in defaults"""
+    if not os.path.exists(path):
+        return list(DEFAULT_QUESTIONS)
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def top_logged_questions(path=QUERY_LOG_PATH, days=WARMUP_LOG_DAYS, limit=WARMUP_LOG_QUESTIONS):
+    """Most frequent analytics questions of the last `days` days; paraphrases count together"""
+    if limit <= 0:
+        return []
+    since = (datetime.now() - timedelta(days=days)).isoformat()
+    counts, phrasings = Counter(), {}
+    for entry in QueryLog(path, enabled=False).read():
+        query = (entry.get("query") or "").strip()
+        if not query or entry.get("ts", "") < since or entry.get("query_type", "analytics") != "analytics":
+            continue
+        key = " ".join(canonical_tokens(query)) or query.lower()
+        counts[key] += 1
+        phrasings.setdefault(key, Counter())[query] += 1
+    return [phrasings[key].most_common(1)[0][0] for key, _ in counts.most_common(limit)]
+
+
+class CacheWarmer:
+    def __init__(self, kb, llm, concurrency=WARMUP_CONCURRENCY, max_seconds=WARMUP_MAX_SECONDS,
+                 max_prompt_tokens=WARMUP_MAX_PROMPT_TOKENS):
+        self.kb = kb
+        self.llm = llm
+        self.concurrency = max(1, concurrency)
+        self.max_seconds = max_seconds
+        self.max_prompt_tokens = max_prompt_tokens
+        self._lock = threading.Lock()
+        self.prompt_tokens = 0
+
+    def _warm_one(self, query, context_text, deadline):
+        if self.llm.has_cached(query, context_text):
+            return "already_cached"
+        remaining = deadline - time.monotonic()
+        with self._lock:
+            over_budget = self.prompt_tokens >= self.max_prompt_tokens
+        if remaining <= 0 or over_budget:
+            return "skipped_budget"
+        # Background work: wait for a rate-limit token instead of falling back
+        self.llm.generate_answer(query, context_text, queue_seconds=remaining)
+        usage = self.llm.request_usage()
+        if usage is None:
+            return "not_cached"
+        with self._lock:
+            self.prompt_tokens += usage["prompt_tokens"] - usage["cached_tokens"]
+        return "warmed"
+
+    def run(self, questions):
+        start = time.monotonic()
+        context_text = self.kb.get_full_context()
+        report = {
+            "generated_at": datetime.now().isoformat(),
+            "kb_version": self.llm._kb_version(context_text),
+            "questions": len(questions),
+            "results": {},
+        }
+        if not self.llm.init_model():
+            print("ℹ️ No LLM available — nothing to warm")
+            report["results"] = {q: "no_llm" for q in questions}
+        else:
+            deadline = start + self.max_seconds
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="warmup") as pool:
+                statuses = pool.map(lambda q: self._warm_one(q, context_text, deadline), questions)
+                report["results"] = dict(zip(questions, statuses))
+        report["summary"] = dict(Counter(report["results"].values()))
+        report["uncached_prompt_tokens"] = self.prompt_tokens
+        report["seconds"] = round(time.monotonic() - start, 2)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the LLM answer cache for the current knowledge base")
+    parser.add_argument("--max-questions", type=int, default=WARMUP_MAX_QUESTIONS)
+    parser.add_argument("--max-seconds", type=float, default=WARMUP_MAX_SECONDS)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_run("cache_warmer", args):
+        questions = list(dict.fromkeys(load_question_set() + top_logged_questions()))[:args.max_questions]
+        mode = os.getenv("KB_LOAD_MODE", "auto")
+        kb = JSONKnowledgeBase(shared=mode != "json", strict=mode == "mmap")
+        llm = LLMGenerator(init_model=False)
+        report = CacheWarmer(kb, llm, max_seconds=args.max_seconds).run(questions)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    summary = ", ".join(f"{n} {status}" for status, n in report["summary"].items()) or "no questions"
+    print(f"🔥 Cache warm-up: {summary} in {report['seconds']}s")
+    print(f"📄 Warm-up report: {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
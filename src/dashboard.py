@@ -4,6 +4,7 @@ import requests
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+from src.utilization import UtilizationEngine
 
 # Configuration
 API_URL = "http://localhost:8000"
@@ -212,23 +213,241 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Quick Stats")
 
 # Load Data
-@st.cache_data
-def load_data():
-    if os.path.exists("data/cleaned/patients.csv"):
-        return pd.read_csv("data/cleaned/patients.csv")
-    return None
+# Every cache below is keyed by the data version (a fingerprint of the cleaned
+# file), so a pipeline rerun invalidates exactly the entries built from the old
+# data while unchanged filters keep hitting the cache.
+DATA_PATH = "data/cleaned/patients.csv"
+TIMINGS_PATH = "data/cleaned/doctor_timings.csv"
+CACHE_MAX_ENTRIES = 32
 
-df = load_data()
+AXIS_STYLE = dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF'))
 
-if df is not None and len(df) > 0:
+def data_version(path=DATA_PATH):
+    """Cheap fingerprint of the cleaned data file (mtime + size)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_data(version):
+    """Load cleaned patients once per data version (shared, read-only)"""
+    if version is None:
+        return None
+    return pd.read_csv(DATA_PATH)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def compute_aggregates(version, branch):
+    """Aggregates behind the KPIs and charts for one branch filter"""
+    df = load_data(version)
+    if df is None:
+        return None
+    if branch != "All":
+        df = df[df['branch_id'] == branch]
+
+    daily_counts = None
+    if 'visit_timestamp' in df.columns and len(df) > 0:
+        timestamps = pd.to_datetime(df['visit_timestamp'], errors='coerce').dropna()
+        if len(timestamps) > 0:
+            daily_counts = timestamps.dt.floor('D').value_counts().sort_index()
+            daily_counts = daily_counts.resample('D').sum().reset_index()
+            daily_counts.columns = ['Date', 'Visits']
+
+    return {
+        "records": len(df),
+        "branches": df['branch_id'].nunique() if 'branch_id' in df.columns else 0,
+        "doctors": df['doctor_id'].nunique() if 'doctor_id' in df.columns else 0,
+        "diseases": df['cleaned_disease_name'].nunique() if 'cleaned_disease_name' in df.columns else 0,
+        "areas": df['area'].nunique() if 'area' in df.columns else 0,
+        "disease_counts": df['cleaned_disease_name'].value_counts().head(10) if 'cleaned_disease_name' in df.columns else None,
+        "doctor_counts": df['doctor_id'].value_counts().head(10) if 'doctor_id' in df.columns else None,
+        "area_counts": df['area'].value_counts().head(15) if 'area' in df.columns else None,
+        "daily_counts": daily_counts
+    }
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_disease_figure(version, branch):
+    """Top 10 diseases bar chart"""
+    disease_counts = compute_aggregates(version, branch)["disease_counts"]
+    fig = px.bar(
+        x=disease_counts.values,
+        y=disease_counts.index,
+        orientation='h',
+        labels={'x': 'Number of Cases', 'y': 'Disease'},
+        color=disease_counts.values,
+        color_continuous_scale='Viridis',
+        title="Most Common Diseases"
+    )
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        font=dict(size=12, color='#E0E7FF'),
+        xaxis=AXIS_STYLE,
+        yaxis=dict(categoryorder='total ascending', **AXIS_STYLE)
+    )
+    return fig
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_visits_figure(version, branch):
+    """Daily patient visits line chart"""
+    daily_counts = compute_aggregates(version, branch)["daily_counts"]
+    fig = px.line(
+        daily_counts,
+        x='Date',
+        y='Visits',
+        markers=True,
+        color_discrete_sequence=['#3b82f6']
+    )
+    fig.update_traces(
+        line=dict(width=3),
+        marker=dict(size=8)
+    )
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        xaxis_title="Date",
+        yaxis_title="Number of Visits",
+        hovermode='x unified',
+        font=dict(color='#E0E7FF'),
+        xaxis=AXIS_STYLE,
+        yaxis=AXIS_STYLE
+    )
+    return fig
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_doctor_figure(version, branch):
+    """Top 10 busiest doctors bar chart"""
+    doctor_counts = compute_aggregates(version, branch)["doctor_counts"]
+    fig = px.bar(
+        x=doctor_counts.index,
+        y=doctor_counts.values,
+        labels={'x': 'Doctor ID', 'y': 'Patient Count'},
+        color=doctor_counts.values,
+        color_continuous_scale='Plasma'
+    )
+    fig.update_layout(
+        height=350,
+        showlegend=False,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        xaxis_title="Doctor ID",
+        yaxis_title="Number of Patients",
+        font=dict(color='#E0E7FF'),
+        xaxis=AXIS_STYLE,
+        yaxis=AXIS_STYLE
+    )
+    return fig
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_area_figure(version, branch):
+    """Geographic distribution bar chart"""
+    area_counts = compute_aggregates(version, branch)["area_counts"]
+    fig = go.Figure(data=[
+        go.Bar(
+            x=area_counts.index,
+            y=area_counts.values,
+            marker=dict(
+                color=area_counts.values,
+                colorscale='Turbo',
+                showscale=True,
+                colorbar=dict(title="Patients")
+            ),
+            text=area_counts.values,
+            textposition='outside'
+        )
+    ])
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        xaxis_title="Area",
+        yaxis_title="Number of Patients",
+        xaxis_tickangle=-45,
+        font=dict(color='#E0E7FF'),
+        xaxis=AXIS_STYLE,
+        yaxis=AXIS_STYLE
+    )
+    return fig
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def compute_utilization(version, timings_version, branch):
+    """Scheduled-capacity utilization for one branch filter (None without timings)"""
+    df = load_data(version)
+    if df is None or timings_version is None or 'visit_timestamp' not in df.columns:
+        return None
+    timings = pd.read_csv(TIMINGS_PATH)
+    if branch != "All":
+        df = df[df['branch_id'] == branch]
+        timings = timings[timings['branch_id'] == branch]
+    if df.empty or timings.empty:
+        return None
+    return UtilizationEngine(timings).compute(df)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_utilization_figure(version, timings_version, branch):
+    """Share of scheduled capacity used per doctor"""
+    doctors = [d for d in compute_utilization(version, timings_version, branch)["doctors"] if d["capacity_visits"] > 0]
+    fig = px.bar(
+        x=[d["doctor_id"] for d in doctors],
+        y=[d["utilization_pct"] for d in doctors],
+        labels={'x': 'Doctor ID', 'y': 'Utilization (%)'},
+        color=[d["overbooked_hours"] for d in doctors],
+        color_continuous_scale='Plasma'
+    )
+    fig.add_hline(y=100, line_dash="dash", line_color="#F87171")
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        xaxis_title="Doctor ID",
+        yaxis_title="Capacity Used (%)",
+        coloraxis_colorbar=dict(title="Overbooked h"),
+        font=dict(color='#E0E7FF'),
+        xaxis=AXIS_STYLE,
+        yaxis=AXIS_STYLE
+    )
+    return fig
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def build_capacity_by_hour_figure(version, timings_version, branch):
+    """Served, overbooked and idle capacity by hour of day"""
+    by_hour = compute_utilization(version, timings_version, branch)["by_hour"]
+    hours = [f"{h['hour']:02d}:00" for h in by_hour]
+    fig = go.Figure(data=[
+        go.Bar(name="Served", x=hours, y=[h["served_visits"] for h in by_hour], marker_color='#4F9FFD'),
+        go.Bar(name="Overbooked", x=hours, y=[h["overbooked_visits"] for h in by_hour], marker_color='#F87171'),
+        go.Bar(name="Idle capacity", x=hours, y=[h["idle_capacity_visits"] for h in by_hour], marker_color='#9AA5B1')
+    ])
+    fig.update_layout(
+        barmode='stack',
+        height=350,
+        plot_bgcolor='#14344F',
+        paper_bgcolor='#14344F',
+        xaxis_title="Hour of Day",
+        yaxis_title="Visits",
+        font=dict(color='#E0E7FF'),
+        legend=dict(orientation='h', y=1.1),
+        xaxis=AXIS_STYLE,
+        yaxis=AXIS_STYLE
+    )
+    return fig
+
+version = data_version()
+timings_version = data_version(TIMINGS_PATH)
+overall = compute_aggregates(version, "All")
+
+if overall is not None and overall["records"] > 0:
     # Sidebar quick stats
-    st.sidebar.metric("📋 Total Records", len(df))
-    st.sidebar.metric("🏥 Branches", df['branch_id'].nunique() if 'branch_id' in df.columns else 0)
+    st.sidebar.metric("📋 Total Records", overall["records"])
+    st.sidebar.metric("🏥 Branches", overall["branches"])
     
-    if branch_filter != "All":
-        df = df[df['branch_id'] == branch_filter]
+    stats = overall if branch_filter == "All" else compute_aggregates(version, branch_filter)
     
-    if len(df) == 0:
+    if stats["records"] == 0:
         st.warning(f"⚠️ No data available for branch {branch_filter}. Please select a different branch.")
     else:
         # Summary Metrics with enhanced styling
@@ -238,32 +457,29 @@ if df is not None and len(df) > 0:
         with metric_col1:
             st.metric(
                 "👥 Total Patients",
-                f"{len(df):,}",
+                f"{stats['records']:,}",
                 delta=None,
                 help="Total number of patient visits"
             )
         
         with metric_col2:
-            unique_doctors = df['doctor_id'].nunique() if 'doctor_id' in df.columns else 0
             st.metric(
                 "👨‍⚕️ Active Doctors",
-                unique_doctors,
+                stats["doctors"],
                 help="Number of doctors serving patients"
             )
         
         with metric_col3:
-            unique_diseases = df['cleaned_disease_name'].nunique() if 'cleaned_disease_name' in df.columns else 0
             st.metric(
                 "🦠 Disease Types",
-                unique_diseases,
+                stats["diseases"],
                 help="Unique diseases being treated"
             )
         
         with metric_col4:
-            unique_areas = df['area'].nunique() if 'area' in df.columns else 0
             st.metric(
                 "🗺️ Areas Served",
-                unique_areas,
+                stats["areas"],
                 help="Geographic coverage"
             )
         
@@ -271,28 +487,9 @@ if df is not None and len(df) > 0:
         
         # Top Diseases with Plotly
         st.markdown("### 🦠 Top 10 Diseases")
-        if 'cleaned_disease_name' in df.columns and len(df) > 0:
-            disease_counts = df['cleaned_disease_name'].value_counts().head(10)
-            if len(disease_counts) > 0:
-                fig = px.bar(
-                    x=disease_counts.values,
-                    y=disease_counts.index,
-                    orientation='h',
-                    labels={'x': 'Number of Cases', 'y': 'Disease'},
-                    color=disease_counts.values,
-                    color_continuous_scale='Viridis',
-                    title="Most Common Diseases"
-                )
-                fig.update_layout(
-                    height=400,
-                    showlegend=False,
-                    plot_bgcolor='#14344F',
-                    paper_bgcolor='#14344F',
-                    font=dict(size=12, color='#E0E7FF'),
-                    xaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF')),
-                    yaxis=dict(categoryorder='total ascending', gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF'))
-                )
-                st.plotly_chart(fig, use_container_width=True)
+        if stats["disease_counts"] is not None:
+            if len(stats["disease_counts"]) > 0:
+                st.plotly_chart(build_disease_figure(version, branch_filter), use_container_width=True)
             else:
                 st.info("📊 No disease data available.")
         else:
@@ -305,70 +502,17 @@ if df is not None and len(df) > 0:
         
         with col1:
             st.markdown("### 📈 Patient Visits Over Time")
-            if 'visit_timestamp' in df.columns and len(df) > 0:
-                df_copy = df.copy()
-                df_copy['visit_timestamp'] = pd.to_datetime(df_copy['visit_timestamp'], errors='coerce')
-                df_copy = df_copy.dropna(subset=['visit_timestamp'])
-                
-                if len(df_copy) > 0:
-                    daily_counts = df_copy.set_index('visit_timestamp').resample('D').size().reset_index()
-                    daily_counts.columns = ['Date', 'Visits']
-                    
-                    if len(daily_counts) > 0 and daily_counts['Visits'].sum() > 0:
-                        fig = px.line(
-                            daily_counts,
-                            x='Date',
-                            y='Visits',
-                            markers=True,
-                            color_discrete_sequence=['#3b82f6']
-                        )
-                        fig.update_traces(
-                            line=dict(width=3),
-                            marker=dict(size=8)
-                        )
-                        fig.update_layout(
-                            height=350,
-                            plot_bgcolor='#14344F',
-                            paper_bgcolor='#14344F',
-                            xaxis_title="Date",
-                            yaxis_title="Number of Visits",
-                            hovermode='x unified',
-                            font=dict(color='#E0E7FF'),
-                            xaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF')),
-                            yaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF'))
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.info("📊 No time-series data available.")
-                else:
-                    st.info("📊 No valid timestamp data available.")
+            daily_counts = stats["daily_counts"]
+            if daily_counts is not None and daily_counts['Visits'].sum() > 0:
+                st.plotly_chart(build_visits_figure(version, branch_filter), use_container_width=True)
             else:
-                st.info("📊 Timestamp data not available.")
+                st.info("📊 No time-series data available.")
         
         with col2:
             st.markdown("### 👨‍⚕️ Top 10 Busiest Doctors")
-            if 'doctor_id' in df.columns and len(df) > 0:
-                doctor_counts = df['doctor_id'].value_counts().head(10)
-                if len(doctor_counts) > 0:
-                    fig = px.bar(
-                        x=doctor_counts.index,
-                        y=doctor_counts.values,
-                        labels={'x': 'Doctor ID', 'y': 'Patient Count'},
-                        color=doctor_counts.values,
-                        color_continuous_scale='Plasma'
-                    )
-                    fig.update_layout(
-                        height=350,
-                        showlegend=False,
-                        plot_bgcolor='#14344F',
-                        paper_bgcolor='#14344F',
-                        xaxis_title="Doctor ID",
-                        yaxis_title="Number of Patients",
-                        font=dict(color='#E0E7FF'),
-                        xaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF')),
-                        yaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF'))
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+            if stats["doctor_counts"] is not None:
+                if len(stats["doctor_counts"]) > 0:
+                    st.plotly_chart(build_doctor_figure(version, branch_filter), use_container_width=True)
                 else:
                     st.info("📊 No doctor workload data available.")
             else:
@@ -376,39 +520,46 @@ if df is not None and len(df) > 0:
         
         # Geographic Distribution
         st.markdown("### 🗺️ Geographic Distribution")
-        if 'area' in df.columns and len(df) > 0:
-            area_counts = df['area'].value_counts().head(15)
-            if len(area_counts) > 0:
-                fig = go.Figure(data=[
-                    go.Bar(
-                        x=area_counts.index,
-                        y=area_counts.values,
-                        marker=dict(
-                            color=area_counts.values,
-                            colorscale='Turbo',
-                            showscale=True,
-                            colorbar=dict(title="Patients")
-                        ),
-                        text=area_counts.values,
-                        textposition='outside'
-                    )
-                ])
-                fig.update_layout(
-                    height=400,
-                    plot_bgcolor='#14344F',
-                    paper_bgcolor='#14344F',
-                    xaxis_title="Area",
-                    yaxis_title="Number of Patients",
-                    xaxis_tickangle=-45,
-                    font=dict(color='#E0E7FF'),
-                    xaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF')),
-                    yaxis=dict(gridcolor='rgba(224, 231, 255, 0.1)', color='#9AA5B1', title_font=dict(color='#E0E7FF'))
-                )
-                st.plotly_chart(fig, use_container_width=True)
+        if stats["area_counts"] is not None:
+            if len(stats["area_counts"]) > 0:
+                st.plotly_chart(build_area_figure(version, branch_filter), use_container_width=True)
             else:
                 st.info("📊 No area distribution data available.")
         else:
             st.info("📊 Area data not available.")
+        
+        # Doctor utilization against scheduled hours
+        st.markdown("### ⏱️ Doctor Utilization")
+        utilization = compute_utilization(version, timings_version, branch_filter)
+        if utilization is None:
+            st.info("📊 Doctor timing data not available.")
+        else:
+            overview = utilization["overview"]
+            util_col1, util_col2, util_col3 = st.columns(3)
+            with util_col1:
+                st.metric(
+                    "📈 Capacity Used",
+                    f"{overview['utilization_pct']}%",
+                    help=f"In-schedule visits / scheduled capacity ({utilization['assumptions']['consult_minutes']} min per patient)"
+                )
+            with util_col2:
+                st.metric(
+                    "🔥 Overbooked Hours",
+                    f"{overview['overbooked_hours']:,}",
+                    help=f"Slot-hours with more visits than capacity ({overview['overbooked_visits']:,} extra visits)"
+                )
+            with util_col3:
+                st.metric(
+                    "💤 Idle Capacity",
+                    f"{overview['idle_capacity_visits']:,}",
+                    help=f"Unused visit slots; {overview['visits_outside_schedule']:,} visits happened outside scheduled hours"
+                )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(build_utilization_figure(version, timings_version, branch_filter), use_container_width=True)
+            with col2:
+                st.plotly_chart(build_capacity_by_hour_figure(version, timings_version, branch_filter), use_container_width=True)
     
     # AI Assistant Section with enhanced UI
     st.markdown("---")
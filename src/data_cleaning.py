@@ -1,14 +1,18 @@
 import pandas as pd
 import os
 import json
+import argparse
 from fuzzywuzzy import process
 import re
 
+from src.profiling import profiled, add_profile_arguments, profile_run
+
 # Paths
 RAW_DIR = "data/raw"
 CLEANED_DIR = "data/cleaned"
 REPORT_PATH = "data/cleaned/cleaning_report.json"
 
+@profiled
 def load_data():
     doctors = pd.read_csv(os.path.join(RAW_DIR, "doctors.csv"))
     branches = pd.read_csv(os.path.join(RAW_DIR, "branches.csv"))
@@ -17,6 +21,7 @@ def load_data():
     patients = pd.read_csv(os.path.join(RAW_DIR, "patients.csv"))
     return doctors, branches, diseases, timings, patients
 
+@profiled
 def clean_disease_names(patients_df, diseases_df):
     """Fuzzy match patient disease names to canonical disease names."""
     canonical_diseases = diseases_df['canonical_name'].tolist()
@@ -32,6 +37,7 @@ def clean_disease_names(patients_df, diseases_df):
     patients_df['cleaned_disease_name'] = patients_df['disease_name'].apply(get_canonical)
     return patients_df
 
+@profiled
 def clean_area_names(patients_df, branches_df):
     """Canonicalize area names based on branch coverage."""
     # Create a mapping from area to branch_id/canonical_area
@@ -51,6 +57,7 @@ def clean_area_names(patients_df, branches_df):
     patients_df['area'] = patients_df['area'].str.strip().str.title()
     return patients_df
 
+@profiled
 def main():
     os.makedirs(CLEANED_DIR, exist_ok=True)
     
@@ -82,4 +89,8 @@ def main():
     print("Data cleaning complete. Report saved.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Clean raw help desk data")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profile_run("data_cleaning", args):
+        main()
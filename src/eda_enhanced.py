@@ -1,21 +1,27 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import json
+import hashlib
+import inspect
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 
-# Set beautiful style
-sns.set_style("whitegrid")
-sns.set_palette("husl")
-plt.rcParams['figure.figsize'] = (14, 8)
-plt.rcParams['font.size'] = 11
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
+from src.profiling import profiled, add_profile_arguments, profile_run
 
 # Paths
 CLEANED_DIR = "data/cleaned"
 OUTPUT_DIR = "data/eda_output"
+RENDER_CACHE_PATH = os.path.join(OUTPUT_DIR, ".render_cache.json")
+
+# Render profiles: fast previews while iterating, print quality for reports
+RENDER_PROFILES = {
+    "preview": {"dpi": 100, "bbox_inches": None},
+    "print": {"dpi": 300, "bbox_inches": "tight"}
+}
+DEFAULT_RENDER_PROFILE = "print"
 
 # Beautiful color palettes
 COLORS = {
@@ -26,11 +32,32 @@ COLORS = {
     'gradient': ['#667eea', '#764ba2', '#f093fb', '#4facfe', '#00f2fe']
 }
 
+_plt = None
+
+def _plotting():
+    """Import matplotlib/seaborn on first use (in whichever process renders) and set the beautiful style"""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")  # Non-interactive backend; charts are only ever written to files
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
+        sns.set_style("whitegrid")
+        sns.set_palette("husl")
+        plt.rcParams['figure.figsize'] = (14, 8)
+        plt.rcParams['font.size'] = 11
+        plt.rcParams['axes.titlesize'] = 14
+        plt.rcParams['axes.labelsize'] = 12
+        _plt = plt
+    return _plt
+
 def create_output_dir():
     """Create output directory for visualizations"""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     print(f"✨ Output directory: {OUTPUT_DIR}")
 
+@profiled
 def load_data():
     """Load all cleaned data"""
     print("\n" + "="*70)
@@ -51,18 +78,94 @@ def load_data():
     
     return doctors, branches, diseases, timings, patients
 
-def analyze_disease_trends(patients):
-    """Analyze and visualize disease trends with beautiful colors"""
+@dataclass(frozen=True)
+class EDAAnalysis:
+    """Aggregates computed once from the cleaned data, shared by every EDA output (read-only)"""
+    total_doctors: int
+    total_branches: int
+    total_diseases: int
+    total_timings: int
+    total_patients: int
+    disease_counts: pd.Series
+    doctor_counts: pd.Series
+    doctor_name_counts: pd.Series
+    area_counts: pd.Series
+    branch_counts: pd.Series
+    branch_names: dict
+    doctor_names: dict
+    daily_counts: pd.Series
+
+def _ranked(counts):
+    return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+@profiled
+def build_analysis(doctors, branches, diseases, timings, patients):
+    """Scan the patient table once and derive every aggregate the EDA outputs need"""
+    keys = ['cleaned_disease_name', 'doctor_id', 'area', 'branch_id']
+    frame = patients[keys].copy()
+    if 'visit_timestamp' in patients.columns:
+        frame['visit_day'] = pd.to_datetime(patients['visit_timestamp'], errors='coerce').dt.normalize()
+    else:
+        frame['visit_day'] = pd.NaT
+    
+    # One grouped pass; every other aggregate is a cheap roll-up of this cube
+    cube = frame.groupby(keys + ['visit_day'], dropna=False, sort=False).size()
+    
+    def rollup(level):
+        return _ranked(cube.groupby(level=level).sum())
+    
+    doctor_names = dict(zip(doctors['doctor_id'], doctors['doctor_name']))
+    doctor_counts = rollup('doctor_id')
+    named = doctor_counts[doctor_counts.index.isin(doctor_names.keys())]
+    doctor_name_counts = _ranked(named.groupby(named.index.map(doctor_names)).sum())
+    
+    daily_counts = cube.groupby(level='visit_day').sum().sort_index()
+    
+    return EDAAnalysis(
+        total_doctors=len(doctors),
+        total_branches=len(branches),
+        total_diseases=len(diseases),
+        total_timings=len(timings),
+        total_patients=len(patients),
+        disease_counts=rollup('cleaned_disease_name'),
+        doctor_counts=doctor_counts,
+        doctor_name_counts=doctor_name_counts,
+        area_counts=rollup('area'),
+        branch_counts=rollup('branch_id'),
+        branch_names=dict(zip(branches['branch_id'], branches['branch_name'])),
+        doctor_names=doctor_names,
+        daily_counts=daily_counts
+    )
+
+def _save_figure(fig, path, profile):
+    fig.savefig(path, dpi=profile['dpi'], bbox_inches=profile['bbox_inches'], facecolor='white')
+    _plotting().close(fig)
+
+@profiled
+def analyze_disease_trends(analysis):
+    """Analyze disease trends; returns the chart data"""
     print("\n" + "="*70)
     print("🦠 DISEASE TRENDS ANALYSIS")
     print("="*70)
     
-    disease_counts = patients['cleaned_disease_name'].value_counts()
+    disease_counts = analysis.disease_counts
     
     print(f"\n📈 Total unique diseases: {len(disease_counts)}")
     print(f"\n🔝 Top 10 diseases:")
     for disease, count in disease_counts.head(10).items():
-        print(f"  • {disease}: {count} cases ({count/len(patients)*100:.1f}%)")
+        print(f"  • {disease}: {count} cases ({count/analysis.total_patients*100:.1f}%)")
+    
+    top_15 = disease_counts.head(15)
+    return {
+        "names": top_15.index.tolist(),
+        "counts": [int(c) for c in top_15.values],
+        "other_than_top_5": int(disease_counts[5:].sum())
+    }
+
+def render_disease_trends(data, path, profile):
+    """Render the disease trends dashboard with beautiful colors"""
+    plt = _plotting()
+    top_15 = pd.Series(data["counts"], index=data["names"])
     
     # Create figure with subplots
     fig = plt.figure(figsize=(18, 10))
@@ -70,7 +173,7 @@ def analyze_disease_trends(patients):
     
     # 1. Horizontal bar chart with gradient
     ax1 = fig.add_subplot(gs[0, :])
-    top_10 = disease_counts.head(10)
+    top_10 = top_15.head(10)
     colors_gradient = plt.cm.viridis(np.linspace(0.3, 0.9, len(top_10)))
     bars = ax1.barh(range(len(top_10)), top_10.values, color=colors_gradient, edgecolor='white', linewidth=2)
     ax1.set_yticks(range(len(top_10)))
@@ -86,12 +189,11 @@ def analyze_disease_trends(patients):
     
     # 2. Pie chart with explosion
     ax2 = fig.add_subplot(gs[1, 0])
-    top_5 = disease_counts.head(5)
-    other = disease_counts[5:].sum()
-    pie_data = pd.concat([top_5, pd.Series({'Other': other})])
+    top_5 = top_15.head(5)
+    pie_data = pd.concat([top_5, pd.Series({'Other': data["other_than_top_5"]})])
     
     colors_pie = ['#667eea', '#764ba2', '#f093fb', '#4facfe', '#00f2fe', '#cccccc']
-    explode = [0.05] * 5 + [0]
+    explode = [0.05] * len(top_5) + [0]
     
     wedges, texts, autotexts = ax2.pie(
         pie_data.values,
@@ -112,7 +214,6 @@ def analyze_disease_trends(patients):
     
     # 3. Treemap-style visualization
     ax3 = fig.add_subplot(gs[1, 1])
-    top_15 = disease_counts.head(15)
     
     # Create a simple treemap effect with bars
     colors_treemap = plt.cm.plasma(np.linspace(0.2, 0.9, len(top_15)))
@@ -124,18 +225,16 @@ def analyze_disease_trends(patients):
     ax3.grid(axis='y', alpha=0.3, linestyle='--')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'disease_trends_enhanced.png'), dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"\n✅ Saved: disease_trends_enhanced.png")
-    plt.close()
+    _save_figure(fig, path, profile)
 
-def analyze_doctor_workload(patients, doctors):
-    """Analyze doctor workload with stunning visualizations"""
+@profiled
+def analyze_doctor_workload(analysis):
+    """Analyze doctor workload; returns the chart data"""
     print("\n" + "="*70)
     print("👨‍⚕️ DOCTOR WORKLOAD ANALYSIS")
     print("="*70)
     
-    patient_doctor = patients.merge(doctors, on='doctor_id', how='left')
-    workload = patient_doctor['doctor_name'].value_counts()
+    workload = analysis.doctor_name_counts
     
     print(f"\n📊 Average patients per doctor: {workload.mean():.1f}")
     print(f"📈 Max workload: {workload.max()} patients")
@@ -145,6 +244,16 @@ def analyze_doctor_workload(patients, doctors):
     for doctor, count in workload.head(10).items():
         print(f"  • {doctor}: {count} patients")
     
+    return {
+        "names": workload.index.tolist(),
+        "counts": [int(c) for c in workload.values]
+    }
+
+def render_doctor_workload(data, path, profile):
+    """Render the doctor workload dashboard with stunning visualizations"""
+    plt = _plotting()
+    workload = pd.Series(data["counts"], index=data["names"])
+    
     # Create beautiful visualization
     fig, axes = plt.subplots(2, 2, figsize=(18, 12))
     fig.suptitle('👨‍⚕️ Doctor Workload Analysis Dashboard', fontsize=20, fontweight='bold', y=0.995)
@@ -211,23 +320,35 @@ def analyze_doctor_workload(patients, doctors):
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'doctor_workload_enhanced.png'), dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"\n✅ Saved: doctor_workload_enhanced.png")
-    plt.close()
+    _save_figure(fig, path, profile)
 
-def analyze_geographic_distribution(patients, branches):
-    """Analyze geographic distribution with beautiful maps"""
+@profiled
+def analyze_geographic_distribution(analysis):
+    """Analyze geographic distribution; returns the chart data"""
     print("\n" + "="*70)
     print("🗺️ GEOGRAPHIC DISTRIBUTION ANALYSIS")
     print("="*70)
     
-    area_counts = patients['area'].value_counts()
+    area_counts = analysis.area_counts
     
     print(f"\n🌍 Total areas served: {len(area_counts)}")
     print(f"\n🔝 Top 10 areas by patient volume:")
     for area, count in area_counts.head(10).items():
         print(f"  • {area}: {count} patients")
     
+    top_20 = area_counts.head(20)
+    return {
+        "areas": top_20.index.tolist(),
+        "area_counts": [int(c) for c in top_20.values],
+        "branch_names": [str(analysis.branch_names.get(b, np.nan)) for b in analysis.branch_counts.index],
+        "branch_counts": [int(c) for c in analysis.branch_counts.values]
+    }
+
+def render_geographic_distribution(data, path, profile):
+    """Render the geographic distribution dashboard with beautiful maps"""
+    plt = _plotting()
+    area_counts = pd.Series(data["area_counts"], index=data["areas"])
+    
     # Create visualization
     fig = plt.figure(figsize=(18, 12))
     fig.suptitle('🗺️ Geographic Distribution Dashboard', fontsize=20, fontweight='bold', y=0.995)
@@ -252,15 +373,13 @@ def analyze_geographic_distribution(patients, branches):
     
     # 2. Branch distribution - pie chart
     ax2 = fig.add_subplot(gs[0, 1])
-    branch_counts = patients['branch_id'].value_counts()
-    branch_merged = branch_counts.to_frame('count').join(branches.set_index('branch_id')['branch_name'])
     
     colors_pie = ['#667eea', '#764ba2', '#f093fb', '#4facfe']
-    explode = [0.05] * len(branch_merged)
+    explode = [0.05] * len(data["branch_counts"])
     
     wedges, texts, autotexts = ax2.pie(
-        branch_merged['count'].values,
-        labels=branch_merged['branch_name'].values,
+        data["branch_counts"],
+        labels=data["branch_names"],
         autopct='%1.1f%%',
         startangle=90,
         colors=colors_pie,
@@ -287,11 +406,71 @@ def analyze_geographic_distribution(patients, branches):
     ax3.grid(axis='y', alpha=0.3, linestyle='--')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'geographic_distribution_enhanced.png'), dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"\n✅ Saved: geographic_distribution_enhanced.png")
-    plt.close()
+    _save_figure(fig, path, profile)
+
+CHART_RENDERERS = {
+    'disease_trends_enhanced.png': render_disease_trends,
+    'doctor_workload_enhanced.png': render_doctor_workload,
+    'geographic_distribution_enhanced.png': render_geographic_distribution
+}
+
+def _chart_hash(filename, data, profile_name):
+    """Hash of the aggregated data, render profile and renderer code behind one chart"""
+    payload = json.dumps({
+        "data": data,
+        "profile": RENDER_PROFILES[profile_name],
+        "renderer": inspect.getsource(CHART_RENDERERS[filename])
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
-def generate_summary_report(doctors, branches, diseases, timings, patients):
+def _render_chart(filename, data, profile_name):
+    """Worker entry point: render one chart to OUTPUT_DIR"""
+    CHART_RENDERERS[filename](data, os.path.join(OUTPUT_DIR, filename), RENDER_PROFILES[profile_name])
+    return filename
+
+@profiled
+def render_charts(chart_data, profile_name=DEFAULT_RENDER_PROFILE, workers=None, force=False):
+    """Render charts in a process pool, skipping charts whose inputs are unchanged"""
+    print("\n" + "="*70)
+    print(f"🎨 RENDERING CHARTS ({profile_name} profile)")
+    print("="*70)
+    
+    cache = {}
+    if os.path.exists(RENDER_CACHE_PATH):
+        try:
+            with open(RENDER_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except Exception:
+            cache = {}
+    
+    hashes = {name: _chart_hash(name, data, profile_name) for name, data in chart_data.items()}
+    todo = [
+        name for name in chart_data
+        if force or cache.get(name) != hashes[name] or not os.path.exists(os.path.join(OUTPUT_DIR, name))
+    ]
+    for name in chart_data:
+        if name not in todo:
+            print(f"⏭️ Unchanged: {name}")
+    
+    workers = workers or min(len(todo), os.cpu_count() or 1)
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_render_chart, name, chart_data[name], profile_name) for name in todo]
+            for future in futures:
+                name = future.result()
+                cache[name] = hashes[name]
+                print(f"✅ Saved: {name}")
+    else:
+        for name in todo:
+            _render_chart(name, chart_data[name], profile_name)
+            cache[name] = hashes[name]
+            print(f"✅ Saved: {name}")
+    
+    with open(RENDER_CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+@profiled
+def generate_summary_report(analysis):
     """Generate enhanced summary report"""
     print("\n" + "="*70)
     print("📝 GENERATING ENHANCED SUMMARY REPORT")
@@ -305,28 +484,28 @@ def generate_summary_report(doctors, branches, diseases, timings, patients):
     report.append("\n" + "-"*80)
     report.append("📊 DATASET OVERVIEW")
     report.append("-"*80)
-    report.append(f"👨‍⚕️ Total Doctors: {len(doctors)}")
-    report.append(f"🏥 Total Branches: {len(branches)}")
-    report.append(f"🦠 Total Diseases: {len(diseases)}")
-    report.append(f"📅 Total Timings: {len(timings)}")
-    report.append(f"👥 Total Patients: {len(patients)}")
+    report.append(f"👨‍⚕️ Total Doctors: {analysis.total_doctors}")
+    report.append(f"🏥 Total Branches: {analysis.total_branches}")
+    report.append(f"🦠 Total Diseases: {analysis.total_diseases}")
+    report.append(f"📅 Total Timings: {analysis.total_timings}")
+    report.append(f"👥 Total Patients: {analysis.total_patients}")
     
     report.append("\n" + "-"*80)
     report.append("📈 KEY STATISTICS")
     report.append("-"*80)
     
     # Disease stats
-    disease_counts = patients['cleaned_disease_name'].value_counts()
+    disease_counts = analysis.disease_counts
     report.append(f"\n🦠 Most common disease: {disease_counts.index[0]} ({disease_counts.iloc[0]} cases)")
     report.append(f"🦠 Unique diseases treated: {len(disease_counts)}")
     
     # Doctor stats
-    workload = patients['doctor_id'].value_counts()
+    workload = analysis.doctor_counts
     report.append(f"\n👨‍⚕️ Average patients per doctor: {workload.mean():.1f}")
     report.append(f"👨‍⚕️ Busiest doctor: {workload.index[0]} ({workload.iloc[0]} patients)")
     
     # Geographic stats
-    area_counts = patients['area'].value_counts()
+    area_counts = analysis.area_counts
     report.append(f"\n🗺️ Areas served: {len(area_counts)}")
     report.append(f"🗺️ Most served area: {area_counts.index[0]} ({area_counts.iloc[0]} patients)")
     
@@ -350,7 +529,8 @@ def generate_summary_report(doctors, branches, diseases, timings, patients):
     print(report_text)
     print(f"\n✅ Saved: eda_enhanced_summary.txt")
 
-def generate_kb_insights(doctors, branches, diseases, timings, patients):
+@profiled
+def generate_kb_insights(analysis):
     """Generate detailed analytics insights for the Knowledge Base"""
     print("\n" + "="*70)
     print("🧠 GENERATING KNOWLEDGE BASE INSIGHTS")
@@ -365,7 +545,7 @@ def generate_kb_insights(doctors, branches, diseases, timings, patients):
         f.write("This document contains interpretations of the analytics visualizations generated by the system. Use this to explain graphs and trends to the admin.\n\n")
         
         # 1. Disease Trends
-        disease_counts = patients['cleaned_disease_name'].value_counts()
+        disease_counts = analysis.disease_counts
         top_disease = disease_counts.index[0]
         top_count = disease_counts.iloc[0]
         
@@ -385,11 +565,10 @@ def generate_kb_insights(doctors, branches, diseases, timings, patients):
         f.write(f"The top 5 diseases account for a significant portion of the total cases, highlighting the need to focus resources on these specific treatments.\n\n")
 
         # 2. Doctor Workload
-        workload = patients['doctor_id'].value_counts()
+        workload = analysis.doctor_counts
         avg_load = workload.mean()
         busiest_doc_id = workload.index[0]
-        # Try to get doctor name
-        busiest_doc_name = doctors[doctors['doctor_id'] == busiest_doc_id]['doctor_name'].iloc[0] if not doctors[doctors['doctor_id'] == busiest_doc_id].empty else busiest_doc_id
+        busiest_doc_name = analysis.doctor_names.get(busiest_doc_id, busiest_doc_id)
         
         f.write("## Doctor Workload Analysis\n")
         f.write("### Overview\n")
@@ -402,7 +581,7 @@ def generate_kb_insights(doctors, branches, diseases, timings, patients):
         f.write("The histogram and box plot show the spread of workload across all doctors, indicating whether the load is balanced or skewed.\n\n")
         
         # 3. Geographic Distribution
-        area_counts = patients['area'].value_counts()
+        area_counts = analysis.area_counts
         top_area = area_counts.index[0]
         
         f.write("## Geographic Distribution Analysis\n")
@@ -416,21 +595,20 @@ def generate_kb_insights(doctors, branches, diseases, timings, patients):
         f.write("The 'Patient Distribution by Branch' pie chart shows how patients are distributed across the different medical centers.\n\n")
         
         # 4. Temporal Trends (if available)
-        if 'visit_timestamp' in patients.columns:
-            patients['visit_date'] = pd.to_datetime(patients['visit_timestamp'], errors='coerce')
-            daily_counts = patients.groupby(patients['visit_date'].dt.date).size()
-            if not daily_counts.empty:
-                peak_day = daily_counts.idxmax()
-                peak_count = daily_counts.max()
-                f.write("## Temporal Trends Analysis\n")
-                f.write("### Patient Visits Over Time\n")
-                f.write(f"The 'Patient Visits Over Time' line graph tracks the daily number of visits. ")
-                f.write(f"The peak traffic was recorded on **{peak_day}** with {peak_count} visits. ")
-                f.write("Monitoring these trends helps in staff scheduling and resource allocation.\n\n")
+        daily_counts = analysis.daily_counts
+        if not daily_counts.empty:
+            peak_day = daily_counts.idxmax().date()
+            peak_count = daily_counts.max()
+            f.write("## Temporal Trends Analysis\n")
+            f.write("### Patient Visits Over Time\n")
+            f.write(f"The 'Patient Visits Over Time' line graph tracks the daily number of visits. ")
+            f.write(f"The peak traffic was recorded on **{peak_day}** with {peak_count} visits. ")
+            f.write("Monitoring these trends helps in staff scheduling and resource allocation.\n\n")
 
     print(f"✅ Saved: {kb_path}")
 
-def main():
+@profiled
+def main(render_profile=DEFAULT_RENDER_PROFILE, workers=None, force_render=False):
     """Main EDA function"""
     print("\n" + "="*80)
     print("✨ SAYLANI MEDICAL HELP DESK - ENHANCED EXPLORATORY DATA ANALYSIS ✨")
@@ -441,16 +619,22 @@ def main():
     # Load data
     doctors, branches, diseases, timings, patients = load_data()
     
-    # Run analyses with enhanced visualizations
-    analyze_disease_trends(patients)
-    analyze_doctor_workload(patients, doctors)
-    analyze_geographic_distribution(patients, branches)
+    # Compute every aggregate in one pass over the patient table
+    analysis = build_analysis(doctors, branches, diseases, timings, patients)
+    
+    # Run analyses, then render the enhanced visualizations in parallel
+    chart_data = {
+        'disease_trends_enhanced.png': analyze_disease_trends(analysis),
+        'doctor_workload_enhanced.png': analyze_doctor_workload(analysis),
+        'geographic_distribution_enhanced.png': analyze_geographic_distribution(analysis)
+    }
+    render_charts(chart_data, render_profile, workers, force_render)
     
     # Generate summary
-    generate_summary_report(doctors, branches, diseases, timings, patients)
+    generate_summary_report(analysis)
     
     # Generate Knowledge Base Insights
-    generate_kb_insights(doctors, branches, diseases, timings, patients)
+    generate_kb_insights(analysis)
     
     print("\n" + "="*80)
     print("🎉 ENHANCED EDA COMPLETE!")
@@ -465,4 +649,12 @@ def main():
     print()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the enhanced EDA and render charts")
+    parser.add_argument("--render-profile", choices=sorted(RENDER_PROFILES), default=DEFAULT_RENDER_PROFILE,
+                        help="Chart resolution profile: fast preview or print quality")
+    parser.add_argument("--workers", type=int, default=None, help="Chart rendering processes")
+    parser.add_argument("--force-render", action="store_true", help="Re-render charts even if their data is unchanged")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profile_run("eda_enhanced", args):
+        main(args.render_profile, args.workers, args.force_render)
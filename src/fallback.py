@@ -0,0 +1,330 @@
+"""
+Structured Fallback Answers
+Answers analytics questions straight from the KB sections and tables, without an LLM
+- Rankings ("top 5 diseases", "least busy branch"), counts ("how many doctors"),
+  comparisons ("dengue vs malaria") and shares ("what % of visits are in Gulshan")
+- Topic summaries for utilization, forecasts, alerts and time windows
+- Name lookups are built once per KB, so answering is a few dict and substring checks
+"""
+import re
+
+FOOTER = "\n\n---\n*Extracted from Analytics Knowledge Base*\n"
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20}
+
+# Dimension -> (words that name it, unit counted, display title)
+DIMENSIONS = {
+    "disease": (("disease", "illness", "condition", "diagnos", "common", "prevalent"), "cases", "Diseases"),
+    "doctor": (("doctor", "physician", "staff", "dr "), "patients", "Doctors"),
+    "specialty": (("specialty", "specialties", "speciality", "department"), "patients", "Specialties"),
+    "branch": (("branch", "clinic", "centre", "center"), "patients", "Branches"),
+    "area": (("area", "location", "neighbourhood", "neighborhood", "region", "where"), "patients", "Areas"),
+}
+ASCENDING_WORDS = ("least", "lowest", "fewest", "bottom", "minimum", "quietest", "rarest", "smallest")
+RANKING_WORDS = ("top", "most", "highest", "busiest", "common", "prevalent", "rank", "largest", "biggest", "which") + ASCENDING_WORDS
+COUNT_WORDS = ("how many", "number of", "count", "total")
+SHARE_WORDS = ("percent", "%", "share", "proportion", "fraction", "ratio")
+COMPARE_WORDS = ("compare", "comparison", " vs ", " versus ", "difference between", "more than", "less than")
+# Splits "X vs Y" / "compare X with Y" into its two sides, and the words that name neither side
+COMPARE_SPLIT = re.compile(r" (?:vs|versus|and|with|to|than) ")
+FILLER_WORDS = {"compare", "comparison", "difference", "between", "how", "does", "do", "is", "are", "the", "of",
+                "in", "many", "number", "more", "less", "cases", "case", "patients", "patient", "visits", "visit"}
+
+# Topics answered from their own KB section: (keywords, KB query method, title, emoji)
+TOPICS = [
+    (("utilization", "utilisation", "capacity", "idle", "overbook", "schedule"), "query_doctor_utilization", "Doctor Utilization", "⏱️"),
+    (("forecast", "predict", "expect", "upcoming", "next week", "staffing"), "query_forecast", "Visit Forecast", "🔮"),
+    (("alert", "anomal", "surge", "spike", "outbreak", "unusual"), "query_alerts", "Surge and Anomaly Alerts", "🚨"),
+    (("peak day", "busiest day", "daily", "per day"), "query_temporal_patterns", "Visit Patterns", "📈"),
+    (("month", "week", "recent", "last", "period", "over time"), "query_time_windows", "Time Window Analysis", "📅"),
+]
+
+
+def _norm(text):
+    """Lowercase words separated by single spaces, padded so ' word ' matches whole words"""
+    return " " + re.sub(r"[^a-z0-9%]+", " ", text.lower()).strip() + " "
+
+
+def _pct(part, whole):
+    return round(part / whole * 100, 2) if whole else 0.0
+
+
+class FallbackEngine:
+    def __init__(self, kb):
+        self.kb = kb
+        self._index = None
+
+    # -------------------------------------
+    # INDEX (built once per KB)
+    # -------------------------------------
+    def _rows(self, table, columns, fallback_rows, fallback_keys):
+        """Full ranking from the binary KB table if present, else the JSON top-10 list"""
+        data = self.kb.table(table)
+        if data:
+            return [dict(zip(columns, values)) for values in zip(*(data[c].tolist() for c in columns))], True
+        return [dict(zip(columns, (row.get(k) for k in fallback_keys))) for row in fallback_rows], False
+
+    def _build_index(self):
+        diseases = self.kb.query_disease_trends()
+        workload = self.kb.query_doctor_workload()
+        geo = self.kb.query_geographic_distribution()
+        summary = self.kb.query_summary()
+        entities = self.kb.query_entities()
+        total = summary.get('total_patients') or diseases.get('overview', {}).get('total_cases', 0)
+
+        rankings, complete = {}, {}
+        rows, complete["disease"] = self._rows(
+            "disease_rankings", ("disease_name", "case_count"),
+            diseases.get('top_10_diseases', []), ("disease_name", "case_count"))
+        rankings["disease"] = [{"name": r["disease_name"], "count": r["case_count"]} for r in rows]
+
+        rows, complete["doctor"] = self._rows(
+            "doctor_rankings", ("doctor_name", "specialty", "patient_count"),
+            workload.get('top_10_busiest_doctors', []), ("doctor_name", "specialty", "patient_count"))
+        rankings["doctor"] = [{"name": r["doctor_name"], "count": r["patient_count"], "specialty": r["specialty"]} for r in rows]
+        complete["doctor"] = complete["doctor"] or len(rows) >= summary.get('total_doctors', len(rows) + 1)
+
+        rows, complete["area"] = self._rows(
+            "area_rankings", ("area_name", "patient_count"),
+            geo.get('top_10_areas', []), ("area_name", "patient_count"))
+        rankings["area"] = [{"name": r["area_name"], "count": r["patient_count"]} for r in rows]
+
+        branch_names = {b['branch_id']: b['branch_name'] for b in entities.get('branches', [])}
+        rankings["branch"] = [
+            {"name": branch_names.get(b['branch_id'], b['branch_id']), "count": b['patient_count']}
+            for b in geo.get('branch_distribution', [])
+        ]
+        complete["branch"] = True
+
+        specialties = {}
+        for doc in rankings["doctor"]:
+            specialties[doc["specialty"]] = specialties.get(doc["specialty"], 0) + doc["count"]
+        rankings["specialty"] = [{"name": name, "count": count} for name, count in specialties.items()]
+        complete["specialty"] = complete["doctor"]
+
+        for dim, rows in rankings.items():
+            rows.sort(key=lambda r: -r["count"])
+            for rank, row in enumerate(rows, 1):
+                row["rank"] = rank
+                row["percentage"] = _pct(row["count"], total)
+
+        totals = {
+            "disease": diseases.get('overview', {}).get('total_unique_diseases', len(rankings["disease"])),
+            "doctor": summary.get('total_doctors', len(rankings["doctor"])),
+            "branch": summary.get('total_branches', len(rankings["branch"])),
+            "area": geo.get('overview', {}).get('total_areas_served', len(rankings["area"])),
+            "specialty": len(rankings["specialty"]),
+        }
+
+        # alias (normalized) -> [(dimension, row)], longest aliases first
+        aliases = {}
+        for dim, rows in rankings.items():
+            for row in rows:
+                for alias in self._aliases(dim, row["name"]):
+                    aliases.setdefault(alias, []).append((dim, row))
+        alias_list = sorted(aliases.items(), key=lambda item: -len(item[0]))
+
+        self._index = {"total": total, "rankings": rankings, "complete": complete, "totals": totals,
+                       "aliases": alias_list, "summary": summary}
+        return self._index
+
+    @staticmethod
+    def _aliases(dim, name):
+        full = _norm(str(name))
+        names = {full}
+        words = full.split()
+        if dim == "doctor" and words and words[0] in ("dr", "doctor"):
+            names.add(_norm(" ".join(words[1:])))
+        if dim == "branch":
+            short = [w for w in words if w not in ("saylani", "branch", "medical", "help", "desk")]
+            if short:
+                names.add(_norm(" ".join(short)))
+        return [n for n in names if n.strip()]
+
+    @property
+    def index(self):
+        return self._index or self._build_index()
+
+    # -------------------------------------
+    # QUERY PARSING
+    # -------------------------------------
+    @staticmethod
+    def _dimension(q):
+        for dim, (words, _, _) in DIMENSIONS.items():
+            if any(w in q for w in words):
+                return dim
+        return None
+
+    @staticmethod
+    def _limit(q, default=5):
+        match = re.search(r" (?:top|bottom|first|least|most|lowest|highest)? ?(\d{1,3}|" + "|".join(NUMBER_WORDS) + r") ", q)
+        if not match:
+            return default
+        value = match.group(1)
+        return max(1, min(int(value) if value.isdigit() else NUMBER_WORDS[value], 50))
+
+    def _entities(self, q, preferred=None):
+        """Named diseases/doctors/areas/branches in the query, in order of appearance"""
+        found, taken = [], []
+        for alias, candidates in self.index["aliases"]:
+            pos = q.find(alias)
+            if pos == -1 or any(start <= pos < end for start, end in taken):
+                continue
+            taken.append((pos, pos + len(alias)))
+            dim, row = next(((d, r) for d, r in candidates if d == preferred), candidates[0])
+            if all(r is not row for _, r, _ in found):
+                found.append((dim, row, pos))
+        return [(dim, row) for dim, row, _ in sorted(found, key=lambda f: f[2])]
+
+    # -------------------------------------
+    # ANSWERS
+    # -------------------------------------
+    def answer(self, query):
+        """Templated answer for an analytics question, or None if it cannot be matched"""
+        q = _norm(query)
+        for words, method, title, emoji in TOPICS:
+            if any(w in q for w in words):
+                text = self._topic(method, title, emoji)
+                if text:
+                    return text
+
+        dim = self._dimension(q)
+        entities = self._entities(q, preferred=dim)
+
+        if entities and any(w in q for w in SHARE_WORDS):
+            return self._share(entities)
+        if len(entities) >= 2:
+            return self._compare(entities)
+        if entities and any(w in q for w in COMPARE_WORDS):
+            missing = self._unmatched_side(q)
+            if missing:
+                return self._not_found(missing, entities)
+            # "How does Dengue compare?": benchmark against the leader
+            return self._compare(entities + [self._leader(*entities[0])])
+        if any(w in q for w in COUNT_WORDS):
+            return self._count(entities, dim, q)
+        if dim and any(w in q for w in RANKING_WORDS + SHARE_WORDS):
+            return self._ranking(dim, self._limit(q), any(w in q for w in ASCENDING_WORDS))
+        if entities:
+            return self._count(entities, dim, q)
+        if dim:
+            return self._ranking(dim, self._limit(q), any(w in q for w in ASCENDING_WORDS))
+        if any(w in q for w in ("summary", "overview", "dashboard", "analytics", "insight")):
+            return self._summary()
+        return None
+
+    def _ranking(self, dim, limit, ascending):
+        rows = self.index["rankings"][dim]
+        if not rows:
+            return None
+        unit, title = DIMENSIONS[dim][1], DIMENSIONS[dim][2]
+        complete = self.index["complete"][dim]
+        if ascending and not complete:
+            note = f"\n\n*Only the top {len(rows)} {title.lower()} are in the knowledge base; these are the least busy among them.*"
+        else:
+            note = ""
+        ordered = list(reversed(rows)) if ascending else rows
+        lines = [f"- **{r['name']}**: {r['count']:,} {unit} ({r['percentage']}%)"
+                 + (f" — {r['specialty']}" if dim == "doctor" else "")
+                 for r in ordered[:limit]]
+        head = ordered[0]
+        word = "Fewest" if ascending else "Most"
+        return (f"📊 **{'Bottom' if ascending else 'Top'} {min(limit, len(rows))} {title} by {unit}**\n\n"
+                + "\n".join(lines)
+                + f"\n\n{word} {unit}: **{head['name']}** with {head['count']:,} ({head['percentage']}% of all visits)."
+                + note + FOOTER)
+
+    def _unmatched_side(self, q):
+        """The side of an 'X vs Y' question that names nothing in the KB (None unless exactly one side resolves)"""
+        parts = COMPARE_SPLIT.split(q, maxsplit=1)
+        if len(parts) != 2:
+            return None
+        sides = [f" {part.strip()} " for part in parts]
+        resolved = [bool(self._entities(side)) for side in sides]
+        if resolved.count(True) != 1:
+            return None
+        words = [w for w in sides[resolved.index(False)].split() if w not in FILLER_WORDS]
+        return " ".join(words) or None
+
+    def _not_found(self, name, entities):
+        dim, row = entities[0]
+        rows = self.index["rankings"][dim]
+        note = "" if self.index["complete"][dim] else f" (it only lists the top {len(rows)} {DIMENSIONS[dim][2].lower()})"
+        return (f"⚖️ **Comparison**\n\n**{name.title()}** is not in the knowledge base{note}, so it cannot be compared.\n\n"
+                f"- **{row['name']}** ({dim}): {row['count']:,} {DIMENSIONS[dim][1]} ({row['percentage']}%, rank {row['rank']})"
+                + FOOTER)
+
+    def _leader(self, dim, row):
+        """Benchmark for a one-entity comparison: the top of its ranking (or the runner-up if it is the top)"""
+        rows = self.index["rankings"][dim]
+        return dim, rows[1] if rows[0] is row and len(rows) > 1 else rows[0]
+
+    def _count(self, entities, dim, q):
+        index = self.index
+        if entities:
+            lines = [f"- **{row['name']}** ({d}): {row['count']:,} {DIMENSIONS[d][1]} "
+                     f"({row['percentage']}% of {index['total']:,} visits, rank {row['rank']})"
+                     for d, row in entities]
+            return "🔢 **Counts**\n\n" + "\n".join(lines) + FOOTER
+        if dim:
+            total = index["totals"][dim]
+            return (f"🔢 **{DIMENSIONS[dim][2]}**\n\nThere are **{total:,} {DIMENSIONS[dim][2].lower()}** in the data "
+                    f"across {index['total']:,} patient visits." + FOOTER)
+        if any(w in q for w in ("patient", "visit", "case")):
+            return f"🔢 **Patient Visits**\n\nThe knowledge base records **{index['total']:,} patient visits**." + FOOTER
+        return None
+
+    def _share(self, entities):
+        total = self.index["total"]
+        lines = [f"- **{row['name']}** accounts for **{row['percentage']}%** of all visits "
+                 f"({row['count']:,} of {total:,} {DIMENSIONS[d][1]})" for d, row in entities]
+        return "🥧 **Share of Visits**\n\n" + "\n".join(lines) + FOOTER
+
+    def _compare(self, entities):
+        entities = entities[:5]
+        lines = [f"- **{row['name']}** ({d}): {row['count']:,} {DIMENSIONS[d][1]} ({row['percentage']}%, rank {row['rank']})"
+                 for d, row in entities]
+        ordered = sorted(entities, key=lambda e: -e[1]["count"])
+        (_, first), (_, second) = ordered[0], ordered[1]
+        diff = first["count"] - second["count"]
+        ratio = f"{first['count'] / second['count']:.2f}x" if second["count"] else "n/a"
+        return ("⚖️ **Comparison**\n\n" + "\n".join(lines)
+                + f"\n\n**{first['name']}** has {diff:,} more than **{second['name']}** ({ratio})." + FOOTER)
+
+    def _topic(self, method, title, emoji):
+        data = getattr(self.kb, method)()
+        interpretation = data.get('interpretation') if data else None
+        if not interpretation:
+            return None
+        lines = []
+        if method == "query_doctor_utilization":
+            for doc in data.get('most_utilized_doctors', [])[:5]:
+                lines.append(f"- **{doc['name']}**: {doc['utilization_pct']}% of {doc['capacity_visits']:,} capacity, "
+                             f"{doc['overbooked_hours']} overbooked hours")
+        elif method == "query_forecast":
+            for dim, rows in data.get('dimensions', {}).items():
+                for row in rows[:3]:
+                    lines.append(f"- **{row['name']}** ({dim}): {row['next_7_days']:,} visits expected in the next 7 days "
+                                 f"(last 7 days: {row['last_7_days']:,})")
+        elif method == "query_alerts":
+            for alert in data.get('episodes', [])[:5]:
+                lines.append(f"- {alert['direction'].title()} in **{alert['name']}** ({alert['dimension']}): "
+                             f"{alert['start']} to {alert['end']}, peak {alert['peak_value']} vs baseline {alert['peak_baseline']}")
+        elif method == "query_time_windows":
+            for label, window in data.get('rolling', {}).items():
+                total = next(iter(window['dimensions'].values()))['total']
+                change = total['change_pct']
+                lines.append(f"- Last {label[:-1]} days: **{total['current']:,}** visits vs {total['previous']:,} before"
+                             + (f" ({change:+.2f}%)" if change is not None else ""))
+        body = "\n".join(lines)
+        return f"{emoji} **{title}**\n\n{interpretation}" + (f"\n\n{body}" if body else "") + FOOTER
+
+    def _summary(self):
+        summary = self.index["summary"]
+        insights = "\n".join(f"- {line}" for line in summary.get('key_insights', []))
+        return (f"📊 **Overall Analytics Summary**\n\n"
+                f"- Total patients: **{summary.get('total_patients', 0):,}**\n"
+                f"- Doctors: **{summary.get('total_doctors', 0)}**, branches: **{summary.get('total_branches', 0)}**, "
+                f"diseases recorded: **{summary.get('total_diseases_recorded', 0)}**\n"
+                + insights + FOOTER)
@@ -4,12 +4,164 @@ Loads and queries structured JSON knowledge base
 """
 import json
 import os
+from datetime import datetime
 from pathlib import Path
 
+from src.kb_store import KBStore, read_meta, source_version, write_store
+
+# Top-level KB keys whose children are stored as separate sections in the shared store
+SPLIT_SECTIONS = ("analytics",)
+
+
+def _format_change(pct):
+    return f"{pct:+.2f}%" if pct is not None else "n/a"
+
+
+def format_context(kb_data):
+    """Format the KB as text for LLM context"""
+    if not kb_data:
+        return "Knowledge base is empty or not loaded."
+    
+    context = []
+    
+    # Add summary
+    context.append("=== ANALYTICS SUMMARY ===")
+    summary = kb_data.get('summary', {})
+    for key, value in summary.items():
+        if key == 'key_insights':
+            context.append("\nKey Insights:")
+            for insight in value:
+                context.append(f"  • {insight}")
+        else:
+            context.append(f"{key.replace('_', ' ').title()}: {value}")
+    
+    # Add disease trends
+    context.append("\n=== DISEASE TRENDS ===")
+    disease_trends = kb_data.get('analytics', {}).get('disease_trends', {})
+    context.append(f"Interpretation: {disease_trends.get('interpretation', '')}")
+    context.append("\nTop 10 Diseases:")
+    for disease in disease_trends.get('top_10_diseases', []):
+        context.append(f"  {disease['rank']}. {disease['disease_name']}: {disease['case_count']} cases ({disease['percentage']}%)")
+    
+    # Add doctor workload
+    context.append("\n=== DOCTOR WORKLOAD ===")
+    workload = kb_data.get('analytics', {}).get('doctor_workload', {})
+    context.append(f"Interpretation: {workload.get('interpretation', '')}")
+    context.append("\nTop 10 Busiest Doctors:")
+    for doc in workload.get('top_10_busiest_doctors', []):
+        context.append(f"  {doc['rank']}. Dr. {doc['doctor_name']} ({doc['specialty']}): {doc['patient_count']} patients")
+    
+    # Add doctor utilization
+    utilization = kb_data.get('analytics', {}).get('doctor_utilization', {})
+    if utilization.get('most_utilized_doctors') is not None:
+        context.append("\n=== DOCTOR UTILIZATION ===")
+        context.append(f"Interpretation: {utilization.get('interpretation', '')}")
+        context.append("\nMost Utilized Doctors:")
+        for doc in utilization['most_utilized_doctors'][:5]:
+            context.append(f"  {doc['name']}: {doc['utilization_pct']}% of {doc['capacity_visits']} capacity, {doc['overbooked_hours']} overbooked hours")
+        context.append("\nBranch Utilization:")
+        for branch in utilization.get('branches', []):
+            context.append(f"  {branch['name']}: {branch['utilization_pct']}%, idle capacity {branch['idle_capacity_visits']} visits")
+    
+    # Add time windows
+    windows = kb_data.get('analytics', {}).get('time_windows', {})
+    if windows.get('rolling'):
+        context.append("\n=== TIME WINDOWS ===")
+        context.append(f"Interpretation: {windows.get('interpretation', '')}")
+        for label, window in windows['rolling'].items():
+            total = next(iter(window['dimensions'].values()))['total']
+            start, end = window['current_period']
+            context.append(f"  Last {label[:-1]} days ({start} to {end}): {total['current']} visits vs {total['previous']} in the previous {label[:-1]} days ({_format_change(total['change_pct'])})")
+        mom = windows['month_over_month']
+        context.append(f"\nMonth over Month ({mom['current_month']} vs {mom['previous_month']}, {mom['comparison'].replace('_', ' ')}):")
+        for dim, data in mom['dimensions'].items():
+            leaders = ", ".join(f"{d['name']} {d['current']} ({_format_change(d['change_pct'])})" for d in data['top'][:3])
+            context.append(f"  {dim.title()}: {data['total']['current']} vs {data['total']['previous']} visits; top: {leaders}")
+    
+    # Add alerts
+    alerts = kb_data.get('analytics', {}).get('alerts', {})
+    if alerts.get('method'):
+        context.append("\n=== ALERTS ===")
+        context.append(f"Interpretation: {alerts.get('interpretation', '')}")
+        context.append("\nRecent Surges and Drops (7-day visits vs EWMA baseline):")
+        for alert in alerts.get('episodes', [])[:8]:
+            context.append(f"  {alert['direction'].title()} in {alert['dimension']} {alert['name']}: {alert['start']} to {alert['end']}, "
+                           f"peak {alert['peak_value']} vs baseline {alert['peak_baseline']} on {alert['peak_date']} (z={alert['peak_z']})")
+    
+    # Add forecast
+    forecast = kb_data.get('analytics', {}).get('forecast', {})
+    if forecast.get('dimensions'):
+        context.append("\n=== FORECAST ===")
+        context.append(f"Interpretation: {forecast.get('interpretation', '')}")
+        for dim, rows in forecast['dimensions'].items():
+            context.append(f"\nExpected Visits by {dim.title()} (next 7 / 14 days, last 7 days actual):")
+            for row in rows[:8]:
+                context.append(f"  {row['name']}: {row['next_7_days']} / {row['next_14_days']} (last 7 days: {row['last_7_days']})")
+    
+    # Add geographic distribution
+    context.append("\n=== GEOGRAPHIC DISTRIBUTION ===")
+    geo = kb_data.get('analytics', {}).get('geographic_distribution', {})
+    context.append(f"Interpretation: {geo.get('interpretation', '')}")
+    context.append("\nTop 10 Areas:")
+    for area in geo.get('top_10_areas', []):
+        context.append(f"  {area['rank']}. {area['area_name']}: {area['patient_count']} patients ({area['percentage']}%)")
+    
+    return "\n".join(context)
+
+
+def _column_array(values):
+    """Numpy column for the binary KB; text becomes fixed-width unicode so it can be mapped"""
+    import numpy as np
+
+    column = np.asarray(values)
+    if column.dtype == object:
+        column = column.astype(str)
+    return np.ascontiguousarray(column)
+
+
+def write_shared_store(kb_data, store_path, source_path, tables=None, cube=None):
+    """Write the KB as a memory-mappable section store (plus the prebuilt LLM context)
+
+    `tables` maps table name -> {column: values} and is stored as numpy columns;
+    `cube` is an optional timeseries.DailyCube for arbitrary time windows.
+    """
+    arrays = {
+        f"tables/{table}/{column}": _column_array(values)
+        for table, columns in (tables or {}).items()
+        for column, values in columns.items()
+    }
+    sections = {}
+    for key, value in kb_data.items():
+        if key in SPLIT_SECTIONS and isinstance(value, dict):
+            for child, child_value in value.items():
+                sections[f"{key}/{child}"] = child_value
+        else:
+            sections[key] = value
+    if cube is not None:
+        cube_sections, cube_arrays = cube.to_store()
+        sections.update(cube_sections)
+        arrays.update(cube_arrays)
+    meta = {
+        "source": source_path,
+        "source_version": source_version(source_path),
+        "built_at": datetime.now().isoformat()
+    }
+    write_store(store_path, sections, texts={"context": format_context(kb_data)}, arrays=arrays, meta=meta)
+
+
 class JSONKnowledgeBase:
-    def __init__(self, kb_path="data/knowledge_base/analytics_kb.json"):
+    def __init__(self, kb_path="data/knowledge_base/analytics_kb.json", shared=False, strict=False):
+        """
+        `shared=True` serves the KB from a memory-mapped store shared by all worker processes,
+        falling back to parsing the JSON when the store is missing or stale (`strict=True` fails instead)
+        """
         self.kb_path = kb_path
+        self.store_path = os.path.splitext(kb_path)[0] + ".bin"
+        self.shared = shared
+        self.strict = strict
         self.kb_data = None
+        self.store = None
+        self._cube = None
         self.load()
     
     def load(self):
@@ -19,72 +171,155 @@ class JSONKnowledgeBase:
             self.kb_data = {}
             return
         
-        with open(self.kb_path, 'r', encoding='utf-8') as f:
-            self.kb_data = json.load(f)
+        if self.shared:
+            try:
+                self.store = self._open_store()
+            except RuntimeError as e:
+                if self.strict:
+                    raise
+                print(f"⚠️ {e}; parsing the JSON instead")
+        if self.store is not None:
+            metadata, summary = self.store.get('metadata', {}), self.store.get('summary', {})
+            print(f"✅ Mapped shared Knowledge Base: {self.store_path}")
+        else:
+            with open(self.kb_path, 'r', encoding='utf-8') as f:
+                self.kb_data = json.load(f)
+            metadata, summary = self.kb_data.get('metadata', {}), self.kb_data.get('summary', {})
+            print(f"✅ Loaded JSON Knowledge Base: {self.kb_path}")
+        
+        print(f"   - Generated: {metadata.get('generated_at', 'Unknown')}")
+        print(f"   - Total patients: {summary.get('total_patients', 0)}")
+    
+    def _open_store(self):
+        """Map the shared store built alongside the JSON by the KB generator"""
+        meta = read_meta(self.store_path)
+        if not meta:
+            raise RuntimeError(f"Binary knowledge base {self.store_path} is missing; "
+                               "run `python -m src.json_kb_generator` or set KB_LOAD_MODE=json")
+        if meta.get("source_version") != source_version(self.kb_path):
+            raise RuntimeError(f"Binary knowledge base {self.store_path} does not match {self.kb_path}; "
+                               "run `python -m src.json_kb_generator` to rebuild both")
+        return KBStore(self.store_path)
+    
+    @property
+    def loaded(self):
+        return self.store is not None or bool(self.kb_data)
+    
+    def _section(self, *path):
+        """One KB section, e.g. _section('analytics', 'disease_trends')"""
+        if self.store is not None:
+            return self.store.get("/".join(path), {})
+        node = self.kb_data or {}
+        for key in path:
+            node = node.get(key, {})
+        return node
+    
+    def table(self, name):
+        """Columnar KB table as {column: read-only numpy array}; only available from the binary KB"""
+        if self.store is None:
+            return None
+        return self.store.table(name)
+    
+    def table_names(self):
+        return self.store.table_names() if self.store is not None else []
+    
+    def query_table(self, name, offset=0, limit=50):
+        """Page through a columnar table (e.g. a full ranking) without decoding the rest of it"""
+        columns = self.table(name)
+        if columns is None:
+            return None
+        total = len(next(iter(columns.values())))
+        rows = [
+            dict(zip(columns, values))
+            for values in zip(*(col[offset:offset + limit].tolist() for col in columns.values()))
+        ]
+        return {"table": name, "total_rows": total, "offset": offset, "rows": rows}
+    
+    def _daily_cube(self):
+        """Daily cube views onto the binary KB (None when serving plain JSON)"""
+        if self._cube is None and self.store is not None:
+            from src.timeseries import DailyCube  # pulls in pandas; keep it off the API import path
+            self._cube = DailyCube.from_store(self.store)
+        return self._cube
+    
+    def query_time_windows(self, days=None, dimension=None, top=10):
+        """Precomputed 7/30/90-day and month-over-month windows, or any trailing `days` window"""
+        if days is None:
+            data = self._section('analytics', 'time_windows')
+            if dimension and data.get('rolling'):
+                if dimension not in data['month_over_month']['dimensions']:
+                    raise ValueError(f"Unknown dimension '{dimension}'")
+                # Filter copies; `data` may be the live kb_data in JSON mode
+                def only(period):
+                    return dict(period, dimensions={dimension: period['dimensions'][dimension]})
+                data = dict(data, rolling={label: only(period) for label, period in data['rolling'].items()},
+                            month_over_month=only(data['month_over_month']))
+            return data
         
-        print(f"✅ Loaded JSON Knowledge Base: {self.kb_path}")
-        print(f"   - Generated: {self.kb_data.get('metadata', {}).get('generated_at', 'Unknown')}")
-        print(f"   - Total patients: {self.kb_data.get('summary', {}).get('total_patients', 0)}")
+        cube = self._daily_cube()
+        if cube is None:
+            return None
+        if dimension and dimension not in cube.prefix:
+            raise ValueError(f"Unknown dimension '{dimension}'. Available: {', '.join(cube.prefix)}")
+        window = cube.window(days, top, dimensions=[dimension] if dimension else None)
+        window["as_of"] = str(cube.end)
+        return window
     
     def get_full_context(self):
         """Get full KB as formatted text for LLM context"""
-        if not self.kb_data:
-            return "Knowledge base is empty or not loaded."
-        
-        context = []
-        
-        # Add summary
-        context.append("=== ANALYTICS SUMMARY ===")
-        summary = self.kb_data.get('summary', {})
-        for key, value in summary.items():
-            if key == 'key_insights':
-                context.append("\nKey Insights:")
-                for insight in value:
-                    context.append(f"  • {insight}")
-            else:
-                context.append(f"{key.replace('_', ' ').title()}: {value}")
-        
-        # Add disease trends
-        context.append("\n=== DISEASE TRENDS ===")
-        disease_trends = self.kb_data.get('analytics', {}).get('disease_trends', {})
-        context.append(f"Interpretation: {disease_trends.get('interpretation', '')}")
-        context.append("\nTop 10 Diseases:")
-        for disease in disease_trends.get('top_10_diseases', []):
-            context.append(f"  {disease['rank']}. {disease['disease_name']}: {disease['case_count']} cases ({disease['percentage']}%)")
-        
-        # Add doctor workload
-        context.append("\n=== DOCTOR WORKLOAD ===")
-        workload = self.kb_data.get('analytics', {}).get('doctor_workload', {})
-        context.append(f"Interpretation: {workload.get('interpretation', '')}")
-        context.append("\nTop 10 Busiest Doctors:")
-        for doc in workload.get('top_10_busiest_doctors', []):
-            context.append(f"  {doc['rank']}. Dr. {doc['doctor_name']} ({doc['specialty']}): {doc['patient_count']} patients")
-        
-        # Add geographic distribution
-        context.append("\n=== GEOGRAPHIC DISTRIBUTION ===")
-        geo = self.kb_data.get('analytics', {}).get('geographic_distribution', {})
-        context.append(f"Interpretation: {geo.get('interpretation', '')}")
-        context.append("\nTop 10 Areas:")
-        for area in geo.get('top_10_areas', []):
-            context.append(f"  {area['rank']}. {area['area_name']}: {area['patient_count']} patients ({area['percentage']}%)")
-        
-        return "\n".join(context)
+        if self.store is not None:
+            return self.store.get("context")
+        return format_context(self.kb_data)
     
     def query_disease_trends(self):
         """Get disease trends data"""
-        return self.kb_data.get('analytics', {}).get('disease_trends', {})
+        return self._section('analytics', 'disease_trends')
     
     def query_doctor_workload(self):
         """Get doctor workload data"""
-        return self.kb_data.get('analytics', {}).get('doctor_workload', {})
+        return self._section('analytics', 'doctor_workload')
     
     def query_geographic_distribution(self):
         """Get geographic distribution data"""
-        return self.kb_data.get('analytics', {}).get('geographic_distribution', {})
+        return self._section('analytics', 'geographic_distribution')
+    
+    def query_temporal_patterns(self):
+        """Get daily visit pattern data"""
+        return self._section('analytics', 'temporal_patterns')
+    
+    def query_entities(self):
+        """Get doctor, branch and disease reference lists"""
+        return self._section('entities')
+    
+    def query_doctor_utilization(self):
+        """Get scheduled-capacity utilization data"""
+        return self._section('analytics', 'doctor_utilization')
+    
+    def query_alerts(self, dimension=None, active_only=False):
+        """Get detected surges and drops, optionally filtered"""
+        data = self._section('analytics', 'alerts')
+        if data.get('method') and (dimension or active_only):
+            key = 'active' if active_only else 'episodes'
+            data = dict(data, episodes=[e for e in data[key] if not dimension or e['dimension'] == dimension])
+            data['active'] = [e for e in data['active'] if not dimension or e['dimension'] == dimension]
+        return data
+    
+    def query_forecast(self, dimension=None, name=None):
+        """Get per-branch / per-specialty visit forecasts, optionally filtered"""
+        data = self._section('analytics', 'forecast')
+        if data.get('dimensions') and (dimension or name):
+            if dimension and dimension not in data['dimensions']:
+                raise ValueError(f"Unknown dimension '{dimension}'. Available: {', '.join(data['dimensions'])}")
+            # Filtered copy; `data` may be the live kb_data in JSON mode
+            data = dict(data, dimensions={
+                dim: [row for row in rows if not name or row['name'].lower() == name.lower()]
+                for dim, rows in data['dimensions'].items() if not dimension or dim == dimension
+            })
+        return data
     
     def query_summary(self):
         """Get executive summary"""
-        return self.kb_data.get('summary', {})
+        return self._section('summary')
     
     def search(self, query_text):
         """Search KB for relevant information based on query keywords"""
@@ -109,6 +344,33 @@ class JSONKnowledgeBase:
                 "interpretation": workload_data.get('interpretation', '')
             })
         
+        # Check for capacity / schedule queries
+        if any(word in query_lower for word in ['utilization', 'utilisation', 'capacity', 'idle', 'overbook', 'schedule', 'timing']):
+            utilization_data = self.query_doctor_utilization()
+            results.append({
+                "type": "doctor_utilization",
+                "data": utilization_data,
+                "interpretation": utilization_data.get('interpretation', '')
+            })
+        
+        # Check for forecast / staffing queries
+        if any(word in query_lower for word in ['forecast', 'predict', 'expect', 'upcoming', 'next week', 'staffing']):
+            forecast_data = self.query_forecast()
+            results.append({
+                "type": "forecast",
+                "data": forecast_data,
+                "interpretation": forecast_data.get('interpretation', '')
+            })
+        
+        # Check for outbreak / anomaly queries
+        if any(word in query_lower for word in ['alert', 'anomal', 'surge', 'spike', 'outbreak', 'unusual']):
+            alert_data = self.query_alerts()
+            results.append({
+                "type": "alerts",
+                "data": alert_data,
+                "interpretation": alert_data.get('interpretation', '')
+            })
+        
         # Check for geographic queries
         if any(word in query_lower for word in ['area', 'location', 'geographic', 'where', 'branch', 'region']):
             geo_data = self.query_geographic_distribution()
@@ -118,6 +380,15 @@ class JSONKnowledgeBase:
                 "interpretation": geo_data.get('interpretation', '')
             })
         
+        # Check for period / time-window queries
+        if any(word in query_lower for word in ['month', 'week', 'recent', 'last', 'period', 'window']):
+            windows_data = self.query_time_windows()
+            results.append({
+                "type": "time_windows",
+                "data": windows_data,
+                "interpretation": windows_data.get('interpretation', '')
+            })
+        
         # If no specific match, return summary
         if not results:
             summary_data = self.query_summary()
@@ -5,15 +5,26 @@ Converts analytics data into structured JSON knowledge base
 import json
 import pandas as pd
 import os
+import argparse
 from datetime import datetime
 
+from src.json_kb import write_shared_store
+from src.profiling import profiled, add_profile_arguments, profile_run
+from src.timeseries import DailyCube
+from src.utilization import UtilizationEngine
+from src.anomaly import build_alerts
+from src.forecasting import build_forecast
+
 class JSONKnowledgeBaseGenerator:
     def __init__(self):
         self.kb_dir = "data/knowledge_base"
         os.makedirs(self.kb_dir, exist_ok=True)
         
-    def generate_from_data(self, doctors_df, branches_df, diseases_df, patients_df):
+    @profiled
+    def generate_from_data(self, doctors_df, branches_df, diseases_df, patients_df, timings_df=None):
         """Generate comprehensive JSON knowledge base from analytics data"""
+        cube = self._build_daily_cube(patients_df, doctors_df, branches_df)
+        utilization = self._compute_utilization(patients_df, doctors_df, branches_df, timings_df)
         
         kb = {
             "metadata": {
@@ -26,7 +37,11 @@ class JSONKnowledgeBaseGenerator:
                 "disease_trends": self._analyze_disease_trends(patients_df, diseases_df),
                 "doctor_workload": self._analyze_doctor_workload(patients_df, doctors_df),
                 "geographic_distribution": self._analyze_geographic_distribution(patients_df, branches_df),
-                "temporal_patterns": self._analyze_temporal_patterns(patients_df)
+                "temporal_patterns": self._analyze_temporal_patterns(patients_df),
+                "time_windows": self._analyze_time_windows(cube),
+                "doctor_utilization": self._analyze_doctor_utilization(utilization),
+                "alerts": self._detect_anomalies(cube),
+                "forecast": self._forecast_visits(cube, doctors_df)
             },
             "entities": {
                 "doctors": self._format_doctors(doctors_df),
@@ -42,8 +57,14 @@ class JSONKnowledgeBaseGenerator:
             json.dump(kb, f, indent=2, ensure_ascii=False)
         
         print(f"✅ JSON Knowledge Base generated: {kb_path}")
+        
+        # Binary KB the API memory-maps: same sections plus full columnar tables
+        bin_path = os.path.join(self.kb_dir, "analytics_kb.bin")
+        write_shared_store(kb, bin_path, kb_path, tables=self._build_tables(patients_df, doctors_df, utilization), cube=cube)
+        print(f"✅ Binary Knowledge Base generated: {bin_path}")
         return kb
     
+    @profiled
     def _analyze_disease_trends(self, patients_df, diseases_df):
         """Analyze disease trends and return structured data"""
         disease_counts = patients_df['cleaned_disease_name'].value_counts()
@@ -72,6 +93,7 @@ class JSONKnowledgeBaseGenerator:
                             f"This indicates a significant health concern that requires focused medical resources and preventive measures."
         }
     
+    @profiled
     def _analyze_doctor_workload(self, patients_df, doctors_df):
         """Analyze doctor workload distribution"""
         workload = patients_df['doctor_id'].value_counts()
@@ -110,6 +132,7 @@ class JSONKnowledgeBaseGenerator:
                             f"This suggests potential workload imbalance that may require staff redistribution."
         }
     
+    @profiled
     def _analyze_geographic_distribution(self, patients_df, branches_df):
         """Analyze patient geographic distribution"""
         area_counts = patients_df['area'].value_counts()
@@ -147,6 +170,7 @@ class JSONKnowledgeBaseGenerator:
                             f"indicating this is a primary catchment area requiring adequate medical infrastructure."
         }
     
+    @profiled
     def _analyze_temporal_patterns(self, patients_df):
         """Analyze temporal visit patterns if timestamp data exists"""
         if 'visit_timestamp' not in patients_df.columns:
@@ -172,6 +196,165 @@ class JSONKnowledgeBaseGenerator:
                             f"Understanding these patterns helps optimize staff scheduling and resource allocation."
         }
     
+    @profiled
+    def _build_daily_cube(self, patients_df, doctors_df, branches_df):
+        """Day x category visit counts (as prefix sums) for diseases, doctors, areas and branches"""
+        if 'visit_timestamp' not in patients_df.columns:
+            return None
+        names = {
+            "doctor": dict(zip(doctors_df['doctor_id'].astype(str), doctors_df['doctor_name'])),
+            "branch": dict(zip(branches_df['branch_id'].astype(str), branches_df['branch_name']))
+        }
+        return DailyCube.from_visits(patients_df, names=names)
+    
+    @profiled
+    def _analyze_time_windows(self, cube):
+        """Rolling 7/30/90-day windows and month-over-month comparison"""
+        if cube is None:
+            return {
+                "overview": "Temporal data not available",
+                "interpretation": "Visit timestamp information is not present in the current dataset."
+            }
+        
+        rolling = cube.rolling_windows()
+        mom = cube.month_over_month()
+        
+        def pct(value):
+            return f"{value:+.2f}%" if value is not None else "n/a"
+        
+        last_30 = next(iter(rolling["30d"]["dimensions"].values()))["total"]
+        month = next(iter(mom["dimensions"].values()))["total"]
+        interpretation = (
+            f"In the last 30 days up to {cube.end} there were {last_30['current']} visits "
+            f"({pct(last_30['change_pct'])} vs the previous 30 days). "
+            f"{mom['current_month']} {'had' if mom['comparison'] == 'full_month' else 'has so far'} {month['current']} visits "
+            f"vs {month['previous']} in {mom['previous_month']}"
+            f"{'' if mom['comparison'] == 'full_month' else ' over the same days'} ({pct(month['change_pct'])})."
+        )
+        changed = [d for d in mom["dimensions"].get("disease", {}).get("top", []) if d["change_pct"] is not None]
+        if changed:
+            fastest = max(changed, key=lambda d: abs(d["change_pct"]))
+            interpretation += f" Among the most common diseases, {fastest['name']} changed the most month over month ({pct(fastest['change_pct'])})."
+        
+        return {
+            "as_of": str(cube.end),
+            "rolling": rolling,
+            "month_over_month": mom,
+            "interpretation": interpretation
+        }
+    
+    @profiled
+    def _detect_anomalies(self, cube):
+        """Surges and drops in daily disease and branch volumes (EWMA z-scores)"""
+        return build_alerts(cube)
+    
+    @profiled
+    def _forecast_visits(self, cube, doctors_df):
+        """Next two weeks of visits per branch and per specialty (Holt-Winters, cached states)"""
+        return build_forecast(cube, specialty_of=dict(zip(doctors_df['doctor_id'].astype(str), doctors_df['specialty'])))
+    
+    @profiled
+    def _compute_utilization(self, patients_df, doctors_df, branches_df, timings_df):
+        """Join visits to scheduled slots (None without timings or timestamps)"""
+        if timings_df is None or timings_df.empty or 'visit_timestamp' not in patients_df.columns:
+            return None
+        return UtilizationEngine(timings_df).compute(
+            patients_df,
+            doctor_names=dict(zip(doctors_df['doctor_id'].astype(str), doctors_df['doctor_name'])),
+            branch_names=dict(zip(branches_df['branch_id'].astype(str), branches_df['branch_name']))
+        )
+    
+    def _analyze_doctor_utilization(self, utilization):
+        """Scheduled capacity vs visits, overbooking and idle hours"""
+        if utilization is None:
+            return {
+                "overview": "Doctor timing data not available",
+                "interpretation": "Utilization needs doctor_timings.csv and visit timestamps."
+            }
+        
+        overview = utilization["overview"]
+        doctors = [d for d in utilization["doctors"] if d["capacity_visits"] > 0]
+        busiest_hours = sorted(utilization["by_hour"], key=lambda h: -h["overbooked_visits"])[:3]
+        idle_hours = sorted(utilization["by_hour"], key=lambda h: -h["idle_capacity_visits"])[:3]
+        
+        interpretation = (
+            f"Doctors used {overview['utilization_pct']}% of their scheduled capacity "
+            f"({overview['visits_in_schedule']} visits in {overview['scheduled_hours']} scheduled hours, "
+            f"{utilization['assumptions']['consult_minutes']} minutes per patient). "
+            f"{overview['visits_outside_schedule']} visits fell outside scheduled slots and "
+            f"{overview['overbooked_hours']} slot-hours were overbooked by {overview['overbooked_visits']} visits in total."
+        )
+        if doctors:
+            interpretation += (
+                f" {doctors[0]['name']} is the most utilized ({doctors[0]['utilization_pct']}%) and "
+                f"{doctors[-1]['name']} the least ({doctors[-1]['utilization_pct']}%)."
+            )
+        if busiest_hours and busiest_hours[0]["overbooked_visits"]:
+            interpretation += f" Overbooking peaks at {busiest_hours[0]['hour']:02d}:00; most idle capacity is at {idle_hours[0]['hour']:02d}:00."
+        
+        return {
+            "assumptions": utilization["assumptions"],
+            "overview": overview,
+            "most_utilized_doctors": doctors[:10],
+            "least_utilized_doctors": doctors[-5:][::-1],
+            "branches": utilization["branches"],
+            "by_hour": utilization["by_hour"],
+            "interpretation": interpretation
+        }
+    
+    @profiled
+    def _build_tables(self, patients_df, doctors_df, utilization=None):
+        """Full rankings and the per-day visit series as columns (binary KB only)"""
+        total = len(patients_df)
+        disease_counts = patients_df['cleaned_disease_name'].value_counts()
+        area_counts = patients_df['area'].value_counts()
+        
+        workload = patients_df['doctor_id'].value_counts().rename_axis('doctor_id').reset_index(name='patient_count')
+        workload = workload.merge(
+            doctors_df[['doctor_id', 'doctor_name', 'specialty']].drop_duplicates('doctor_id'),
+            on='doctor_id', how='left'
+        )
+        workload['doctor_name'] = workload['doctor_name'].fillna(workload['doctor_id'])
+        workload['specialty'] = workload['specialty'].fillna("Unknown")
+        
+        tables = {
+            "disease_rankings": {
+                "disease_name": disease_counts.index,
+                "case_count": disease_counts.to_numpy(),
+                "percentage": (disease_counts.to_numpy() / total * 100).round(2)
+            },
+            "doctor_rankings": {
+                "doctor_id": workload['doctor_id'],
+                "doctor_name": workload['doctor_name'],
+                "specialty": workload['specialty'],
+                "patient_count": workload['patient_count'].to_numpy(),
+                "load_vs_average": (workload['patient_count'] / workload['patient_count'].mean() * 100).round(2).to_numpy()
+            },
+            "area_rankings": {
+                "area_name": area_counts.index,
+                "patient_count": area_counts.to_numpy(),
+                "percentage": (area_counts.to_numpy() / total * 100).round(2)
+            }
+        }
+        
+        if 'visit_timestamp' in patients_df.columns:
+            visit_days = pd.to_datetime(patients_df['visit_timestamp'], errors='coerce').dt.normalize().dropna()
+            if not visit_days.empty:
+                daily = visit_days.value_counts().sort_index()
+                daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"), fill_value=0)
+                tables["daily_visits"] = {
+                    "date": daily.index.to_numpy().astype("datetime64[D]"),
+                    "visits": daily.to_numpy()
+                }
+        
+        if utilization is not None:
+            per_doctor = pd.DataFrame(utilization["doctors"])
+            tables["doctor_utilization"] = {
+                column: per_doctor[column].fillna(0).to_numpy() if column == "utilization_pct" else per_doctor[column].to_numpy()
+                for column in per_doctor.columns
+            }
+        return tables
+    
     def _format_doctors(self, doctors_df):
         """Format doctor information"""
         return [
@@ -206,6 +389,7 @@ class JSONKnowledgeBaseGenerator:
             for _, row in diseases_df.iterrows()
         ]
     
+    @profiled
     def _generate_summary(self, patients_df, doctors_df, branches_df, diseases_df):
         """Generate executive summary"""
         disease_counts = patients_df['cleaned_disease_name'].value_counts()
@@ -225,16 +409,28 @@ class JSONKnowledgeBaseGenerator:
             ]
         }
 
-if __name__ == "__main__":
-    # Test the generator
-    generator = JSONKnowledgeBaseGenerator()
-    
-    # Load data
+@profiled
+def load_cleaned_data():
+    """Load the cleaned CSVs the knowledge base is built from"""
     doctors = pd.read_csv("data/cleaned/doctors.csv")
     branches = pd.read_csv("data/cleaned/branches.csv")
     diseases = pd.read_csv("data/cleaned/diseases.csv")
     patients = pd.read_csv("data/cleaned/patients.csv")
+    timings_path = "data/cleaned/doctor_timings.csv"
+    timings = pd.read_csv(timings_path) if os.path.exists(timings_path) else None
+    return doctors, branches, diseases, patients, timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the JSON analytics knowledge base")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
-    # Generate KB
-    kb = generator.generate_from_data(doctors, branches, diseases, patients)
-    print("✅ Knowledge Base generated successfully!")
+    with profile_run("json_kb_generator", args):
+        generator = JSONKnowledgeBaseGenerator()
+        
+        # Load data
+        doctors, branches, diseases, patients, timings = load_cleaned_data()
+        
+        # Generate KB
+        kb = generator.generate_from_data(doctors, branches, diseases, patients, timings)
+    print("✅ Knowledge Base generated successfully!")
\ No newline at end of file
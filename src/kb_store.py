@@ -0,0 +1,136 @@
+"""
+Shared Knowledge Base Store
+Read-only, memory-mapped section file for serving the KB from several API workers
+- Every worker maps the same file, so the KB lives once in the OS page cache
+- Sections are decoded on access; the full tree is never materialized
+- Columnar tables (full rankings, per-day series) are numpy arrays read in place
+- Written atomically by the KB generator and stamped with the JSON's content hash
+
+Layout: MAGIC | uint64 index length | index (JSON) | padding | section payloads
+Payloads start on 64-byte boundaries so array sections can be viewed without copying.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"SAYKB01\n"
+HEADER = struct.Struct("<Q")
+ALIGNMENT = 64
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def source_version(path):
+    """Content hash of the file a store was built from (copies and touches keep the same version)"""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_store(path, sections, texts=None, arrays=None, meta=None):
+    """Write JSON-able `sections`, plain-text `texts` and numpy `arrays` into a store file atomically"""
+    index = {"meta": meta or {}, "sections": {}}
+    payloads, offset = [], 0
+    for kind, items in (("json", sections), ("text", texts or {}), ("array", arrays or {})):
+        for name, value in items.items():
+            entry = {"kind": kind, "offset": offset}
+            if kind == "array":
+                data = value.tobytes()
+                entry.update({"dtype": value.dtype.str, "shape": list(value.shape)})
+            elif kind == "json":
+                data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            else:
+                data = value.encode("utf-8")
+            entry["length"] = len(data)
+            index["sections"][name] = entry
+            payloads.append(data + b"\0" * _padding(len(data)))
+            offset += len(payloads[-1])
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    header_end = len(MAGIC) + HEADER.size + len(index_bytes)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(index_bytes)))
+        f.write(index_bytes)
+        f.write(b"\0" * _padding(header_end))
+        for data in payloads:
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_meta(path):
+    """Store metadata without mapping the payloads (None if missing or unreadable)"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = HEADER.unpack(f.read(HEADER.size))
+            return json.loads(f.read(length))["meta"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+class KBStore:
+    """Read-only view over a store file"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a KB store")
+        (length,) = HEADER.unpack_from(self._mm, len(MAGIC))
+        start = len(MAGIC) + HEADER.size
+        index = json.loads(self._mm[start:start + length])
+        self.meta = index["meta"]
+        self.sections = index["sections"]
+        self._base = start + length + _padding(start + length)
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def names(self, prefix=""):
+        return [n for n in self.sections if n.startswith(prefix)]
+
+    def raw(self, name):
+        entry = self.sections[name]
+        start = self._base + entry["offset"]
+        return self._mm[start:start + entry["length"]]
+
+    def get(self, name, default=None):
+        """Decode one section (a fresh object per call; nothing is kept per process)"""
+        entry = self.sections.get(name)
+        if entry is None:
+            return default
+        if entry["kind"] == "array":
+            return self.array(name)
+        data = self.raw(name)
+        return json.loads(data) if entry["kind"] == "json" else data.decode("utf-8")
+
+    def array(self, name):
+        """Read-only numpy view straight onto the mapped file (no copy)"""
+        import numpy as np
+
+        entry = self.sections[name]
+        dtype = np.dtype(entry["dtype"])
+        count = entry["length"] // dtype.itemsize if dtype.itemsize else 0
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=self._base + entry["offset"]).reshape(entry["shape"])
+
+    def table(self, name):
+        """Columns stored under tables/<name>/ as {column: array}, or None"""
+        prefix = f"tables/{name}/"
+        columns = {n[len(prefix):]: self.array(n) for n in self.sections if n.startswith(prefix)}
+        return columns or None
+
+    def table_names(self):
+        return sorted({n.split("/")[1] for n in self.sections if n.startswith("tables/")})
+
+    def close(self):
+        """Release the mapping (fails while array views are still referenced)"""
+        self._mm.close()
@@ -6,51 +6,68 @@ Refactored LLM Generator with JSON KB Support
 """
 import os
 import json
+import re
 import hashlib
 import time
 import random
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 import concurrent.futures
+from contextvars import ContextVar
+
+from src.llm_backends import Prompt, create_backend
+from src.metrics import metrics
+from src.resilience import CircuitBreaker, TokenBucket, OPEN
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
 
 # Load env variables
 load_dotenv()
 
-# Check Gemini API availability
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Call budget: at most LLM_QUEUE_SECONDS waiting for a rate-limit token, the backend's timeout in total
+LLM_QUEUE_SECONDS = float(os.getenv("LLM_QUEUE_SECONDS", "2"))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "15"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Paraphrase cache: SEMANTIC_CACHE=0 disables it; a share of its hits is re-asked to count false hits
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "1") != "0"
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0"))
+
+# Token usage of the LLM call made for the current request (None when no call was made)
+_request_usage = ContextVar("llm_request_usage", default=None)
 
-try:
-    if GEMINI_API_KEY:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        GENAI_AVAILABLE = True
-    else:
-        GENAI_AVAILABLE = False
-except Exception:
-    GENAI_AVAILABLE = False
+
+def _is_quota_error(error):
+    """429 / ResourceExhausted from the Gemini client"""
+    text = f"{type(error).__name__} {error}".lower()
+    return "429" in text or "quota" in text or "resourceexhausted" in text or "rate limit" in text
 
 
 class LLMGenerator:
-    def __init__(self):
+    def __init__(self, init_model=True, fallback=None, backend=None):
         self.cache_dir = Path("data/cache")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "llm_cache.json"
-        self.cache = self._load_cache()
-
-        # Initialize Gemini model if available
+        # Shared by every API worker process; imports the old llm_cache.json once
+        self.cache = ResponseCache(self.cache_dir / "llm_cache.sqlite3", legacy_json=self.cache_dir / "llm_cache.json")
+        self.semantic_cache = SemanticCache(self.cache_dir / "llm_cache.sqlite3") if SEMANTIC_CACHE_ENABLED else None
+        # Structured answers from the KB (fallback.FallbackEngine); context-text extraction is the last resort
+        self.fallback = fallback
+
+        # Gemini, a local llama.cpp server, or none (LLM_BACKEND); connected by init_model(),
+        # either now or later (e.g. in the background once the API is already serving)
+        self.backend = backend or create_backend()
         self.api_available = False
-        self.model = None
-
-        if GENAI_AVAILABLE:
-            try:
-                self.model = genai.GenerativeModel("gemini-2.0-flash")
-                print("✅ Gemini API initialized successfully (gemini-2.0-flash)")
-                self.api_available = True
-            except Exception as e:
-                print(f"⚠️ Gemini initialization failed: {e}")
-                self.api_available = False
-        else:
-            print("ℹ️ Gemini API not available — using fallback extraction")
+        self.model_ready = threading.Event()
+        self._model_lock = threading.Lock()
+
+        # Slow or failing API -> skip straight to the fallback instead of waiting out timeouts;
+        # what counts as slow depends on the backend (a CPU model is slower than the hosted API)
+        self.breaker = CircuitBreaker(slow_call_seconds=self.backend.slow_call_seconds)
+        # Hosted quota; a local server is only bounded by LLM_MAX_CONCURRENCY
+        self.limiter = TokenBucket(LLM_RATE_PER_MINUTE) if self.backend.metered else TokenBucket(1e9, burst=1e9)
+        # Shared pool: a timed-out call keeps its thread, but the caller no longer waits for it
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
 
         self.system_prompt = """
 You are an expert AI Analytics Assistant for the Saylani Medical Help Desk.
@@ -71,76 +88,177 @@ FORMAT:
 - End with a 1–2 line insight summary
 """
 
+        if init_model:
+            self.init_model()
+
+    def init_model(self):
+        """Connect the LLM backend once; safe to call from several threads"""
+        with self._model_lock:
+            if self.model_ready.is_set():
+                return self.api_available
+            self.api_available = self.backend.load()
+            self.model_ready.set()
+            return self.api_available
+
     # -------------------------------------
     # CACHE HELPERS
     # -------------------------------------
-    def _load_cache(self):
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
-
-    def _save_cache(self):
-        try:
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"⚠️ Cache save failed: {e}")
-
     def _get_cache_key(self, query, context_text):
-        base = f"{query}|{context_text[:500]}"
+        """Keyed on the whole context, so a rebuilt KB never serves the previous version's answers"""
+        base = f"{query}|{self._kb_version(context_text)}"
         return hashlib.md5(base.encode()).hexdigest()
 
+    @staticmethod
+    def _kb_version(context_text):
+        """Paraphrase hits are only valid against the KB context the answer was generated from"""
+        return hashlib.md5(context_text.encode()).hexdigest()
+
+    def _semantic_get(self, query, context_text):
+        if self.semantic_cache is None:
+            return None
+        return self.semantic_cache.get(query, self._kb_version(context_text))
+
+    def has_cached(self, query, context_text):
+        """True if generate_answer would be served from cache (no LLM call)"""
+        return (self.cache.get(self._get_cache_key(query, context_text)) is not None
+                or self._semantic_get(query, context_text) is not None)
+
+    def _audit_semantic_hit(self, query, context_text, cached):
+        """Re-ask a paraphrase hit; a fresh answer citing different numbers counts as a false hit"""
+        fresh = self._call_model(query, context_text)
+        if fresh is None:
+            return
+        metrics.inc("semantic_cache_audits")
+        cited = lambda text: set(re.findall(r"\d+(?:\.\d+)?", text.replace(",", "")))
+        fresh_numbers, cached_numbers = cited(fresh), cited(cached)
+        if fresh_numbers and len(fresh_numbers & cached_numbers) < len(fresh_numbers | cached_numbers) / 2:
+            metrics.inc("semantic_cache_false_hits")
+            print(f"⚠️ Semantic cache false hit for: {query}")
+            self.cache[self._get_cache_key(query, context_text)] = fresh
+
     # -------------------------------------
-    # MAIN RESPONSE GENERATION
+    # PROMPT (static prefix per KB version + per-query suffix)
     # -------------------------------------
-    def generate_answer(self, query, context_text):
-        cache_key = self._get_cache_key(query, context_text)
-
-        # Serve from cache
-        if cache_key in self.cache:
-            print("🔁 Using cached response")
-            return self.cache[cache_key]
-
-        # TRY GEMINI API FIRST
-        if self.api_available and self.model:
-            try:
-                prompt = f"""
-{self.system_prompt}
-
+    def _prompt(self, query, context_text):
+        context = f"""
 === ANALYTICS DATA START ===
 {context_text}
 === ANALYTICS DATA END ===
-
+"""
+        question = f"""
 ADMIN QUESTION:
 {query}
 
 ANSWER (interpret analytics only):
 """
+        return Prompt(self.system_prompt, context, question, self._kb_version(context_text))
 
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(self.model.generate_content, prompt)
-                    response = future.result(timeout=8)
+    @staticmethod
+    def request_usage():
+        """Token usage of the LLM call made while answering the current request, if any"""
+        return _request_usage.get()
 
-                answer = response.text
+    # -------------------------------------
+    # MAIN RESPONSE GENERATION
+    # -------------------------------------
+    def generate_answer(self, query, context_text, queue_seconds=None):
+        """Cached, LLM or fallback answer; `queue_seconds` lets background callers wait longer for a rate-limit token"""
+        _request_usage.set(None)
+        cache_key = self._get_cache_key(query, context_text)
 
+        # Serve from cache
+        with metrics.span("cache_lookup"):
+            cached = self.cache.get(cache_key)
+        if cached is not None:
+            metrics.inc("cache_hits")
+            print("🔁 Using cached response")
+            return cached
+        metrics.inc("cache_misses")
+
+        # Paraphrase of an answered question (same KB version)
+        with metrics.span("semantic_cache_lookup"):
+            cached = self._semantic_get(query, context_text)
+        if cached is not None:
+            metrics.inc("semantic_cache_hits")
+            print("🔁 Using cached response for a paraphrased question")
+            if SEMANTIC_CACHE_AUDIT_RATE and random.random() < SEMANTIC_CACHE_AUDIT_RATE:
+                threading.Thread(target=self._audit_semantic_hit, args=(query, context_text, cached),
+                                 name="semantic-audit", daemon=True).start()
+            return cached
+        if self.semantic_cache is not None:
+            metrics.inc("semantic_cache_misses")
+
+        # Cached answers never wait for the client; fresh ones need it
+        if not self.model_ready.is_set():
+            with metrics.span("llm_init"):
+                self.init_model()
+
+        # TRY THE LLM FIRST
+        if self.api_available:
+            answer = self._call_model(query, context_text, queue_seconds)
+            if answer is not None:
                 # Cache
                 self.cache[cache_key] = answer
-                self._save_cache()
+                if self.semantic_cache is not None:
+                    self.semantic_cache.add(query, self._kb_version(context_text), answer)
 
-                print("✅ Gemini Response Generated")
+                print(f"✅ {self.backend.label} Response Generated")
                 return answer
 
-            except concurrent.futures.TimeoutError:
-                print("⚠️ API Timeout — using fallback KB extraction")
-            except Exception as e:
-                print(f"⚠️ API Failure: {e}")
-
         # FALLBACK
-        return self._extract_from_context(query, context_text)
+        metrics.inc("fallbacks")
+        with metrics.span("fallback_extraction"):
+            answer = self.fallback.answer(query) if self.fallback is not None else None
+            return answer or self._extract_from_context(query, context_text)
+
+    def _call_model(self, query, context_text, queue_seconds=None):
+        """LLM call behind the circuit breaker, rate limiter and deadline; None means use the fallback"""
+        if self.breaker.state == OPEN:
+            metrics.inc("breaker_rejections")
+            print("⚡ LLM circuit open — using fallback KB extraction")
+            return None
+
+        start = time.monotonic()
+        queue_seconds = LLM_QUEUE_SECONDS if queue_seconds is None else queue_seconds
+        deadline = start + self.backend.timeout + max(0.0, queue_seconds - LLM_QUEUE_SECONDS)
+        with metrics.span("rate_limit_wait"):
+            acquired = self.limiter.acquire(min(start + queue_seconds, deadline))
+        if not acquired:
+            metrics.inc("rate_limited")
+            print("⏳ LLM rate limit reached — using fallback KB extraction")
+            return None
+        ticket = self.breaker.allow()
+        if ticket is None:
+            metrics.inc("breaker_rejections")
+            return None
+
+        call_start = time.monotonic()
+        future = self._executor.submit(self.backend.generate, self._prompt(query, context_text))
+        try:
+            with metrics.span("llm_call"):
+                answer, usage = future.result(timeout=max(deadline - call_start, 0.0))
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.breaker.record(False, time.monotonic() - call_start, ticket)
+            metrics.inc("llm_timeouts")
+            print("⚠️ API Timeout — using fallback KB extraction")
+            return None
+        except Exception as e:
+            self.breaker.record(False, time.monotonic() - call_start, ticket)
+            if _is_quota_error(e):
+                self.limiter.penalize()
+                metrics.inc("llm_quota_errors")
+            metrics.inc("llm_errors")
+            print(f"⚠️ API Failure: {e}")
+            return None
+
+        self.breaker.record(True, time.monotonic() - call_start, ticket)
+        self.limiter.reward()
+        _request_usage.set(usage)
+        metrics.inc("llm_prompt_tokens", usage["prompt_tokens"])
+        metrics.inc("llm_cached_prompt_tokens", usage["cached_tokens"])
+        metrics.inc("llm_output_tokens", usage["output_tokens"])
+        return answer
 
     # -------------------------------------
     # FALLBACK ANALYTICS EXTRACTION
@@ -155,13 +273,65 @@ ANSWER (interpret analytics only):
                 return None
 
             if next_title:
-                end = ctx.find(next_title, start)
+                end = ctx.find(next_title, start + len(title))
                 end = end if end != -1 else len(ctx)
             else:
                 end = len(ctx)
             
             return ctx[start:end].strip()
 
+        # MATCH SCHEDULED CAPACITY / UTILIZATION
+        if any(w in q for w in ["utilization", "utilisation", "capacity", "idle", "overbook", "schedule"]):
+            sec = extract_section("=== DOCTOR UTILIZATION ===", "===")
+            if sec:
+                return f"""
+⏱️ **Doctor Utilization Analysis**
+
+{sec}
+
+---
+*Extracted from Analytics Knowledge Base*
+"""
+
+        # MATCH FORECASTS / STAFFING
+        if any(w in q for w in ["forecast", "predict", "expect", "upcoming", "next week", "staffing"]):
+            sec = extract_section("=== FORECAST ===", "===")
+            if sec:
+                return f"""
+🔮 **Visit Forecast**
+
+{sec}
+
+---
+*Extracted from Analytics Knowledge Base*
+"""
+
+        # MATCH SURGES / OUTBREAKS
+        if any(w in q for w in ["alert", "anomal", "surge", "spike", "outbreak", "unusual"]):
+            sec = extract_section("=== ALERTS ===", "===")
+            if sec:
+                return f"""
+🚨 **Surge and Anomaly Alerts**
+
+{sec}
+
+---
+*Extracted from Analytics Knowledge Base*
+"""
+
+        # MATCH TIME WINDOWS (this month vs last month, last 7/30/90 days)
+        if any(w in q for w in ["month", "week", "recent", "last", "period"]):
+            sec = extract_section("=== TIME WINDOWS ===", "===")
+            if sec:
+                return f"""
+📅 **Time Window Analysis**
+
+{sec}
+
+---
+*Extracted from Analytics Knowledge Base*
+"""
+
         # MATCH DISEASE TRENDS
         if any(w in q for w in ["disease", "illness", "common", "prevalent", "top"]):
             sec = extract_section("=== DISEASE TRENDS ===", "===")
@@ -0,0 +1,290 @@
+"""
+LLM Backends
+Where LLMGenerator sends a prompt, chosen with LLM_BACKEND
+- gemini (default): hosted gemini-2.0-flash, with provider-side caching of the prompt prefix
+- llamacpp: local llama.cpp server over HTTP; concurrent prompts are grouped into one
+  multi-prompt /completion request, and the server's KV cache reuses the shared prefix
+- none: no model, every answer comes from the knowledge-base fallback
+"""
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+from src.metrics import metrics
+
+load_dotenv()
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+# Deadline for one hosted call (LLM_TIMEOUT_SECONDS is the older name)
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", os.getenv("LLM_TIMEOUT_SECONDS", "8")))
+# Context caching needs a pinned model version
+GEMINI_CACHE_MODEL_NAME = os.getenv("GEMINI_CACHE_MODEL_NAME", "models/gemini-2.0-flash-001")
+
+# Provider-side caching of the static prompt prefix (system prompt + KB context), one per KB version.
+# Prefixes below the provider minimum are sent inline (the API rejects smaller caches).
+LLM_CONTEXT_CACHE = os.getenv("LLM_CONTEXT_CACHE", "auto")  # auto | off
+LLM_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("LLM_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+LLM_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("LLM_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+# After a failed cache creation, send full prompts for this long before trying again
+LLM_CONTEXT_CACHE_RETRY_SECONDS = float(os.getenv("LLM_CONTEXT_CACHE_RETRY_SECONDS", "60"))
+CHARS_PER_TOKEN = 4
+
+LLAMACPP_URL = os.getenv("LLAMACPP_URL", "http://127.0.0.1:8080")
+LLAMACPP_MAX_TOKENS = int(os.getenv("LLAMACPP_MAX_TOKENS", "512"))
+LLAMACPP_TIMEOUT_SECONDS = float(os.getenv("LLAMACPP_TIMEOUT_SECONDS", "60"))
+# Prompts arriving within LLAMACPP_BATCH_WAIT_MS of each other share one request (up to LLAMACPP_BATCH_SIZE)
+LLAMACPP_BATCH_SIZE = int(os.getenv("LLAMACPP_BATCH_SIZE", "8"))
+LLAMACPP_BATCH_WAIT_MS = float(os.getenv("LLAMACPP_BATCH_WAIT_MS", "5"))
+
+_genai = None
+
+
+def _load_genai():
+    """Import and configure google.generativeai on first use (it is slow to import)"""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+
+def _usage(response):
+    """Prompt, cached-prefix and output token counts from a generate_content response"""
+    meta = getattr(response, "usage_metadata", None)
+    count = lambda name: int(getattr(meta, name, 0) or 0)
+    return {
+        "prompt_tokens": count("prompt_token_count"),
+        "cached_tokens": count("cached_content_token_count"),
+        "output_tokens": count("candidates_token_count"),
+    }
+
+
+class Prompt:
+    """One LLM prompt: a static prefix per KB version (system + context) and the question suffix"""
+    def __init__(self, system, context, question, version):
+        self.system = system
+        self.context = context
+        self.question = question
+        self.version = version
+
+    @property
+    def prefix(self):
+        return f"\n{self.system}\n{self.context}"
+
+    @property
+    def text(self):
+        return self.prefix + self.question
+
+
+class LLMBackend(ABC):
+    name = None
+    label = None
+    # Hosted APIs have a request quota; local servers only have their own capacity
+    metered = False
+    # Deadline for one call, including the wait for a rate-limit token
+    timeout = 8.0
+
+    @property
+    def slow_call_seconds(self):
+        """Calls slower than this count towards opening the circuit breaker"""
+        return self.timeout / 2
+
+    @abstractmethod
+    def load(self):
+        """Connect or initialize once; True if the backend can answer"""
+
+    @abstractmethod
+    def generate(self, prompt):
+        """Answer one Prompt; returns (text, token usage)"""
+
+
+class NoLLMBackend(LLMBackend):
+    name = "none"
+    label = "No LLM"
+
+    def load(self):
+        print("ℹ️ No LLM backend configured — using fallback extraction")
+        return False
+
+    def generate(self, prompt):
+        raise RuntimeError("No LLM backend is configured (LLM_BACKEND=none); "
+                           "answers come from the knowledge-base fallback")
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    label = "Gemini API"
+    metered = True
+    timeout = GEMINI_TIMEOUT_SECONDS
+
+    def __init__(self):
+        self.model = None
+        # KB version -> (model bound to a provider cache of that version's prompt prefix or None
+        # to send inline, refresh time)
+        self._context_caches = {}
+        # KB versions whose cache one thread is creating; the others do not wait for it
+        self._context_cache_pending = set()
+        self._context_cache_lock = threading.Lock()
+
+    def load(self):
+        if not GEMINI_API_KEY:
+            print("ℹ️ Gemini API not available — using fallback extraction")
+            return False
+        try:
+            self.model = _load_genai().GenerativeModel(GEMINI_MODEL_NAME)
+            print(f"✅ Gemini API initialized successfully ({GEMINI_MODEL_NAME})")
+            return True
+        except Exception as e:
+            print(f"⚠️ Gemini initialization failed: {e}")
+            return False
+
+    def _create_context_cache(self, prompt):
+        """Model that serves prompts on top of a provider-side cache of the prompt prefix"""
+        genai = _load_genai()
+        cached = genai.caching.CachedContent.create(
+            model=GEMINI_CACHE_MODEL_NAME,
+            display_name=f"saylani-kb-{prompt.version[:12]}",
+            system_instruction=prompt.system,
+            contents=[prompt.context],
+            ttl=datetime.timedelta(seconds=LLM_CONTEXT_CACHE_TTL_SECONDS),
+        )
+        return genai.GenerativeModel.from_cached_content(cached_content=cached)
+
+    def _cached_model(self, prompt):
+        """Model bound to this KB version's cached prefix, or None to send the full prompt"""
+        if LLM_CONTEXT_CACHE == "off":
+            return None
+        if len(prompt.prefix) // CHARS_PER_TOKEN < LLM_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+        with self._context_cache_lock:
+            entry = self._context_caches.get(prompt.version)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            if prompt.version in self._context_cache_pending:
+                # Being (re)created: keep using the current cache, or send inline until it is ready
+                return entry[0] if entry is not None else None
+            self._context_cache_pending.add(prompt.version)
+
+        # The provider round trip runs outside the lock
+        try:
+            model = self._create_context_cache(prompt)
+            # Recreate a little before the provider TTL runs out
+            refresh_at = time.monotonic() + LLM_CONTEXT_CACHE_TTL_SECONDS * 0.9
+            metrics.inc("llm_context_cache_creates")
+            print(f"🧊 Cached prompt prefix for KB version {prompt.version[:12]}")
+        except Exception as e:
+            model = None
+            refresh_at = time.monotonic() + LLM_CONTEXT_CACHE_RETRY_SECONDS
+            metrics.inc("llm_context_cache_failures")
+            print(f"⚠️ Context caching unavailable, sending full prompts: {e}")
+
+        with self._context_cache_lock:
+            self._context_cache_pending.discard(prompt.version)
+            # One KB version is live at a time
+            self._context_caches = {prompt.version: (model, refresh_at)}
+        return model
+
+    def generate(self, prompt):
+        model = self._cached_model(prompt)
+        if model is not None:
+            response = model.generate_content(prompt.question)
+        else:
+            response = self.model.generate_content(prompt.text)
+        return response.text, _usage(response)
+
+
+class LlamaCppBackend(LLMBackend):
+    name = "llamacpp"
+    label = "Local LLM (llama.cpp)"
+
+    def __init__(self, url=LLAMACPP_URL, max_tokens=LLAMACPP_MAX_TOKENS, batch_size=LLAMACPP_BATCH_SIZE,
+                 batch_wait_ms=LLAMACPP_BATCH_WAIT_MS, timeout=LLAMACPP_TIMEOUT_SECONDS):
+        self.url = url.rstrip("/")
+        self.max_tokens = max_tokens
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+
+    def load(self):
+        try:
+            with urllib.request.urlopen(f"{self.url}/health", timeout=5) as resp:
+                ok = resp.status == 200
+        except Exception as e:
+            print(f"⚠️ Local LLM server not reachable at {self.url}: {e}")
+            return False
+        if ok:
+            print(f"✅ Local LLM server ready ({self.url})")
+        return ok
+
+    def _post(self, path, payload):
+        request = urllib.request.Request(f"{self.url}{path}", data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def complete(self, texts):
+        """One /completion request for several prompts; returns [(text, usage)] in order"""
+        payload = {"prompt": texts[0] if len(texts) == 1 else texts, "n_predict": self.max_tokens,
+                   "cache_prompt": True, "temperature": 0.2}
+        results = self._post("/completion", payload)
+        if isinstance(results, dict):
+            results = [results]
+        return [(r.get("content", "").strip(), {
+            "prompt_tokens": int(r.get("tokens_evaluated", 0)),
+            "cached_tokens": int(r.get("tokens_cached", 0)),
+            "output_tokens": int(r.get("tokens_predicted", 0)),
+        }) for r in results]
+
+    def _dispatch(self):
+        """Send queued prompts in batches: wait for one, then gather what arrives within the batch window"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            metrics.inc("llm_batches")
+            try:
+                results = self.complete([text for text, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Local LLM returned {len(results)} completions for {len(batch)} prompts")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def generate(self, prompt):
+        with self._start_lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="llamacpp-batcher", daemon=True)
+                self._dispatcher.start()
+        future = Future()
+        self._queue.put((prompt.text, future))
+        return future.result()
+
+
+BACKENDS = {"gemini": GeminiBackend, "llamacpp": LlamaCppBackend, "none": NoLLMBackend}
+
+
+def create_backend(name=LLM_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,144 @@
+"""
+Request Latency Tracing & Metrics
+- Timing spans per pipeline stage (routing, context build, cache, LLM, fallback)
+- Prometheus text exposition for the /metrics endpoint
+- Optional per-request span collection for debug headers
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds; tuned for stages ranging from sub-millisecond routing to the 8s LLM timeout
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTER_HELP = {
+    "chat_requests": "Chat queries received",
+    "nlp_messages": "Patient messages classified by /nlp/parse",
+    "chat_batch_requests": "Batch chat requests received",
+    "cache_hits": "LLM responses served from cache",
+    "cache_misses": "LLM cache lookups that missed",
+    "semantic_cache_hits": "Paraphrased questions answered from the semantic cache",
+    "semantic_cache_misses": "Semantic cache lookups with no match above the threshold",
+    "semantic_cache_audits": "Semantic cache hits re-asked to the LLM for auditing",
+    "semantic_cache_false_hits": "Audited semantic cache hits whose fresh answer cited different numbers",
+    "fallbacks": "Answers produced by the knowledge base fallback",
+    "llm_timeouts": "LLM calls that hit the timeout",
+    "llm_errors": "LLM calls that raised an error",
+    "llm_prompt_tokens": "Prompt tokens sent to the LLM (including cached prefix tokens)",
+    "llm_cached_prompt_tokens": "Prompt tokens served from the provider context cache",
+    "llm_output_tokens": "Tokens generated by the LLM",
+    "llm_context_cache_creates": "Prompt prefixes cached with the LLM provider",
+    "llm_context_cache_failures": "Failed attempts to cache a prompt prefix with the LLM provider",
+    "llm_batches": "Multi-prompt requests sent to the local llama.cpp server",
+    "llm_quota_errors": "LLM calls rejected for quota (rate limit lowered)",
+    "breaker_rejections": "LLM calls skipped because the circuit breaker was open",
+    "rate_limited": "LLM calls skipped because no rate-limit token came before the deadline",
+    "response_bytes_uncompressed": "Response body bytes before compression",
+    "response_bytes_compressed": "Response body bytes sent after compression",
+}
+
+# Spans recorded during the current request (None when tracing is off)
+_request_spans = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, prefix="saylani"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {name: 0 for name in COUNTER_HELP}
+
+    def observe(self, stage, seconds):
+        """Record one stage duration"""
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = Histogram()
+            hist.observe(seconds)
+
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, seconds))
+
+    def inc(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, stage):
+        """Time the enclosed block as one stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def ratio(self, numerator, denominator):
+        total = sum(self.counters.get(name, 0) for name in denominator)
+        return self.counters.get(numerator, 0) / total if total else 0.0
+
+    def render_prometheus(self):
+        """Render all metrics in Prometheus text exposition format"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {p}_stage_duration_seconds Time spent per request stage")
+            lines.append(f"# TYPE {p}_stage_duration_seconds histogram")
+            for stage, hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'{p}_stage_duration_seconds_sum{{stage="{stage}"}} {hist.total:.6f}')
+                lines.append(f'{p}_stage_duration_seconds_count{{stage="{stage}"}} {hist.count}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# HELP {p}_{name}_total {COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines.append(f"{p}_{name}_total {value}")
+
+            lines.append(f"# HELP {p}_cache_hit_ratio Share of LLM cache lookups that hit")
+            lines.append(f"# TYPE {p}_cache_hit_ratio gauge")
+            lines.append(f"{p}_cache_hit_ratio {self.ratio('cache_hits', ['cache_hits', 'cache_misses']):.4f}")
+            lines.append(f"# HELP {p}_fallback_ratio Share of uncached answers served by the fallback")
+            lines.append(f"# TYPE {p}_fallback_ratio gauge")
+            lines.append(f"{p}_fallback_ratio {self.ratio('fallbacks', ['cache_misses']):.4f}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def start_request_trace():
+    """Begin collecting spans for the current request; returns (token, spans)"""
+    spans = []
+    return _request_spans.set(spans), spans
+
+
+def end_request_trace(token):
+    _request_spans.reset(token)
+
+
+def format_server_timing(spans):
+    """Format spans as a Server-Timing header value (durations in ms)"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans)
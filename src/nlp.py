@@ -1,57 +1,252 @@
+"""
+Appointment Intent Parser
+Classifies patient messages (book / cancel / info / availability) and extracts
+doctor, specialty, area and disease entities
+- Entity dictionaries are loaded from doctors.csv, branches.csv and diseases.csv in NLP_DATA_DIR,
+  with the built-in lists as a fallback when the data has not been generated yet
+- Keywords and entities match whole words only ("pain" does not match "Spain")
+- Each message is tokenized once by a compiled regex; phrases are looked up as token n-grams
+  in one dict, so parsing cost does not grow with the dictionary size
+- parse_batch() scores a whole list of messages with one sparse matrix product,
+  answering repeated messages once
+- Matched names are resolved to their doctor, branch and disease IDs
+"""
+import csv
+import os
 import re
-from datetime import datetime
+
+NLP_DATA_DIR = os.getenv("NLP_DATA_DIR", "data/cleaned")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+DOCTOR_TITLES = ("dr", "doctor")
+
+# Intent -> keyword phrases (whole words, so inflections are listed explicitly).
+# Ties go to the intent listed first: "cancel my appointment" is a cancellation.
+INTENTS = {
+    "cancel_appointment": ["cancel", "cancelled", "canceled", "cancellation", "reschedule"],
+    "book_appointment": ["book", "booking", "appointment", "appointments", "schedule", "visit", "see a doctor"],
+    "get_info": ["info", "information", "about", "what is", "tell me", "symptoms", "treatment"],
+    "check_availability": ["available", "availability", "when", "time", "timing", "timings", "open"],
+}
+
+# Used when the cleaned CSVs are missing
+DEFAULT_SPECIALTIES = ["Cardiology", "Pediatrics", "Dermatology", "Neurology", "Orthopedics",
+                       "General Practice", "Ophthalmology", "Gynecology"]
+DEFAULT_AREAS = ["Gulshan", "Korangi", "Saddar", "Nazimabad", "Malir", "Clifton", "PECHS"]
+DEFAULT_DISEASES = ["Common Cold", "Influenza", "Fever", "Dengue", "Fracture", "Back Pain", "Migraine"]
+
+# Everyday wording -> dictionary name (only used when that name is in the dictionary)
+SPECIALTY_ALIASES = {
+    "cardiologist": "Cardiology", "heart specialist": "Cardiology",
+    "pediatrician": "Pediatrics", "child specialist": "Pediatrics",
+    "dermatologist": "Dermatology", "skin specialist": "Dermatology",
+    "neurologist": "Neurology",
+    "orthopedic": "Orthopedics", "orthopaedic": "Orthopedics", "bone specialist": "Orthopedics",
+    "general physician": "General Practice", "gp": "General Practice",
+    "ophthalmologist": "Ophthalmology", "eye specialist": "Ophthalmology",
+    "gynecologist": "Gynecology", "gynaecologist": "Gynecology",
+}
+DISEASE_ALIASES = {
+    "cold": "Common Cold", "flu": "Influenza", "high blood pressure": "Hypertension",
+    "bp": "Hypertension", "sugar": "Diabetes",
+}
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _key(phrase):
+    return " ".join(tokenize(phrase))
+
+
+def _read_csv(data_dir, name):
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def load_dictionaries(data_dir=NLP_DATA_DIR):
+    """Entity type -> {display name: [ids]} from the cleaned CSVs (built-in lists if missing)"""
+    doctors = _read_csv(data_dir, "doctors.csv")
+    branches = _read_csv(data_dir, "branches.csv")
+    diseases = _read_csv(data_dir, "diseases.csv")
+    entities = {"DOCTOR_NAME": {}, "SPECIALTY": {}, "AREA": {}, "DISEASE": {}}
+
+    for row in doctors or []:
+        entities["DOCTOR_NAME"].setdefault(row["doctor_name"], []).append(row["doctor_id"])
+        entities["SPECIALTY"].setdefault(row["specialty"], []).append(row["doctor_id"])
+    for row in branches or []:
+        for area in (row.get("area_names") or "").split(";"):
+            if area.strip():
+                entities["AREA"].setdefault(area.strip(), []).append(row["branch_id"])
+    for row in diseases or []:
+        entities["DISEASE"].setdefault(row["canonical_name"], []).append(row["disease_id"])
+        entities["SPECIALTY"].setdefault(row["specialty"], [])
+
+    for entity_type, names in (("SPECIALTY", DEFAULT_SPECIALTIES), ("AREA", DEFAULT_AREAS), ("DISEASE", DEFAULT_DISEASES)):
+        if not entities[entity_type]:
+            entities[entity_type] = {name: [] for name in names}
+    return entities
+
 
 class IntentParser:
-    def __init__(self):
-        self.intents = {
-            "book_appointment": [r"book", r"appointment", r"schedule", r"visit", r"see a doctor"],
-            "cancel_appointment": [r"cancel", r"reschedule"],
-            "get_info": [r"info", r"about", r"what is", r"tell me", r"symptoms", r"treatment"],
-            "check_availability": [r"available", r"when", r"time", r"open"]
-        }
-        
+    def __init__(self, data_dir=NLP_DATA_DIR, entities=None):
+        self.intents = INTENTS
+        self.entities = entities if entities is not None else load_dictionaries(data_dir)
+        # Token n-gram -> [(kind, value)]; kind is "INTENT" or an entity type
+        self.lexicon = {}
+        for intent, keywords in self.intents.items():
+            for keyword in keywords:
+                self._add(keyword, "INTENT", intent)
+        for entity_type, names in self.entities.items():
+            for name in names:
+                self._add(name, entity_type, name)
+        self._add_aliases("SPECIALTY", SPECIALTY_ALIASES)
+        self._add_aliases("DISEASE", DISEASE_ALIASES)
+        self._add_doctor_aliases()
+        self.max_ngram = max((len(key.split()) for key in self.lexicon), default=1)
+        # Feature column per phrase for batch scoring
+        self.columns = {key: j for j, key in enumerate(self.lexicon)}
+        self._weights = None
+
+    def _add(self, phrase, kind, value):
+        key = _key(phrase)
+        if key and (kind, value) not in self.lexicon.get(key, ()):
+            self.lexicon.setdefault(key, []).append((kind, value))
+
+    def _add_aliases(self, entity_type, aliases):
+        for alias, name in aliases.items():
+            if name in self.entities[entity_type]:
+                self._add(alias, entity_type, name)
+
+    def _add_doctor_aliases(self):
+        """'Dr. Ali Ansari' also matches 'ali ansari', and 'dr ali' / 'dr ansari' when only one doctor fits"""
+        owners = {}
+        for name in self.entities["DOCTOR_NAME"]:
+            words = [w for w in tokenize(name) if w not in DOCTOR_TITLES]
+            if not words:
+                continue
+            self._add(" ".join(words), "DOCTOR_NAME", name)
+            for word in {words[0], words[-1]}:
+                owners.setdefault(word, set()).add(name)
+        for word, names in owners.items():
+            if len(names) == 1:
+                for title in DOCTOR_TITLES:
+                    self._add(f"{title} {word}", "DOCTOR_NAME", next(iter(names)))
+
+    def _scan(self, tokens):
+        """Longest dictionary match at each position, left to right: [(phrase, [(kind, value)])]"""
+        lexicon, max_ngram = self.lexicon, self.max_ngram
+        matches, i, n = [], 0, len(tokens)
+        while i < n:
+            for size in range(min(max_ngram, n - i), 0, -1):
+                key = " ".join(tokens[i:i + size]) if size > 1 else tokens[i]
+                hits = lexicon.get(key)
+                if hits:
+                    matches.append((key, hits))
+                    i += size
+                    break
+            else:
+                i += 1
+        return matches
+
+    def _match(self, tokens):
+        """(distinct matched phrases, entities) for one tokenized message"""
+        phrases, entities = [], {}
+        for key, hits in self._scan(tokens):
+            if key not in phrases:
+                phrases.append(key)
+            for kind, value in hits:
+                if kind != "INTENT" and kind not in entities:
+                    entities[kind] = value
+        if "DOCTOR_NAME" not in entities:
+            doctor = self._unknown_doctor(tokens)
+            if doctor:
+                entities["DOCTOR_NAME"] = doctor
+        return phrases, entities
+
+    @staticmethod
+    def _unknown_doctor(tokens):
+        """'Dr. Ayesha' for a doctor not in the dictionary"""
+        for i, token in enumerate(tokens[:-1]):
+            if token == "dr" and tokens[i + 1].isalpha():
+                return f"Dr. {tokens[i + 1].title()}"
+        return None
+
+    def _result(self, intent, entities):
+        ids = {}
+        for kind, value in entities.items():
+            if self.entities.get(kind, {}).get(value):
+                ids[kind] = list(self.entities[kind][value])
+        return {"intent": intent, "entities": dict(entities), "entity_ids": ids}
+
+    def _intent_weights(self):
+        """Sparse phrase x intent matrix: 1 where the phrase is a keyword of the intent"""
+        if self._weights is None:
+            import numpy as np
+            from scipy import sparse
+            intent_index = {name: j for j, name in enumerate(self.intents)}
+            rows, cols = [], []
+            for key, hits in self.lexicon.items():
+                for kind, value in hits:
+                    if kind == "INTENT":
+                        rows.append(self.columns[key])
+                        cols.append(intent_index[value])
+            self._weights = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                                              shape=(len(self.columns), len(self.intents)))
+        return self._weights
+
     def parse(self, text):
-        text = text.lower()
-        intent = "unknown"
-        
-        # Simple keyword matching for intent
-        max_score = 0
-        for int_name, keywords in self.intents.items():
-            score = sum(1 for k in keywords if re.search(k, text))
-            if score > max_score:
-                max_score = score
-                intent = int_name
-                
-        entities = self.extract_entities(text)
-        return {"intent": intent, "entities": entities}
+        phrases, entities = self._match(tokenize(text))
+        # Distinct keywords per intent
+        scores = {}
+        for key in phrases:
+            for kind, value in self.lexicon[key]:
+                if kind == "INTENT":
+                    scores[value] = scores.get(value, 0) + 1
+        intent, best = "unknown", 0
+        for name in self.intents:
+            if scores.get(name, 0) > best:
+                intent, best = name, scores[name]
+        return self._result(intent, entities)
+
+    def parse_batch(self, texts):
+        """
+        parse() for a list of messages, with the intents of the whole batch scored at once:
+        a sparse message x phrase matrix times the phrase x intent keyword weights.
+        Identical messages are parsed once.
+        """
+        if not texts:
+            return []
+        import numpy as np
+        from scipy import sparse
+
+        unique = list(dict.fromkeys(texts))
+        columns = self.columns
+        indptr, indices, matched = [0], [], []
+        for text in unique:
+            phrases, entities = self._match(tokenize(text))
+            indices.extend(columns[key] for key in phrases)
+            indptr.append(len(indices))
+            matched.append(entities)
+        features = sparse.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                                     shape=(len(unique), len(columns)))
+        scores = (features @ self._intent_weights()).toarray()
+        # argmax keeps the first intent on ties, like parse()
+        best = scores.argmax(axis=1)
+        names = list(self.intents)
+        by_text = {}
+        for row, text in enumerate(unique):
+            intent = names[best[row]] if scores[row, best[row]] > 0 else "unknown"
+            by_text[text] = (intent, matched[row])
+        return [self._result(*by_text[text]) for text in texts]
 
     def extract_entities(self, text):
-        entities = {}
-        
-        # Extract Doctor Name (Dr. X)
-        doctor_match = re.search(r"dr\.?\s+([a-z]+(\s+[a-z]+)?)", text)
-        if doctor_match:
-            entities["DOCTOR_NAME"] = doctor_match.group(0).title()
-            
-        # Extract Specialty (Simple list based)
-        specialties = ["cardiology", "pediatrics", "dermatology", "neurology", "orthopedics", "general practice", "ophthalmology", "gynecology"]
-        for s in specialties:
-            if s in text:
-                entities["SPECIALTY"] = s.title()
-                
-        # Extract Branch/Area (Simple heuristic)
-        areas = ["gulshan", "korangi", "saddar", "nazimabad", "malir", "clifton", "pechs"]
-        for a in areas:
-            if a in text:
-                entities["AREA"] = a.title()
-                
-        # Extract Disease (Simple heuristic)
-        diseases = ["cold", "flu", "fever", "dengue", "fracture", "pain", "headache", "migraine"]
-        for d in diseases:
-            if d in text:
-                entities["DISEASE"] = d.title()
-                
-        return entities
+        return self.parse(text)["entities"]
+
 
 if __name__ == "__main__":
     parser = IntentParser()
@@ -0,0 +1,310 @@
+"""
+Pipeline Orchestrator
+Cross-platform runner for the offline pipeline
+- Stages form a DAG derived from their declared inputs and outputs
+- Content-hash up-to-date checks (inputs, outputs and stage code)
+- Independent stages (KB generation and EDA) run in parallel
+- The LLM answer cache is warmed for each new KB before the API is started
+- Critical-path timing report
+
+Usage:
+    python -m src.pipeline                # run stages that are out of date
+    python -m src.pipeline --force        # rerun everything
+    python -m src.pipeline --force --profile  # rerun and profile every stage
+    python -m src.pipeline --serve        # then start the API and dashboard
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+STATE_PATH = "data/cache/pipeline_state.json"
+RUN_REPORT_PATH = "data/cleaned/pipeline_run.json"
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RAW_TABLES = ["doctors.csv", "branches.csv", "diseases.csv", "doctor_timings.csv", "patients.csv"]
+
+
+class Stage:
+    def __init__(self, name, module, inputs, outputs, code=None):
+        self.name = name
+        self.module = module
+        self.inputs = inputs
+        self.outputs = outputs
+        self.code = code or []
+        self.deps = []
+
+    @property
+    def code_files(self):
+        """Source files whose changes invalidate the stage"""
+        modules = [self.module.split(".")[-1], "profiling"] + self.code
+        return [os.path.join(SRC_DIR, m + ".py") for m in modules]
+
+
+STAGES = [
+    Stage(
+        "clean", "src.data_cleaning",
+        inputs=[f"data/raw/{t}" for t in RAW_TABLES],
+        outputs=[f"data/cleaned/{t}" for t in RAW_TABLES] + ["data/cleaned/cleaning_report.json"]
+    ),
+    Stage(
+        "knowledge_base", "src.json_kb_generator",
+        inputs=[f"data/cleaned/{t}" for t in ["doctors.csv", "branches.csv", "diseases.csv", "doctor_timings.csv", "patients.csv"]],
+        outputs=["data/knowledge_base/analytics_kb.json", "data/knowledge_base/analytics_kb.bin"],
+        code=["json_kb", "kb_store", "timeseries", "utilization", "anomaly", "forecasting"]
+    ),
+    Stage(
+        "warm_cache", "src.cache_warmer",
+        inputs=["data/knowledge_base/analytics_kb.json", "data/knowledge_base/analytics_kb.bin",
+                "data/knowledge_base/warmup_questions.txt"],
+        outputs=["data/cache/warmup_report.json"],
+        code=["llm", "llm_backends", "semantic_cache", "response_cache", "json_kb", "kb_store"]
+    ),
+    Stage(
+        "eda", "src.eda_enhanced",
+        inputs=[f"data/cleaned/{t}" for t in RAW_TABLES],
+        outputs=[
+            "data/eda_output/disease_trends_enhanced.png",
+            "data/eda_output/doctor_workload_enhanced.png",
+            "data/eda_output/geographic_distribution_enhanced.png",
+            "data/eda_output/eda_enhanced_summary.txt",
+            "data/knowledge_base/analytics_insights.md"
+        ]
+    ),
+]
+
+
+def build_dag(stages):
+    """Link each stage to the stages producing its inputs; returns stages in topological order"""
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            producers[path] = stage
+    for stage in stages:
+        stage.deps = sorted({producers[p].name for p in stage.inputs if p in producers and producers[p] is not stage})
+
+    ordered, done = [], set()
+    pending = list(stages)
+    while pending:
+        ready = [s for s in pending if set(s.deps) <= done]
+        if not ready:
+            raise ValueError(f"Cycle in pipeline stages: {[s.name for s in pending]}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage.name)
+            pending.remove(stage)
+    return ordered
+
+
+class FileHasher:
+    """SHA-256 of file contents, memoized by (size, mtime) across runs"""
+    def __init__(self, known):
+        self.known = known
+
+    def digest(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        entry = self.known.get(path)
+        if entry and entry["stamp"] == stamp:
+            return entry["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.known[path] = {"stamp": stamp, "sha256": h.hexdigest()}
+        return self.known[path]["sha256"]
+
+    def fingerprint(self, paths):
+        h = hashlib.sha256()
+        for path in sorted(paths):
+            h.update(f"{path}={self.digest(path)}\n".encode())
+        return h.hexdigest()
+
+
+class PipelineRunner:
+    def __init__(self, stages=STAGES, jobs=2, force=False, stage_args=None):
+        self.stages = build_dag(stages)
+        self.jobs = jobs
+        self.force = force
+        self.stage_args = stage_args or []
+        self.state = self._load_state()
+        self.hasher = FileHasher(self.state.setdefault("files", {}))
+        self.results = {}
+
+    def _load_state(self):
+        if os.path.exists(STATE_PATH):
+            try:
+                with open(STATE_PATH, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+        with open(STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+    def input_fingerprint(self, stage):
+        return self.hasher.fingerprint(stage.inputs + stage.code_files)
+
+    def is_up_to_date(self, stage):
+        recorded = self.state.get("stages", {}).get(stage.name)
+        if self.force or not recorded:
+            return False
+        if not all(os.path.exists(p) for p in stage.outputs):
+            return False
+        return (recorded["inputs"] == self.input_fingerprint(stage)
+                and recorded["outputs"] == self.hasher.fingerprint(stage.outputs))
+
+    def run_stage(self, stage):
+        """Run one stage in its own interpreter; returns (status, seconds, output)"""
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(SRC_DIR), env.get("PYTHONPATH")]))
+        env.setdefault("MPLBACKEND", "Agg")
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-m", stage.module, *self.stage_args],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace", env=env
+        )
+        return ("success" if proc.returncode == 0 else "failed"), time.perf_counter() - start, proc.stdout
+
+    def run(self):
+        missing = [p for p in self.stages[0].inputs if not os.path.exists(p)] if self.stages else []
+        if missing:
+            print(f"⚠️ Missing pipeline inputs: {', '.join(missing)}")
+
+        run_start = time.perf_counter()
+        remaining = {s.name: s for s in self.stages}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while remaining or running:
+                # Launch (or skip) every stage whose dependencies are settled
+                for name, stage in list(remaining.items()):
+                    dep_status = [self.results.get(d, {}).get("status") for d in stage.deps]
+                    if any(s is None for s in dep_status):
+                        continue
+                    del remaining[name]
+                    if any(s in ("failed", "blocked") for s in dep_status):
+                        self.results[name] = {"status": "blocked", "seconds": 0.0}
+                        print(f"⛔ {name}: skipped (dependency failed)")
+                    elif self.is_up_to_date(stage):
+                        self.results[name] = {"status": "up_to_date", "seconds": 0.0}
+                        print(f"✅ {name}: up to date")
+                    else:
+                        print(f"▶️  {name}: running {stage.module}")
+                        started = time.perf_counter() - run_start
+                        running[executor.submit(self.run_stage, stage)] = (stage, started)
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, started = running.pop(future)
+                    status, seconds, output = future.result()
+                    self.results[stage.name] = {"status": status, "seconds": round(seconds, 3), "started_at": round(started, 3)}
+                    print(output.rstrip())
+                    print(f"{'✅' if status == 'success' else '❌'} {stage.name}: {status} in {seconds:.2f}s")
+                    if status == "success":
+                        self.state.setdefault("stages", {})[stage.name] = {
+                            "inputs": self.input_fingerprint(stage),
+                            "outputs": self.hasher.fingerprint(stage.outputs),
+                            "completed_at": datetime.now().isoformat()
+                        }
+                        self._save_state()
+
+        wall = time.perf_counter() - run_start
+        self._save_state()
+        return self.report(wall)
+
+    def critical_path(self):
+        """Longest chain of stage durations through the DAG"""
+        finish, via = {}, {}
+        for stage in self.stages:
+            prev = max(stage.deps, key=lambda d: finish[d], default=None)
+            finish[stage.name] = self.results[stage.name]["seconds"] + (finish[prev] if prev else 0.0)
+            via[stage.name] = prev
+        if not finish:
+            return [], 0.0
+        last = max(finish, key=finish.get)
+        path = [last]
+        while via[path[-1]]:
+            path.append(via[path[-1]])
+        return list(reversed(path)), finish[last]
+
+    def report(self, wall):
+        path, path_seconds = self.critical_path()
+        serial = sum(r["seconds"] for r in self.results.values())
+        report = {
+            "generated_at": datetime.now().isoformat(),
+            "wall_seconds": round(wall, 3),
+            "serial_seconds": round(serial, 3),
+            "critical_path": path,
+            "critical_path_seconds": round(path_seconds, 3),
+            "stages": self.results
+        }
+        os.makedirs(os.path.dirname(RUN_REPORT_PATH), exist_ok=True)
+        with open(RUN_REPORT_PATH, "w") as f:
+            json.dump(report, f, indent=4)
+
+        print("\n" + "=" * 70)
+        print("📋 PIPELINE RUN SUMMARY")
+        print("=" * 70)
+        for stage in self.stages:
+            r = self.results[stage.name]
+            print(f"  {stage.name:<16} {r['status']:<11} {r['seconds']:>8.2f}s")
+        print(f"\n⏱️ Wall time: {wall:.2f}s (serial stage time {serial:.2f}s)")
+        print(f"🧭 Critical path: {' → '.join(path)} ({path_seconds:.2f}s)")
+        print(f"📄 Run report: {RUN_REPORT_PATH}")
+        return report
+
+
+def serve():
+    """Start the API and dashboard (cross-platform equivalent of run_pipeline.bat steps 4-5)"""
+    api = subprocess.Popen([sys.executable, "-m", "src.app"])
+    time.sleep(3)
+    dashboard = subprocess.Popen([sys.executable, "-m", "streamlit", "run", "src/dashboard.py"])
+    print("\n🚀 API: http://localhost:8000 | Dashboard: http://localhost:8501 (Ctrl+C to stop)")
+    try:
+        api.wait()
+        dashboard.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in (api, dashboard):
+            proc.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline pipeline as a DAG")
+    parser.add_argument("--force", action="store_true", help="Rerun stages even if up to date")
+    parser.add_argument("--jobs", type=int, default=2, help="Stages to run in parallel")
+    parser.add_argument("--profile", action="store_true", help="Forward --profile to every stage")
+    parser.add_argument("--serve", action="store_true", help="Start the API and dashboard afterwards")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🏥 SAYLANI MEDICAL HELP DESK - PIPELINE")
+    print("=" * 70)
+    runner = PipelineRunner(jobs=args.jobs, force=args.force, stage_args=["--profile"] if args.profile else [])
+    report = runner.run()
+
+    failed = [name for name, r in report["stages"].items() if r["status"] in ("failed", "blocked")]
+    if failed:
+        sys.exit(1)
+    if args.serve:
+        serve()
+
+
+if __name__ == "__main__":
+    main()
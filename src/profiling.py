@@ -0,0 +1,161 @@
+"""
+Pipeline Profiling Hooks
+- Shared --profile switch for the offline pipeline entry points
+- Wall/CPU time, peak RSS and rows/sec per stage function
+- Optional cProfile dump (.prof, readable by pstats/snakeviz/flameprof)
+- Machine-readable run report next to cleaning_report.json
+"""
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_DIR = "data/cleaned"
+
+
+def peak_rss_mb():
+    """Process memory high-water mark in MB (None if unavailable)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 2)
+    except Exception:
+        return None
+
+
+def _count_rows(args, result):
+    """Rows handled by a stage: largest DataFrame argument, else the DataFrame(s) returned"""
+    inputs = [len(arg) for arg in args if isinstance(arg, pd.DataFrame)]
+    if inputs:
+        return max(inputs)
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple):
+        frames = [r for r in result if isinstance(r, pd.DataFrame)]
+        if frames:
+            return sum(len(f) for f in frames)
+    return None
+
+
+class StageProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.stages = []
+        self.depth = 0
+
+    def reset(self):
+        self.stages = []
+        self.depth = 0
+
+    def run(self, name, fn, args, kwargs):
+        """Run one stage function and record its cost"""
+        # Appended up front so nested stages are listed in call order
+        record = {"stage": name, "depth": self.depth}
+        self.stages.append(record)
+
+        rss_before = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        self.depth += 1
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            self.depth -= 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        rss_after = peak_rss_mb()
+
+        rows = _count_rows(args, result)
+        record.update({
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_rss_mb": rss_after,
+            "peak_rss_growth_mb": round(rss_after - rss_before, 2) if rss_after is not None else None,
+            "rows": rows,
+            "rows_per_second": round(rows / wall, 1) if rows and wall > 0 else None
+        })
+        return result
+
+
+profiler = StageProfiler()
+
+
+def profiled(fn):
+    """Record the decorated function as a pipeline stage when profiling is on"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return fn(*args, **kwargs)
+        return profiler.run(fn.__name__, fn, args, kwargs)
+    return wrapper
+
+
+def add_profile_arguments(parser):
+    """Add the shared --profile switches to an entry point's argument parser"""
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage wall/CPU time, peak RSS and rows/sec")
+    parser.add_argument("--cprofile", metavar="DIR", default=None,
+                        help="Also dump cProfile stats (.prof) for the run into DIR (implies --profile)")
+
+
+@contextmanager
+def profile_run(entry_point, args):
+    """Profile one pipeline entry point and write its run report"""
+    if not (args.profile or args.cprofile):
+        yield
+        return
+
+    profiler.enabled = True
+    profiler.reset()
+    cprof = cProfile.Profile() if args.cprofile else None
+    started_at = datetime.now().isoformat()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if cprof:
+        cprof.enable()
+    try:
+        yield
+    finally:
+        if cprof:
+            cprof.disable()
+        profiler.enabled = False
+
+        report = {
+            "entry_point": entry_point,
+            "started_at": started_at,
+            "wall_seconds": round(time.perf_counter() - wall_start, 4),
+            "cpu_seconds": round(time.process_time() - cpu_start, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": profiler.stages
+        }
+        if cprof:
+            os.makedirs(args.cprofile, exist_ok=True)
+            prof_path = os.path.join(args.cprofile, f"{entry_point}.prof")
+            cprof.dump_stats(prof_path)
+            report["cprofile"] = prof_path
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        report_path = os.path.join(REPORT_DIR, f"profile_{entry_point}.json")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=4)
+
+        print(f"\n⏱️ Profile for {entry_point} ({report['wall_seconds']}s wall, peak RSS {report['peak_rss_mb']} MB)")
+        for stage in profiler.stages:
+            throughput = f", {stage['rows_per_second']:,.0f} rows/s" if stage.get("rows_per_second") else ""
+            print(f"   {'  ' * stage['depth']}{stage['stage']}: {stage.get('wall_seconds')}s wall, {stage.get('cpu_seconds')}s CPU{throughput}")
+        print(f"   Report saved: {report_path}")
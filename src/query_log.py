@@ -0,0 +1,82 @@
+"""
+Query Log
+Opt-in (QUERY_LOG=1) record of chat and search requests, used for load replay and cache warm-up
+- One compact JSON line per request: time, endpoint, anonymized query, query type, status, latency
+- Emails, phone and ID numbers and long digit runs are masked; no client address or headers are kept
+- Each line is written with a single append, so several API workers can share the file
+- Rotates to query_log.jsonl.1 past QUERY_LOG_MAX_MB
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "data/logs/query_log.jsonl")
+QUERY_LOG_MAX_MB = float(os.getenv("QUERY_LOG_MAX_MB", "50"))
+
+# Applied in order; most specific patterns first
+REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"), "<email>"),
+    (re.compile(r"\b\d{5}-\d{7}-\d\b"), "<id>"),
+    (re.compile(r"(?:\+\d{1,3}[\s-]?)?\b\d{3,4}[\s-]?\d{7}\b"), "<phone>"),
+    (re.compile(r"\d{5,}"), "<number>"),
+]
+
+
+def anonymize(text):
+    """Mask contact details and identifiers in free text (short numbers like 'top 5' are kept)"""
+    for pattern, replacement in REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class QueryLog:
+    def __init__(self, path=QUERY_LOG_PATH, enabled=True, max_mb=QUERY_LOG_MAX_MB):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=os.getenv("QUERY_LOG", "0") == "1")
+
+    def record(self, path, query=None, queries=None, query_type=None, status=200, seconds=0.0):
+        """Append one request; a no-op unless the log is enabled"""
+        if not self.enabled:
+            return
+        entry = {"ts": datetime.now().isoformat(timespec="milliseconds"), "path": path}
+        if query is not None:
+            entry["query"] = anonymize(query)
+        if queries is not None:
+            entry["queries"] = [anonymize(q) for q in queries]
+        if query_type is not None:
+            entry["query_type"] = query_type
+        entry["status"] = status
+        entry["ms"] = round(seconds * 1000, 2)
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                if self.max_bytes and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+            except OSError:
+                pass
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def read(self):
+        """Logged entries, oldest first (rotated file included)"""
+        entries = []
+        for path in (self.path + ".1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return entries
@@ -0,0 +1,135 @@
+"""
+LLM Call Resilience
+- CircuitBreaker: opens on a high error or slow-call rate over recent calls, so callers
+  go straight to the fallback instead of waiting out timeouts; probes again after a cooldown
+- TokenBucket: requests-per-minute limiter matching the API quota, with waiting up to a
+  deadline and AIMD adjustment (halve on quota errors, creep back on successes)
+"""
+import itertools
+import threading
+import time
+from collections import deque
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, window=20, min_calls=5, error_rate=0.5, slow_call_seconds=4.0, slow_rate=0.5,
+                 cooldown=30.0, clock=time.monotonic):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._tickets = itertools.count(1)
+        self._probe = None  # ticket of the call admitted as the half-open probe
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """
+        Ticket for a call that may go out now (pass it to record()), or None;
+        in half-open state only one probe at a time
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return next(self._tickets)
+            if self._state == OPEN:
+                if self.clock() - self._opened_at < self.cooldown:
+                    return None
+                self._state = HALF_OPEN
+            if self._probe is not None:
+                return None
+            self._probe = next(self._tickets)
+            return self._probe
+
+    def record(self, success, seconds, ticket=None):
+        """Report the outcome of an allowed call"""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                # Only the admitted probe decides; calls started before the breaker opened do not
+                if ticket is None or ticket != self._probe:
+                    return
+                self._probe = None
+                if success and not slow:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip()
+                return
+            self._calls.append((not success, slow))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                n = len(self._calls)
+                failures = sum(failed for failed, _ in self._calls)
+                slow_calls = sum(was_slow for _, was_slow in self._calls)
+                if failures / n >= self.error_rate or slow_calls / n >= self.slow_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self.times_opened += 1
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, burst=None, min_rate_per_minute=1.0, recovery_per_success=0.5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate_per_minute)
+        self.rate = float(rate_per_minute)
+        self.min_rate = float(min_rate_per_minute)
+        self.recovery_per_success = recovery_per_success
+        self.capacity = float(burst if burst is not None else max(1.0, rate_per_minute / 4))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return the seconds until one will be"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) * 60 / self.rate
+
+    def acquire(self, deadline):
+        """Wait for a token until `deadline` (a clock() value); False if it would come too late"""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            if self.clock() + wait > deadline:
+                return False
+            self.sleep(wait)
+
+    def penalize(self, factor=0.5):
+        """Quota error: cut the rate and drop banked tokens"""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * factor)
+            self._tokens = min(self._tokens, 0.0)
+
+    def reward(self):
+        """Successful call: creep back towards the configured rate"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_per_success)
@@ -0,0 +1,78 @@
+"""
+Shared LLM Response Cache
+SQLite (WAL mode) key/value store, safe to share between API worker processes
+- Replaces the per-process dict persisted to llm_cache.json
+- Existing llm_cache.json entries are imported when the database is created
+- Keeps the newest RESPONSE_CACHE_MAX_ENTRIES answers, so entries for old KB versions age out
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+
+
+class ResponseCache:
+    def __init__(self, path="data/cache/llm_cache.sqlite3", legacy_json=None, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+
+        is_new = not os.path.exists(self.path)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, answer TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.commit()
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            self._import_json(legacy_json)
+
+    def _conn(self):
+        """One connection per thread (FastAPI runs sync endpoints in a thread pool)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not import legacy cache {path}: {e}")
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR IGNORE INTO responses (key, answer, created_at) VALUES (?, ?, ?)",
+            [(k, v, now) for k, v in entries.items() if isinstance(v, str)]
+        )
+        conn.commit()
+        print(f"✅ Imported {len(entries)} cached responses from {path}")
+
+    def get(self, key, default=None):
+        row = self._conn().execute("SELECT answer FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def __setitem__(self, key, answer):
+        conn = self._conn()
+        cursor = conn.execute("INSERT OR REPLACE INTO responses (key, answer, created_at) VALUES (?, ?, ?)",
+                              (key, answer, time.time()))
+        # Keep the newest max_entries rows (a replaced row gets a new rowid)
+        conn.execute("DELETE FROM responses WHERE rowid <= ?", (cursor.lastrowid - self.max_entries,))
+        conn.commit()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
@@ -0,0 +1,154 @@
+"""
+Response Encoding
+- FastJSONResponse: orjson serialization (falls back to the stdlib json module)
+- CompressionMiddleware: brotli or gzip chosen from Accept-Encoding, large bodies only
+- Streaming bodies are flushed per chunk so NDJSON lines still arrive as they are sent
+"""
+import json
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from src.metrics import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def json_bytes(content):
+    """Compact UTF-8 JSON (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson; return it directly to skip FastAPI's jsonable_encoder pass"""
+    def render(self, content):
+        return json_bytes(content)
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level=GZIP_LEVEL):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(self, data, final):
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality=BROTLI_QUALITY):
+        self._c = brotli.Compressor(quality=quality)
+
+    def encode(self, data, final):
+        return self._c.process(data) + (self._c.finish() if final else self._c.flush())
+
+
+def available_encodings():
+    """Supported content codings, preferred first"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding, supported):
+    """Best supported coding from an Accept-Encoding header (None = identity)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    best = None
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+class CompressionMiddleware:
+    """Compress JSON/NDJSON/text bodies of at least `minimum_size` bytes with brotli or gzip"""
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_BYTES, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = {"gzip": lambda: _GzipEncoder(gzip_level)}
+        if brotli is not None:
+            self.encoders["br"] = lambda: _BrotliEncoder(brotli_quality)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), available_encodings())
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "encoder": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                if "content-encoding" in headers or not media_type.startswith(COMPRESSIBLE_TYPES):
+                    state["passthrough"] = True
+                    await send(message)
+                else:
+                    state["start"] = message  # held until the first body chunk decides
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state["start"]
+            if start is not None:
+                state["start"] = None
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                state["encoder"] = self.encoders[coding]()
+                headers["Content-Encoding"] = coding
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                compressed = state["encoder"].encode(body, final=not more_body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(compressed))
+                metrics.inc("response_bytes_uncompressed", len(body))
+                metrics.inc("response_bytes_compressed", len(compressed))
+                await send(start)
+                await send({**message, "body": compressed})
+                return
+
+            compressed = state["encoder"].encode(body, final=not more_body)
+            metrics.inc("response_bytes_uncompressed", len(body))
+            metrics.inc("response_bytes_compressed", len(compressed))
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
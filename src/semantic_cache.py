@@ -0,0 +1,164 @@
+"""
+Semantic Answer Cache
+Reuses a cached LLM answer for a paraphrased question ("busiest doctor?" /
+"which doctor has the most patients") when the knowledge base version matches
+- Queries are reduced to canonical tokens (synonyms, plurals and number words folded, filler dropped)
+- Key tokens (names, numbers, directions, time words, anything unfamiliar) form a signature that
+  must match exactly, so "top 3" never answers "top 5" and Dengue never answers Malaria
+- Within a signature, answers are matched by weighted cosine similarity over the tokens
+- Stored in SQLite next to the exact-match cache, so every API worker shares the entries
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+# Soft tokens may differ between paraphrases, so they count for less than key tokens
+SOFT_WEIGHT = 0.5
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did", "of", "in", "on", "at",
+    "to", "for", "by", "with", "from", "and", "or", "which", "who", "whom", "what", "whats", "how", "me", "us",
+    "our", "we", "i", "you", "your", "it", "its", "this", "that", "these", "those", "there", "has", "have",
+    "had", "can", "could", "would", "please", "tell", "show", "give", "list", "let", "know", "see", "find",
+    "get", "about", "any", "all", "currently", "right", "now", "overall", "so", "far", "according", "between",
+}
+
+# Word -> canonical token(s); applied after plural folding
+SYNONYMS = {
+    "busiest": "top visit", "busy": "visit", "workload": "visit", "volume": "visit", "most": "top", "highest": "top", "largest": "top",
+    "biggest": "top", "maximum": "top", "max": "top", "leading": "top", "best": "top", "greatest": "top",
+    "least": "bottom", "lowest": "bottom", "fewest": "bottom", "smallest": "bottom", "minimum": "bottom",
+    "min": "bottom", "quietest": "bottom", "rarest": "bottom",
+    "patient": "visit", "case": "visit", "appointment": "visit", "consultation": "visit", "footfall": "visit",
+    "visited": "visit", "visiting": "visit", "came": "visit", "come": "visit", "seen": "visit",
+    "physician": "doctor", "dr": "doctor", "staff": "doctor",
+    "clinic": "branch", "centre": "branch", "center": "branch",
+    "illness": "disease", "condition": "disease", "diagnosi": "disease", "diagnose": "disease",
+    "common": "top disease", "prevalent": "top disease", "frequent": "top",
+    "location": "area", "region": "area", "neighbourhood": "area", "neighborhood": "area", "where": "area",
+    "number": "count", "many": "count", "total": "count", "much": "count",
+    "percent": "share", "percentage": "share", "proportion": "share", "fraction": "share", "%": "share",
+    "versus": "compare", "vs": "compare", "comparison": "compare", "difference": "compare",
+    "utilisation": "utilization", "capacity": "utilization",
+    "predict": "forecast", "prediction": "forecast", "expected": "forecast", "upcoming": "forecast",
+    "spike": "surge", "outbreak": "surge", "anomaly": "surge", "anomalie": "surge", "unusual": "surge",
+    "speciality": "specialty", "specialtie": "specialty", "department": "specialty",
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "twenty": "20",
+}
+
+# Canonical tokens that can vary between paraphrases without changing the answer
+SOFT_TOKENS = {"visit", "count", "data", "analytic", "statistic", "stat", "detail", "info", "information",
+               "summary", "breakdown", "ranking", "rank", "report", "name", "saylani", "medical", "help", "desk"}
+
+WORD = re.compile(r"[a-z0-9%]+")
+
+
+def _fold(word):
+    """Crude plural folding: doctors -> doctor, diseases -> disease, illnesses -> illness"""
+    if word.endswith("sses"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def canonical_tokens(query):
+    """Canonical, order-free tokens of a query (duplicates removed, sorted)"""
+    tokens = set()
+    for word in WORD.findall(query.lower()):
+        if word in STOPWORDS:
+            continue
+        word = _fold(word)
+        for token in SYNONYMS.get(word, word).split():
+            if token not in STOPWORDS:
+                tokens.add(token)
+    return sorted(tokens)
+
+
+def signature(tokens):
+    """Key tokens that must be identical for two queries to share an answer"""
+    return " ".join(t for t in tokens if t not in SOFT_TOKENS)
+
+
+def similarity(a, b):
+    """Weighted cosine similarity of two canonical token lists"""
+    weight = lambda t: SOFT_WEIGHT if t in SOFT_TOKENS else 1.0
+    a, b = set(a), set(b)
+    dot = sum(weight(t) ** 2 for t in a & b)
+    norm = math.sqrt(sum(weight(t) ** 2 for t in a) * sum(weight(t) ** 2 for t in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticCache:
+    def __init__(self, path="data/cache/llm_cache.sqlite3", threshold=SEMANTIC_CACHE_THRESHOLD,
+                 max_entries=SEMANTIC_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("""CREATE TABLE IF NOT EXISTS semantic_answers (
+            id INTEGER PRIMARY KEY, version TEXT NOT NULL, signature TEXT NOT NULL,
+            query TEXT NOT NULL, tokens TEXT NOT NULL, answer TEXT NOT NULL, created_at REAL NOT NULL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS semantic_lookup ON semantic_answers (version, signature)")
+        conn.commit()
+
+    def _conn(self):
+        """One connection per thread (FastAPI runs sync endpoints in a thread pool)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, query, version):
+        """Best cached match for this KB version: (answer, matched query, similarity), or None"""
+        tokens = canonical_tokens(query)
+        if not tokens:
+            return None
+        rows = self._conn().execute(
+            "SELECT query, tokens, answer FROM semantic_answers WHERE version = ? AND signature = ?",
+            (version, signature(tokens))
+        ).fetchall()
+        best = None
+        for cached_query, cached_tokens, answer in rows:
+            score = similarity(tokens, cached_tokens.split())
+            if best is None or score > best[2]:
+                best = (answer, cached_query, score)
+        return best
+
+    def get(self, query, version):
+        """Cached answer if the best match clears the threshold"""
+        best = self.lookup(query, version)
+        return best[0] if best and best[2] >= self.threshold else None
+
+    def add(self, query, version, answer):
+        tokens = canonical_tokens(query)
+        if not tokens:
+            return
+        conn = self._conn()
+        cursor = conn.execute(
+            "INSERT INTO semantic_answers (version, signature, query, tokens, answer, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (version, signature(tokens), query, " ".join(tokens), answer, time.time())
+        )
+        # Keep the newest max_entries rows
+        conn.execute("DELETE FROM semantic_answers WHERE id <= ?", (cursor.lastrowid - self.max_entries,))
+        conn.commit()
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM semantic_answers").fetchone()[0]
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM semantic_answers")
+        conn.commit()
@@ -0,0 +1,158 @@
+"""
+Time-Windowed Analytics
+Daily cube of visit counts (day x category) per dimension, kept as prefix sums
+- Any window total is one subtraction per dimension: P[end] - P[start]
+- Rolling 7/30/90-day windows vs the preceding window of equal length
+- Month-over-month (like-for-like month-to-date when the last month is partial)
+- Stored in the binary KB so the API can answer arbitrary windows without a rerun
+"""
+import numpy as np
+import pandas as pd
+
+# Dimension name -> patients.csv column
+DIMENSIONS = {
+    "disease": "cleaned_disease_name",
+    "doctor": "doctor_id",
+    "area": "area",
+    "branch": "branch_id",
+}
+WINDOWS = (7, 30, 90)
+
+
+def _change_pct(current, previous):
+    return round((current - previous) / previous * 100, 2) if previous else None
+
+
+class DailyCube:
+    def __init__(self, start, labels, prefix, names=None):
+        """`prefix[dim]` has one row per day plus a leading zero row; `labels[dim]` holds its column keys
+        (e.g. doctor IDs) and `names[dim]` their display names where they differ"""
+        self.start = np.datetime64(start, "D")
+        self.labels = labels
+        self.prefix = prefix
+        self.names = names or {}
+
+    @classmethod
+    def from_visits(cls, patients_df, dimensions=DIMENSIONS, names=None):
+        """Build the cube from visit rows; `names` optionally maps dimension -> {id: display name}"""
+        mappings = names or {}
+        days = pd.to_datetime(patients_df["visit_timestamp"], errors="coerce").dt.normalize()
+        valid = days.notna().to_numpy()
+        if not valid.any():
+            return None
+        days = days[valid]
+        start = days.min()
+        day_index = (days - start).dt.days.to_numpy()
+        n_days = int(day_index.max()) + 1
+
+        labels, prefix, names = {}, {}, {}
+        for dim, column in dimensions.items():
+            if column not in patients_df.columns:
+                continue
+            codes, uniques = pd.factorize(patients_df.loc[valid, column].astype(str))
+            k = len(uniques)
+            counts = np.bincount(day_index * k + codes, minlength=n_days * k).reshape(n_days, k)
+            prefix[dim] = np.vstack([np.zeros((1, k), dtype=np.int64), np.cumsum(counts, axis=0, dtype=np.int64)])
+            labels[dim] = np.array(uniques, dtype=str)
+            if dim in mappings:
+                names[dim] = np.array([mappings[dim].get(u, u) for u in uniques], dtype=str)
+        return cls(start.to_datetime64(), labels, prefix, names)
+
+    def display(self, dim):
+        """Display names of a dimension's columns (the keys themselves when no names were given)"""
+        return self.names.get(dim, self.labels[dim])
+
+    @property
+    def n_days(self):
+        return len(next(iter(self.prefix.values()))) - 1
+
+    @property
+    def end(self):
+        """Last day covered (inclusive)"""
+        return self.start + np.timedelta64(self.n_days - 1, "D")
+
+    def _offset(self, day):
+        return int((np.datetime64(day, "D") - self.start) // np.timedelta64(1, "D"))
+
+    def totals(self, dim, first, last):
+        """Per-category counts for days first..last (inclusive), clipped to the cube"""
+        lo = min(max(self._offset(first), 0), self.n_days)
+        hi = min(max(self._offset(last) + 1, 0), self.n_days)
+        p = self.prefix[dim]
+        return p[max(hi, lo)] - p[lo]
+
+    def compare(self, dim, current, previous, top=10):
+        """Current vs previous period per category, busiest first"""
+        cur = self.totals(dim, *current)
+        prev = self.totals(dim, *previous)
+        order = np.argsort(-cur, kind="stable")[:top]
+        display = self.display(dim)
+        return {
+            "total": {"current": int(cur.sum()), "previous": int(prev.sum()),
+                      "change_pct": _change_pct(int(cur.sum()), int(prev.sum()))},
+            "top": [
+                {"name": str(display[i]), "current": int(cur[i]), "previous": int(prev[i]),
+                 "change_pct": _change_pct(int(cur[i]), int(prev[i]))}
+                for i in order
+            ],
+        }
+
+    def window(self, days, top=10, dimensions=None):
+        """Trailing `days`-day window ending on the last covered day vs the window before it"""
+        one = np.timedelta64(1, "D")
+        span = np.timedelta64(days, "D")
+        current = (self.end - span + one, self.end)
+        previous = (current[0] - span, current[0] - one)
+        return {
+            "current_period": [str(current[0]), str(current[1])],
+            "previous_period": [str(previous[0]), str(previous[1])],
+            "previous_complete": bool(previous[0] >= self.start),
+            "dimensions": {dim: self.compare(dim, current, previous, top) for dim in (dimensions or self.prefix)},
+        }
+
+    def rolling_windows(self, windows=WINDOWS, top=10):
+        return {f"{days}d": self.window(days, top) for days in windows}
+
+    def month_over_month(self, top=10):
+        """Last calendar month in the data vs the month before (month-to-date if partial)"""
+        end = pd.Timestamp(self.end)
+        month_start = end.replace(day=1)
+        prev_start = month_start - pd.offsets.MonthBegin(1)
+        complete = end == month_start + pd.offsets.MonthEnd(0)
+        if complete:
+            prev_end = month_start - pd.Timedelta(days=1)
+        else:
+            # Like-for-like: the same number of days into the previous month
+            prev_end = min(prev_start + pd.Timedelta(days=end.day - 1), month_start - pd.Timedelta(days=1))
+        current = (np.datetime64(month_start.date()), np.datetime64(end.date()))
+        previous = (np.datetime64(prev_start.date()), np.datetime64(prev_end.date()))
+        return {
+            "current_month": month_start.strftime("%Y-%m"),
+            "previous_month": prev_start.strftime("%Y-%m"),
+            "comparison": "full_month" if complete else "month_to_date",
+            "current_period": [str(current[0]), str(current[1])],
+            "previous_period": [str(previous[0]), str(previous[1])],
+            "dimensions": {dim: self.compare(dim, current, previous, top) for dim in self.prefix},
+        }
+
+    def to_store(self):
+        """(sections, arrays) for the binary KB"""
+        sections = {"cubes/meta": {"start": str(self.start), "dimensions": list(self.prefix)}}
+        arrays = {}
+        for dim in self.prefix:
+            arrays[f"cubes/{dim}/labels"] = self.labels[dim]
+            if dim in self.names:
+                arrays[f"cubes/{dim}/names"] = self.names[dim]
+            arrays[f"cubes/{dim}/prefix"] = self.prefix[dim]
+        return sections, arrays
+
+    @classmethod
+    def from_store(cls, store):
+        """Cube backed by the mapped binary KB (no copy), or None if it was not stored"""
+        meta = store.get("cubes/meta")
+        if not meta:
+            return None
+        labels = {dim: store.array(f"cubes/{dim}/labels") for dim in meta["dimensions"]}
+        prefix = {dim: store.array(f"cubes/{dim}/prefix") for dim in meta["dimensions"]}
+        names = {dim: store.array(f"cubes/{dim}/names") for dim in meta["dimensions"] if f"cubes/{dim}/names" in store}
+        return cls(meta["start"], labels, prefix, names)
@@ -0,0 +1,225 @@
+"""
+Doctor Capacity and Utilization
+Joins visits to the scheduled slots in doctor_timings.csv
+- Slots become minute-of-week intervals in one non-overlapping IntervalIndex
+  (keyed by doctor), so matching millions of visits is a single vectorized lookup
+- Capacity assumes a fixed consultation length per patient
+- Per-doctor and per-branch utilization, overbooked hours and idle capacity by hour
+"""
+import numpy as np
+import pandas as pd
+
+CONSULT_MINUTES = 15
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+WEEK_HOURS = 7 * 24
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _clock_minutes(values):
+    """'HH:MM', 'HH' or 'H:MM AM/PM' -> minutes after midnight (NaN when the time does not parse)"""
+    parts = values.astype(str).str.strip().str.extract(r"^(\d{1,2})(?::(\d{2}))?(?:\s*([AaPp])\.?[Mm]\.?)?$")
+    hour = pd.to_numeric(parts[0], errors="coerce")
+    minute = pd.to_numeric(parts[1], errors="coerce").fillna(0)
+    meridiem = parts[2].str.upper()
+    twelve_hour = meridiem.notna()
+    ok = (minute < 60) & ((twelve_hour & hour.between(1, 12)) | (~twelve_hour & hour.between(0, 24)))
+    hour = hour.where(~twelve_hour, hour % 12 + (meridiem == "P") * 12)
+    minutes = hour * 60 + minute
+    return minutes.where(ok & (minutes <= DAY_MINUTES))
+
+
+def _pct(part, whole):
+    return round(float(part) / float(whole) * 100, 2) if whole else None
+
+
+def expand_slots(timings):
+    """Weekly slots as minute-of-week [start, end) per doctor, overnight shifts split, overlaps merged"""
+    dow = timings["day_of_week"].astype(str).str.strip().str.title().map({d: i for i, d in enumerate(WEEKDAYS)})
+    start_minutes = _clock_minutes(timings["start_time"])
+    end_minutes = _clock_minutes(timings["end_time"])
+    # Unknown weekdays and blank or unparseable times are dropped
+    valid = dow.notna() & start_minutes.notna() & end_minutes.notna()
+    timings = timings[valid]
+    start = dow[valid].astype(int) * DAY_MINUTES + start_minutes[valid].astype(int)
+    end = dow[valid].astype(int) * DAY_MINUTES + end_minutes[valid].astype(int)
+    end = end.where(end > start, end + DAY_MINUTES)  # shift past midnight
+
+    slots = pd.DataFrame({
+        "doctor_id": timings["doctor_id"].astype(str).to_numpy(),
+        "branch_id": timings["branch_id"].astype(str).to_numpy(),
+        "start": start.to_numpy(),
+        "end": end.to_numpy(),
+    })
+    # Sunday-night shifts wrap into Monday morning (the week starts on Monday)
+    wrap = slots["end"] > WEEK_MINUTES
+    wrapped = slots[wrap].assign(start=0, end=slots.loc[wrap, "end"] - WEEK_MINUTES)
+    slots.loc[wrap, "end"] = WEEK_MINUTES
+    slots = pd.concat([slots, wrapped], ignore_index=True)
+
+    # Merge overlapping slots of the same doctor so the interval index stays non-overlapping
+    slots = slots.sort_values(["doctor_id", "start"], kind="stable").reset_index(drop=True)
+    prev_end = slots.groupby("doctor_id")["end"].transform(lambda e: e.cummax().shift(fill_value=-1))
+    group = (slots["start"] >= prev_end).cumsum()
+    return slots.groupby(group).agg(
+        doctor_id=("doctor_id", "first"), branch_id=("branch_id", "first"),
+        start=("start", "min"), end=("end", "max")
+    ).reset_index(drop=True)
+
+
+class UtilizationEngine:
+    def __init__(self, timings, consult_minutes=CONSULT_MINUTES):
+        self.consult_minutes = consult_minutes
+        self.slots = expand_slots(timings)
+        self.doctor_ids = pd.Index(self.slots["doctor_id"].unique())
+        doctor_code = self.doctor_ids.get_indexer(self.slots["doctor_id"])
+        offset = doctor_code.astype(np.int64) * WEEK_MINUTES
+        self.index = pd.IntervalIndex.from_arrays(
+            offset + self.slots["start"].to_numpy(), offset + self.slots["end"].to_numpy(), closed="left"
+        )
+        if not self.index.is_non_overlapping_monotonic:
+            raise ValueError("Doctor slots must be sorted and non-overlapping")
+        self._left = self.index.left.to_numpy()
+        self._right = self.index.right.to_numpy()
+        self._slot_hours = self._expand_hours()
+
+    def _expand_hours(self):
+        """(slot, hour_of_week, scheduled minutes) for every hour a slot touches"""
+        start = self.slots["start"].to_numpy()
+        end = self.slots["end"].to_numpy()
+        first = start // 60
+        n = (end - 1) // 60 - first + 1
+        slot = np.repeat(np.arange(len(start)), n)
+        hour = np.repeat(first, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+        minutes = np.minimum(end[slot], (hour + 1) * 60) - np.maximum(start[slot], hour * 60)
+        return slot, hour % WEEK_HOURS, minutes
+
+    def match(self, doctor_ids, timestamps):
+        """Slot index of each visit (-1 when it falls outside the doctor's schedule)"""
+        code = self.doctor_ids.get_indexer(pd.Index(doctor_ids.astype(str)))
+        ts = pd.DatetimeIndex(timestamps)
+        minute_of_week = ts.dayofweek.to_numpy() * DAY_MINUTES + ts.hour.to_numpy() * 60 + ts.minute.to_numpy()
+        key = np.where((code >= 0) & ~ts.isna(), code.astype(np.int64) * WEEK_MINUTES + minute_of_week, -1)
+        # The index is sorted and non-overlapping, so a binary search on the left edges
+        # finds the only candidate slot (IntervalIndex.get_indexer is ~50x slower here)
+        pos = np.searchsorted(self._left, key, side="right") - 1
+        hit = (key >= 0) & (pos >= 0) & (key < self._right[np.maximum(pos, 0)])
+        return np.where(hit, pos, -1)
+
+    def compute(self, patients_df, doctor_names=None, branch_names=None):
+        """Utilization, overbooking and idle capacity over the period covered by the visits"""
+        doctor_names = doctor_names or {}
+        branch_names = branch_names or {}
+        ts = pd.to_datetime(patients_df["visit_timestamp"], errors="coerce")
+        visits = patients_df.loc[ts.notna(), ["doctor_id", "branch_id"]].astype(str)
+        ts = ts[ts.notna()]
+        if ts.empty or self.slots.empty:
+            return None
+
+        slot = self.match(visits["doctor_id"].to_numpy(), ts)
+        in_slot = slot >= 0
+
+        # How many times each weekday occurs in the period -> scheduled minutes per slot-hour
+        first_day, last_day = ts.min().normalize(), ts.max().normalize()
+        days = pd.date_range(first_day, last_day, freq="D")
+        weekday_count = np.bincount(days.dayofweek, minlength=7)
+        n_days = len(days)
+        slot_of_hour, hour_of_week, weekly_minutes = self._slot_hours
+        total_minutes = weekly_minutes * weekday_count[hour_of_week // 24]
+        n_slots = len(self.slots)
+
+        # Capacity per (slot, hour of week) in patients, for overbooking checks
+        cap_key = slot_of_hour.astype(np.int64) * WEEK_HOURS + hour_of_week
+        hour_capacity = pd.Series(weekly_minutes / self.consult_minutes, index=cap_key).groupby(level=0).sum()
+
+        # In-schedule visits per (slot, calendar day, hour)
+        day_index = ((ts.dt.normalize() - first_day).dt.days).to_numpy()
+        hour = ts.dt.hour.to_numpy()
+        bucket = (slot[in_slot].astype(np.int64) * n_days + day_index[in_slot]) * 24 + hour[in_slot]
+        buckets, counts = np.unique(bucket, return_counts=True)
+        bucket_slot = buckets // 24 // n_days
+        bucket_hour = buckets % 24
+        bucket_how = (first_day.dayofweek + (buckets // 24) % n_days) % 7 * 24 + bucket_hour
+        bucket_cap = hour_capacity.reindex(bucket_slot * WEEK_HOURS + bucket_how).fillna(0).to_numpy()
+        served = np.minimum(counts, bucket_cap)
+        excess = np.maximum(counts - bucket_cap, 0)
+        overbooked = excess > 0
+
+        # Per-slot totals, then rolled up by doctor and by branch
+        slot_capacity = np.bincount(slot_of_hour, weights=total_minutes, minlength=n_slots) / self.consult_minutes
+        slot_scheduled_hours = np.bincount(slot_of_hour, weights=total_minutes, minlength=n_slots) / 60
+        slot_visits = np.bincount(slot[in_slot], minlength=n_slots)
+        slot_served = np.bincount(bucket_slot, weights=served, minlength=n_slots)
+        slot_excess = np.bincount(bucket_slot, weights=excess, minlength=n_slots)
+        slot_overbooked_hours = np.bincount(bucket_slot, weights=overbooked, minlength=n_slots)
+
+        per_slot = self.slots[["doctor_id", "branch_id"]].assign(
+            scheduled_hours=slot_scheduled_hours, capacity=slot_capacity, visits_in_schedule=slot_visits,
+            served=slot_served, overbooked_visits=slot_excess, overbooked_hours=slot_overbooked_hours
+        )
+        outside = visits[~in_slot]
+
+        def rollup(key, names, outside_counts):
+            table = per_slot.groupby(key)[[
+                "scheduled_hours", "capacity", "visits_in_schedule", "served", "overbooked_visits", "overbooked_hours"
+            ]].sum()
+            table = table.join(outside_counts.rename("visits_outside_schedule"), how="outer").fillna(0)
+            rows = []
+            for ident, r in table.iterrows():
+                rows.append({
+                    key: ident,
+                    "name": names.get(ident, ident),
+                    "scheduled_hours": round(float(r["scheduled_hours"]), 1),
+                    "capacity_visits": int(r["capacity"]),
+                    "visits_in_schedule": int(r["visits_in_schedule"]),
+                    "visits_outside_schedule": int(r["visits_outside_schedule"]),
+                    "utilization_pct": _pct(r["visits_in_schedule"], r["capacity"]),
+                    "overbooked_hours": int(r["overbooked_hours"]),
+                    "overbooked_visits": int(r["overbooked_visits"]),
+                    "idle_capacity_visits": int(round(r["capacity"] - r["served"]))
+                })
+            return sorted(rows, key=lambda row: -(row["utilization_pct"] or 0))
+
+        doctors = rollup("doctor_id", doctor_names, outside["doctor_id"].value_counts())
+        branches = rollup("branch_id", branch_names, outside["branch_id"].value_counts())
+
+        # Hour-of-day profile across all doctors
+        hour_of_day = hour_of_week % 24
+        capacity_by_hour = np.bincount(hour_of_day, weights=total_minutes, minlength=24) / self.consult_minutes
+        served_by_hour = np.bincount(bucket_hour, weights=served, minlength=24)
+        excess_by_hour = np.bincount(bucket_hour, weights=excess, minlength=24)
+        outside_by_hour = np.bincount(hour[~in_slot], minlength=24)
+        by_hour = [
+            {
+                "hour": h,
+                "capacity_visits": int(capacity_by_hour[h]),
+                "served_visits": int(served_by_hour[h]),
+                "idle_capacity_visits": int(round(capacity_by_hour[h] - served_by_hour[h])),
+                "overbooked_visits": int(excess_by_hour[h]),
+                "visits_outside_schedule": int(outside_by_hour[h]),
+                "utilization_pct": _pct(served_by_hour[h] + excess_by_hour[h], capacity_by_hour[h])
+            }
+            for h in range(24) if capacity_by_hour[h] or outside_by_hour[h]
+        ]
+
+        capacity = slot_capacity.sum()
+        return {
+            "assumptions": {
+                "consult_minutes": self.consult_minutes,
+                "period": [str(first_day.date()), str(last_day.date())],
+                "days": n_days
+            },
+            "overview": {
+                "scheduled_hours": round(float(slot_scheduled_hours.sum()), 1),
+                "capacity_visits": int(capacity),
+                "visits_in_schedule": int(in_slot.sum()),
+                "visits_outside_schedule": int((~in_slot).sum()),
+                "utilization_pct": _pct(int(in_slot.sum()), capacity),
+                "overbooked_hours": int(overbooked.sum()),
+                "overbooked_visits": int(excess.sum()),
+                "idle_capacity_visits": int(round(capacity - served.sum()))
+            },
+            "doctors": doctors,
+            "branches": branches,
+            "by_hour": by_hour
+        }
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.anomaly import build_alerts
+from src.timeseries import DailyCube
+
+
+def cube_from_daily(names, counts, start="2024-01-01"):
+    """DailyCube with one disease column per name from a (days x series) count matrix"""
+    counts = np.asarray(counts, dtype=np.int64)
+    prefix = np.vstack([np.zeros((1, counts.shape[1]), dtype=np.int64), np.cumsum(counts, axis=0)])
+    return DailyCube(start, {"disease": np.array(names)}, {"disease": prefix})
+
+
+def steady(days, *levels):
+    return np.tile(np.array(levels, dtype=np.int64), (days, 1))
+
+
+def test_quiet_series_raise_no_alerts():
+    alerts = build_alerts(cube_from_daily(["Flu", "Dengue"], steady(120, 30, 5)))
+    assert alerts["active"] == []
+    assert alerts["total_episodes"] == 0
+    assert alerts["interpretation"].startswith("No active alerts")
+
+
+def test_surge_is_detected():
+    counts = steady(120, 30, 5)
+    counts[-2:, 1] = 25
+    alerts = build_alerts(cube_from_daily(["Flu", "Dengue"], counts))
+    assert [(e["name"], e["direction"]) for e in alerts["active"]] == [("Dengue", "surge")]
+    assert alerts["active"][0]["end"] == str(np.datetime64("2024-01-01") + 119)
+
+
+def test_strongest_alert_is_ranked_by_magnitude():
+    counts = steady(200, 30, 5)
+    counts[-6:, 0] = 0   # large drop
+    counts[-1:, 1] = 25  # smaller surge
+    alerts = build_alerts(cube_from_daily(["Flu", "Dengue"], counts))
+    by_name = {e["name"]: e for e in alerts["active"]}
+    assert by_name["Flu"]["direction"] == "drop"
+    assert by_name["Dengue"]["direction"] == "surge"
+    assert abs(by_name["Flu"]["peak_z"]) > by_name["Dengue"]["peak_z"]
+
+    assert "Strongest: drop in disease 'Flu'" in alerts["interpretation"]
+    # The on-record sentence only looks at surges
+    assert "strongest surge on record was disease 'Dengue'" in alerts["interpretation"]
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from src.fallback import FallbackEngine
+from src.json_kb import JSONKnowledgeBase
+
+KB = {
+    "summary": {"total_patients": 100, "total_doctors": 2, "total_branches": 1},
+    "entities": {},
+    "analytics": {
+        "disease_trends": {
+            "overview": {"total_cases": 100, "total_unique_diseases": 12},
+            "top_10_diseases": [
+                {"disease_name": "Dengue", "case_count": 40},
+                {"disease_name": "Influenza", "case_count": 25},
+                {"disease_name": "Typhoid", "case_count": 10},
+            ],
+        },
+        "doctor_workload": {"top_10_busiest_doctors": [
+            {"doctor_name": "Ali Khan", "specialty": "General Practice", "patient_count": 60},
+            {"doctor_name": "Sara Ahmed", "specialty": "Pediatrics", "patient_count": 40},
+        ]},
+        "geographic_distribution": {"top_10_areas": [], "branch_distribution": []},
+    },
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "analytics_kb.json"
+    path.write_text(json.dumps(KB), encoding="utf-8")
+    return FallbackEngine(JSONKnowledgeBase(str(path)))
+
+
+def test_compares_two_known_diseases(engine):
+    answer = engine.answer("Dengue vs Influenza")
+    assert "**Dengue** has 15 more than **Influenza** (1.60x)" in answer
+
+
+def test_says_when_one_side_is_not_in_the_kb(engine):
+    answer = engine.answer("Compare dengue with malaria")
+    assert "**Malaria** is not in the knowledge base" in answer
+    assert "only lists the top 3 diseases" in answer
+    assert "**Dengue** (disease): 40 cases" in answer
+    # No made-up comparison against the leader
+    assert "more than" not in answer
+
+
+def test_single_entity_compares_against_the_leader(engine):
+    answer = engine.answer("How does typhoid compare?")
+    assert "**Dengue** has 30 more than **Typhoid**" in answer
+
+
+def test_top_entity_compares_against_the_runner_up(engine):
+    answer = engine.answer("How does dengue compare?")
+    assert "**Dengue** has 15 more than **Influenza**" in answer
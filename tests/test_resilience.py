@@ -0,0 +1,132 @@
+from src.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def tripped_breaker(clock):
+    breaker = CircuitBreaker(window=4, min_calls=4, cooldown=30.0, clock=clock)
+    for _ in range(4):
+        breaker.record(False, 0.1, breaker.allow())
+    return breaker
+
+
+def test_breaker_opens_on_error_rate():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=4, min_calls=4, error_rate=0.5, clock=clock)
+    for success in (True, True, False):
+        breaker.record(success, 0.1, breaker.allow())
+    assert breaker.state == CLOSED
+    breaker.record(False, 0.1, breaker.allow())
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(window=4, min_calls=4, slow_call_seconds=1.0, clock=FakeClock())
+    for _ in range(4):
+        breaker.record(True, 2.0, breaker.allow())
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_rejects_until_cooldown():
+    clock = FakeClock()
+    breaker = tripped_breaker(clock)
+    assert breaker.allow() is None
+    clock.now = 29.9
+    assert breaker.allow() is None
+    clock.now = 30.0
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_admits_one_probe():
+    clock = FakeClock()
+    breaker = tripped_breaker(clock)
+    clock.now = 30.0
+    probe = breaker.allow()
+    assert probe is not None
+    assert breaker.allow() is None
+
+
+def test_probe_success_closes():
+    clock = FakeClock()
+    breaker = tripped_breaker(clock)
+    clock.now = 30.0
+    breaker.record(True, 0.1, breaker.allow())
+    assert breaker.state == CLOSED
+    assert breaker.allow() is not None
+
+
+def test_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = tripped_breaker(clock)
+    clock.now = 30.0
+    breaker.record(False, 0.1, breaker.allow())
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    clock.now = 59.0
+    assert breaker.allow() is None
+
+
+def test_slow_probe_reopens():
+    clock = FakeClock()
+    breaker = tripped_breaker(clock)
+    clock.now = 30.0
+    breaker.record(True, breaker.slow_call_seconds, breaker.allow())
+    assert breaker.state == OPEN
+
+
+def test_half_open_ignores_calls_other_than_the_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=4, min_calls=4, cooldown=30.0, clock=clock)
+    straggler = breaker.allow()  # started while closed, finishes late
+    for _ in range(4):
+        breaker.record(False, 0.1, breaker.allow())
+    clock.now = 30.0
+    probe = breaker.allow()
+
+    breaker.record(True, 0.1, straggler)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is None  # the probe is still in flight
+
+    breaker.record(False, 0.1, probe)
+    assert breaker.state == OPEN
+
+
+def test_bucket_spends_burst_then_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(60, burst=2, clock=clock, sleep=clock.sleep)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 1.0  # one token per second at 60/min
+    assert bucket.acquire(deadline=clock.now + 1.0)
+    assert clock.now == 1.0
+
+
+def test_bucket_gives_up_past_deadline():
+    clock = FakeClock()
+    bucket = TokenBucket(60, burst=1, clock=clock, sleep=clock.sleep)
+    bucket.try_acquire()
+    assert not bucket.acquire(deadline=clock.now + 0.5)
+    assert clock.now == 0.0
+
+
+def test_bucket_penalize_and_reward():
+    clock = FakeClock()
+    bucket = TokenBucket(10, burst=5, min_rate_per_minute=4, recovery_per_success=1, clock=clock)
+    bucket.penalize()
+    assert bucket.rate == 5
+    assert bucket.try_acquire() > 0  # banked tokens are dropped
+    bucket.penalize()
+    assert bucket.rate == 4  # floored at min_rate
+    for _ in range(10):
+        bucket.reward()
+    assert bucket.rate == 10  # capped at the configured rate
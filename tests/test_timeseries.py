@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from src.timeseries import DailyCube
+
+
+def visits(rows):
+    """rows: (date, disease, doctor_id) -> patients frame with one visit each"""
+    return pd.DataFrame(rows, columns=["visit_timestamp", "cleaned_disease_name", "doctor_id"])
+
+
+def daily(start, end, disease, doctor="D1", per_day=1):
+    return [(f"{day.date()} 10:00", disease, doctor)
+            for day in pd.date_range(start, end) for _ in range(per_day)]
+
+
+def by_name(result):
+    return {row["name"]: row for row in result["top"]}
+
+
+def test_window_against_the_previous_window():
+    cube = DailyCube.from_visits(visits(daily("2024-01-01", "2024-01-20", "Flu")
+                                        + daily("2024-01-14", "2024-01-20", "Dengue", per_day=2)))
+    window = cube.window(7)
+    assert window["current_period"] == ["2024-01-14", "2024-01-20"]
+    assert window["previous_period"] == ["2024-01-07", "2024-01-13"]
+    assert window["previous_complete"]
+
+    disease = window["dimensions"]["disease"]
+    assert disease["total"] == {"current": 21, "previous": 7, "change_pct": 200.0}
+    assert [row["name"] for row in disease["top"]] == ["Dengue", "Flu"]
+    assert by_name(disease)["Dengue"]["change_pct"] is None
+    assert by_name(disease)["Flu"]["change_pct"] == 0.0
+
+
+def test_window_longer_than_the_history():
+    cube = DailyCube.from_visits(visits(daily("2024-01-01", "2024-01-20", "Flu")))
+    window = cube.window(14)
+    assert not window["previous_complete"]
+    assert window["dimensions"]["disease"]["total"] == {"current": 14, "previous": 6, "change_pct": 133.33}
+
+
+def test_totals_are_clipped_to_the_cube():
+    cube = DailyCube.from_visits(visits(daily("2024-01-01", "2024-01-10", "Flu")))
+    assert cube.totals("disease", np.datetime64("2023-12-01"), np.datetime64("2024-01-03")).tolist() == [3]
+    assert cube.totals("disease", np.datetime64("2024-02-01"), np.datetime64("2024-02-10")).tolist() == [0]
+
+
+def test_month_over_month_full_month():
+    cube = DailyCube.from_visits(visits(daily("2023-12-01", "2024-01-31", "Flu")
+                                        + daily("2024-01-01", "2024-01-31", "Dengue")))
+    mom = cube.month_over_month()
+    assert mom["comparison"] == "full_month"
+    assert (mom["current_month"], mom["previous_month"]) == ("2024-01", "2023-12")
+    assert mom["previous_period"] == ["2023-12-01", "2023-12-31"]
+    assert mom["dimensions"]["disease"]["total"] == {"current": 62, "previous": 31, "change_pct": 100.0}
+
+
+def test_month_over_month_compares_month_to_date_like_for_like():
+    cube = DailyCube.from_visits(visits(daily("2024-01-01", "2024-02-10", "Flu")))
+    mom = cube.month_over_month()
+    assert mom["comparison"] == "month_to_date"
+    assert mom["current_period"] == ["2024-02-01", "2024-02-10"]
+    assert mom["previous_period"] == ["2024-01-01", "2024-01-10"]
+    assert mom["dimensions"]["disease"]["total"] == {"current": 10, "previous": 10, "change_pct": 0.0}
+
+
+def test_month_to_date_stops_at_the_end_of_a_shorter_previous_month():
+    cube = DailyCube.from_visits(visits(daily("2024-02-01", "2024-03-30", "Flu")))
+    mom = cube.month_over_month()
+    assert mom["comparison"] == "month_to_date"
+    assert mom["previous_period"] == ["2024-02-01", "2024-02-29"]
+
+
+def test_doctors_are_keyed_by_id_and_shown_by_name():
+    rows = daily("2024-01-01", "2024-01-07", "Flu", "D1") + daily("2024-01-01", "2024-01-07", "Flu", "D2", per_day=2)
+    cube = DailyCube.from_visits(visits(rows), names={"doctor": {"D1": "Ali Khan", "D2": "Ali Khan"}})
+    assert sorted(cube.labels["doctor"]) == ["D1", "D2"]
+    top = cube.window(7)["dimensions"]["doctor"]["top"]
+    assert [(row["name"], row["current"]) for row in top] == [("Ali Khan", 14), ("Ali Khan", 7)]
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.utilization import DAY_MINUTES, WEEK_MINUTES, expand_slots
+
+
+def timings(*rows):
+    return pd.DataFrame(rows, columns=["doctor_id", "branch_id", "day_of_week", "start_time", "end_time"])
+
+
+def intervals(slots, doctor="D1"):
+    return sorted(zip(slots.loc[slots["doctor_id"] == doctor, "start"], slots.loc[slots["doctor_id"] == doctor, "end"]))
+
+
+def test_day_slot():
+    slots = expand_slots(timings(("D1", "B1", "Tuesday", "09:00", "13:30")))
+    assert intervals(slots) == [(DAY_MINUTES + 9 * 60, DAY_MINUTES + 13 * 60 + 30)]
+
+
+def test_overnight_shift_runs_into_the_next_day():
+    slots = expand_slots(timings(("D1", "B1", "Monday", "22:00", "02:00")))
+    assert intervals(slots) == [(22 * 60, DAY_MINUTES + 2 * 60)]
+
+
+def test_sunday_night_shift_wraps_into_monday_morning():
+    slots = expand_slots(timings(("D1", "B1", "Sunday", "22:00", "02:00")))
+    assert intervals(slots) == [(0, 2 * 60), (6 * DAY_MINUTES + 22 * 60, WEEK_MINUTES)]
+
+
+def test_wrapped_shift_merges_with_monday_slot():
+    slots = expand_slots(timings(("D1", "B1", "Sunday", "22:00", "02:00"),
+                                 ("D1", "B1", "Monday", "01:00", "05:00")))
+    assert intervals(slots) == [(0, 5 * 60), (6 * DAY_MINUTES + 22 * 60, WEEK_MINUTES)]
+
+
+def test_overlapping_slots_merge_per_doctor():
+    slots = expand_slots(timings(("D1", "B1", "Monday", "09:00", "12:00"),
+                                 ("D1", "B1", "Monday", "11:00", "14:00"),
+                                 ("D2", "B1", "Monday", "10:00", "11:00")))
+    assert intervals(slots) == [(9 * 60, 14 * 60)]
+    assert intervals(slots, "D2") == [(10 * 60, 11 * 60)]
+
+
+def test_twelve_hour_times():
+    slots = expand_slots(timings(("D1", "B1", "Monday", "9:30 AM", "2:00 PM"),
+                                 ("D2", "B1", "Monday", "12:00 PM", "12:00 AM")))
+    assert intervals(slots) == [(9 * 60 + 30, 14 * 60)]
+    assert intervals(slots, "D2") == [(12 * 60, DAY_MINUTES)]
+
+
+def test_unparseable_rows_are_dropped():
+    slots = expand_slots(timings(("D1", "B1", "Monday", "09:00", "12:00"),
+                                 ("D2", "B1", "Monday", None, "12:00"),
+                                 ("D3", "B1", "Monday", "25:00", "26:00"),
+                                 ("D4", "B1", "Monday", "13:00 PM", "3 PM"),
+                                 ("D5", "B1", "Someday", "09:00", "12:00")))
+    assert list(slots["doctor_id"]) == ["D1"]